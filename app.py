@@ -4,28 +4,94 @@ Flask app for rendering GitHub repos to single HTML pages.
 Refactored for better code structure and maintainability.
 """
 
-from flask import Flask, request, jsonify, render_template_string
-import tempfile
-import shutil
-import pathlib
+from flask import Flask, Response, request, jsonify, render_template_string, send_file, stream_with_context
+import html
+import re
+from urllib.parse import quote
+from datetime import datetime, timezone
 import logging
 
 # Local imports
-from core.repo_to_single_page import collect_files, build_html, MAX_DEFAULT_BYTES
-from core.github_api import fetch_github_repo, GitHubAPIError
-from core.templates import INDEX_TEMPLATE, ERROR_TEMPLATE
-from core.utils import parse_github_url, validate_github_url, create_repo_id, create_repo_path
+from core.repo_to_single_page import (
+    iter_html, iter_directory_sections, iter_cxml_text, iter_cxml_chunk, iter_cxml_selection, cxml_document_tokens,
+    plan_cxml_chunks, rank_cxml_documents, build_search_index, collect_symbols, line_stats, directory_of, highlight_job, symbols_job, outline_job, MAX_DEFAULT_BYTES, HIGHLIGHT_SERVER, HIGHLIGHT_CLIENT,
+    RENDERER_VERSION, STATIC_ASSETS, looks_binary, bytes_human
+)
+from core.assets import STATIC_URL_PREFIX, IMMUTABLE_CACHE_CONTROL
+from core.blobs import BLOB_PAGE_LINES, MAX_LINE_INDEXES, MAX_RENDERED_WINDOWS, LineIndex, raw_content_type
+from core.formatter import CompactHtmlFormatter
+from core.compression import PageCompressor, compress_page
+from core.github_api import GitHubAPIError, resolve_commit
+from core.checkouts import CheckoutStore
+from core.budget import RenderBudget, DEFAULT_RENDER_BUDGET_SECONDS, MODE_LISTED
+from core.search_index import SearchIndex, bounded_search
+from core.symbols import SYMBOL_KINDS
+from core.tokens import DEFAULT_CHUNK_TOKENS
+from core.ranking import UNIT_BYTES, UNIT_TOKENS
+from core.watchdog import HighlightWatchdog, HighlightTimeout
+from core.templates import INDEX_TEMPLATE, ERROR_TEMPLATE, BLOB_TEMPLATE
+from core.utils import (
+    parse_github_url, validate_github_url, create_repo_id, create_repo_path, create_page_etag, is_commit_sha, LRUCache
+)
 
 # Configure Flask app
-app = Flask(__name__)
+# Page assets are served from memory by static_asset() below
+app = Flask(__name__, static_folder=None)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max request size
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Store rendered HTML temporarily (in production, use Redis/database)
+# Entries kept in the caches below; a search index holds up to tens of MiB of text
+MAX_CACHED_FRAGMENTS = 1024
+MAX_SEARCH_INDEXES = 8
+MAX_SYMBOL_INDEXES = 32
+
+# Store rendered pages temporarily, compressed (in production, use Redis/database)
 rendered_pages = {}
+# Per-directory section fragments of paged pages, keyed by (repo_url, sha, max_bytes, dir)
+rendered_fragments = LRUCache(MAX_CACHED_FRAGMENTS)
+# Recent checkouts, kept on disk so fragments can be rendered after the page
+checkouts = CheckoutStore()
+# Content search indexes, keyed by (repo_url, full sha, max_bytes); built while the page renders
+search_indexes = LRUCache(MAX_SEARCH_INDEXES)
+# Symbol outlines, keyed like search indexes: lists of (path, symbols)
+symbol_indexes = LRUCache(MAX_SYMBOL_INDEXES)
+# Line indexes of files opened in the blob viewer, keyed by (repo_url, sha, path),
+# and its rendered pages, keyed by (repo_url, sha, path, page)
+line_indexes = LRUCache(MAX_LINE_INDEXES)
+blob_pages = LRUCache(MAX_RENDERED_WINDOWS)
+
+# Repos with more renderable bytes than this are highlighted in the browser
+CLIENT_HIGHLIGHT_MIN_BYTES = 2 * 1024 * 1024
+
+# Repos above either limit get a paged page: the tree and a placeholder per
+# directory, whose sections are fetched from the sections endpoint on demand
+PAGED_MIN_BYTES = 8 * 1024 * 1024
+PAGED_MIN_FILES = 2000
+
+# Outline pages and pages with a requested highlight mode are cached next to
+# the default page, under its key plus one of these
+OUTLINE_CACHE_SUFFIX = ':outline'
+HIGHLIGHT_CACHE_SUFFIX = ':highlight='
+
+# Smallest chunk size accepted by the chunk endpoints
+MIN_CHUNK_TOKENS = 1000
+
+# Search API: hits per page, and time allowed to scan files for one query
+SEARCH_PAGE_HITS = 50
+SEARCH_MAX_PAGE_HITS = 200
+SEARCH_TIME_LIMIT_SECONDS = 2.0
+
+# Symbols API: symbols per response by default, and at most (the page asks for the most)
+SYMBOLS_LIMIT = 1000
+SYMBOLS_MAX_LIMIT = 100000
+
+# Branch pages may be re-rendered at a new commit, so browsers must revalidate
+# (cheap: a 304 from the ETag); pages pinned to a commit never change.
+BRANCH_CACHE_CONTROL = 'no-cache'
+COMMIT_CACHE_CONTROL = IMMUTABLE_CACHE_CONTROL
 
 
 @app.route('/')
@@ -44,6 +110,12 @@ def render_repo():
         
         repo_url = data['repo_url']
         max_bytes = data.get('max_bytes', MAX_DEFAULT_BYTES)
+        highlight_mode = data.get('highlight')
+        if highlight_mode not in (None, HIGHLIGHT_SERVER, HIGHLIGHT_CLIENT):
+            return jsonify({'error': f"highlight must be '{HIGHLIGHT_SERVER}' or '{HIGHLIGHT_CLIENT}'"}), 400
+        outline = data.get('outline', False)
+        if not isinstance(outline, bool):
+            return jsonify({'error': 'outline must be true or false'}), 400
         
         # Validate GitHub URL
         if not validate_github_url(repo_url):
@@ -53,6 +125,9 @@ def render_repo():
         owner, repo = parse_github_url(repo_url)
         repo_id = create_repo_id(owner, repo)
         repo_path = create_repo_path(owner, repo)
+        # The redirect selects the same variant, so visitors of the plain page never get this one
+        suffix, query = _page_options(highlight_mode, outline)
+        repo_id, repo_path = repo_id + suffix, repo_path + query
         
         # Check if already cached
         if repo_id in rendered_pages:
@@ -65,14 +140,10 @@ def render_repo():
             })
         
         # Render the repository
-        html_content, stats = _render_repository(repo_url, max_bytes)
+        html_content, stats = _render_repository(repo_url, max_bytes, highlight_mode, outline)
         
         # Cache the result
-        rendered_pages[repo_id] = {
-            'html': html_content,
-            'stats': stats,
-            'repo_url': repo_url
-        }
+        rendered_pages[repo_id] = _cache_entry(compress_page(html_content), stats, repo_url, max_bytes)
         
         return jsonify({
             'success': True,
@@ -88,69 +159,236 @@ def render_repo():
         return jsonify({'error': str(e)}), 500
 
 
-def _render_repository(repo_url: str, max_bytes: int):
+def _render_repository_iter(repo_url: str, max_bytes: int, stats: dict, highlight_mode: str = None,
+                            ref: str = None, outline: bool = False):
     """
-    Internal function to render a repository.
+    Internal generator rendering a repository chunk by chunk.
     
-    Returns:
-        Tuple of (html_content, stats)
+    The repository is fetched and scanned before the first chunk is yielded, so
+    fetch errors surface on the first next() call. `stats` is filled in once the
+    last chunk has been produced, except 'commit_sha' and the options that
+    shape the page ('highlight_mode', 'paged', 'outline'), which are set
+    before the first chunk.
+    
+    `ref` pins the render to a branch, tag or commit instead of the default branch.
+    If highlight_mode is None, large repositories are highlighted client-side.
+    Outline pages show only each file's definitions; they are highlighted on
+    the server and never paged, whatever the repository's size.
     """
-    tmpdir = tempfile.mkdtemp(prefix="gitrender_")
-    repo_dir = pathlib.Path(tmpdir, "repo")
+    budget = RenderBudget(DEFAULT_RENDER_BUDGET_SECONDS)
+    watchdog = HighlightWatchdog(outline_job if outline else highlight_job)
+    checkout = None
     
     try:
         logger.info(f"Fetching {repo_url}")
-        head = fetch_github_repo(repo_url, repo_dir)
+        with budget.phase('fetch'):
+            checkout = checkouts.acquire(repo_url, ref)
+        head = checkout.sha
+        stats['commit_sha'] = head
+        
+        logger.info(f"Scanning files in {checkout.repo_dir}")
+        with budget.phase('scan'):
+            infos = checkout.files(max_bytes)
+        
+        owner, repo = parse_github_url(repo_url)
+        # The LLM view and the search index are fetched when first used
+        llm_url = f"/{owner}/{repo}/@{head}.txt?max_bytes={max_bytes}"
+        search_url = f"/{owner}/{repo}/@{head}/search-index?max_bytes={max_bytes}"
+        symbols_url = f"/{owner}/{repo}/@{head}/symbols?max_bytes={max_bytes}&limit={SYMBOLS_MAX_LIMIT}"
+        blob_url = f"/{owner}/{repo}/@{head}/blob/"
+        raw_url = f"/{owner}/{repo}/@{head}/raw/"
+        search_index = SearchIndex()
+        rendered = [i for i in infos if i.decision.include]
+        rendered_bytes = sum(i.size for i in rendered)
+        fragment_url = None
+        if outline:
+            # Search and symbols come from the full files; their lines are not in the outline
+            highlight_mode, search_index, symbols_url = HIGHLIGHT_SERVER, None, None
+        elif rendered_bytes > PAGED_MIN_BYTES or len(rendered) > PAGED_MIN_FILES:
+            # Sections are rendered per directory when the browser asks for them
+            fragment_url = f"/{owner}/{repo}/@{head}/sections?max_bytes={max_bytes}&dir="
+        elif highlight_mode is None:
+            highlight_mode = HIGHLIGHT_CLIENT if rendered_bytes > CLIENT_HIGHLIGHT_MIN_BYTES else HIGHLIGHT_SERVER
+        highlight_mode = highlight_mode or HIGHLIGHT_SERVER
+        stats.update({'highlight_mode': highlight_mode, 'paged': fragment_url is not None, 'outline': outline})
+        
+        logger.info(f"Generating HTML ({highlight_mode} highlighting{', paged' if fragment_url else ''}"
+                    f"{', outline' if outline else ''})")
+        with budget.phase('highlight'):
+            yield from iter_html(repo_url, checkout.repo_dir, head, infos, budget=budget, watchdog=watchdog,
+                                 highlight_mode=highlight_mode, asset_base=STATIC_URL_PREFIX,
+                                 fragment_url=fragment_url, llm_url=llm_url,
+                                 search_index=search_index, search_url=search_url, symbols_url=symbols_url,
+                                 outline=outline, blob_url=blob_url, raw_url=raw_url)
         
-        logger.info(f"Scanning files in {repo_dir}")
-        infos = collect_files(repo_dir, max_bytes)
+        # Paged pages and files listed only by the budget were not read; the
+        # search index and symbols endpoints read them from the checkout instead
+        listed = budget.degraded_paths(MODE_LISTED)
+        if fragment_url is None and not outline and not listed:
+            search_indexes.put((repo_url, head, max_bytes), search_index)
+            if highlight_mode == HIGHLIGHT_SERVER:
+                symbol_indexes.put((repo_url, head, max_bytes), [(i.rel, i.symbols) for i in infos if i.symbols])
         
-        logger.info("Generating HTML")
-        html_content = build_html(repo_url, repo_dir, head, infos)
+        if budget.degraded:
+            logger.warning(f"Render budget degraded {len(budget.degraded)} files of {repo_url}")
         
-        stats = {
+        stats.update({
             'total_files': len(infos),
             'rendered_files': sum(1 for i in infos if i.decision.include),
             'skipped_files': sum(1 for i in infos if not i.decision.include),
-            'commit': head[:8]
-        }
-        
-        return html_content, stats
+            'commit': head[:8],
+            # Counted while sections rendered, so not for paged pages
+            'lines': line_stats(infos),
+            # Paged pages and files listed only by the budget were not read, and are
+            # not read now the budget is spent; the chunks endpoint counts on demand
+            'llm': _llm_chunk_summary(owner, repo, head, max_bytes, DEFAULT_CHUNK_TOKENS,
+                                      None if fragment_url or listed else infos),
+            'budget': budget.to_stats(),
+            'slow_lexers': watchdog.slow_lexers
+        })
         
     finally:
-        # Clean up temporary directory
-        shutil.rmtree(tmpdir, ignore_errors=True)
+        watchdog.close()
+        # The checkout stays on disk for section requests until the store evicts it
+        if checkout is not None:
+            checkouts.release(checkout)
+
+
+def _render_repository(repo_url: str, max_bytes: int, highlight_mode: str = None, outline: bool = False):
+    """
+    Internal function to render a repository.
+    
+    Returns:
+        Tuple of (html_content, stats)
+    """
+    stats = {}
+    html_content = "".join(_render_repository_iter(repo_url, max_bytes, stats, highlight_mode, outline=outline))
+    return html_content, stats
+
+
+def _cache_entry(page, stats: dict, repo_url: str, max_bytes: int) -> dict:
+    """Build a rendered_pages entry, with the validators used for conditional GETs."""
+    return {
+        'page': page,
+        'stats': stats,
+        'repo_url': repo_url,
+        'etag': create_page_etag(stats['commit_sha'], max_bytes, _page_variant(stats)),
+        'rendered_at': datetime.now(timezone.utc).replace(microsecond=0)
+    }
+
+
+def _page_options(highlight_mode: str, outline: bool) -> tuple:
+    """
+    (cache key suffix, query string) of the page variant rendered with these
+    options; outline pages are always highlighted on the server.
+    """
+    if outline:
+        return OUTLINE_CACHE_SUFFIX, "?outline=1"
+    if highlight_mode:
+        return f"{HIGHLIGHT_CACHE_SUFFIX}{highlight_mode}", f"?highlight={highlight_mode}"
+    return "", ""
+
+
+def _page_variant(stats: dict) -> str:
+    """
+    Renderer version and the render options that change the page's body, as
+    mixed into page ETags: a page highlighted in the browser, paged, or
+    outlined never validates a cached copy of another variant.
+    """
+    variant = f"{RENDERER_VERSION}:{stats['highlight_mode']}"
+    if stats['paged']:
+        variant += ":paged"
+    if stats['outline']:
+        variant += ":outline"
+    return variant
+
+
+def _stream_and_cache(cache_key: str, github_url: str, first_chunk: str, chunks, stats: dict):
+    """Yield the rendered page while compressing a copy for the cache once it completes."""
+    compressor = PageCompressor()
+    try:
+        compressor.feed(first_chunk)
+        yield first_chunk
+        for chunk in chunks:
+            compressor.feed(chunk)
+            yield chunk
+    except Exception as e:
+        # Headers are already sent, so the error can only be reported in the page
+        logger.error(f"Error while streaming {github_url}: {str(e)}")
+        yield f'<pre class="error">Error rendering repository: {html.escape(str(e))}</pre>'
+        return
+    finally:
+        chunks.close()
+    
+    page = compressor.finish()
+    logger.info(f"Cached {github_url}: {page.raw_size} bytes, {page.stored_size()} stored ({', '.join(page.bodies)})")
+    rendered_pages[cache_key] = _cache_entry(page, stats, github_url, MAX_DEFAULT_BYTES)
+
+
+@app.route('/static/<name>')
+def static_asset(name):
+    """Serve a fingerprinted page asset; its name changes with its content."""
+    asset = STATIC_ASSETS.get(name)
+    if asset is None:
+        return "Not found", 404
+    return Response(asset.body, content_type=asset.content_type,
+                    headers={'Cache-Control': IMMUTABLE_CACHE_CONTROL})
 
 
 @app.route('/<owner>/<repo>')
 @app.route('/<owner>/<repo>/')
 def render_github_repo_direct(owner, repo):
     """Direct GitHub repository rendering via URL path."""
+    return _serve_repository(owner, repo)
+
+
+@app.route('/<owner>/<repo>/@<sha>')
+def render_github_repo_at_commit(owner, repo, sha):
+    """Render a repository at a fixed commit; the page never changes, so it is cached for good."""
+    sha = sha.lower()
+    if not is_commit_sha(sha):
+        return _render_error("Invalid commit SHA", f"https://github.com/{owner}/{repo}"), 404
+    return _serve_repository(owner, repo, sha)
+
+
+def _serve_repository(owner: str, repo: str, ref: str = None):
+    """
+    Serve a repository page from the cache, or render and stream it; ?outline=1
+    serves its outline page and ?highlight=server|client forces a highlight mode.
+    """
+    github_url = f"https://github.com/{owner}/{repo}"
     try:
         # Validate owner/repo format
         if not owner or not repo or '/' in owner or '/' in repo:
             return _render_error("Invalid repository path", f"/{owner}/{repo}")
         
-        github_url = f"https://github.com/{owner}/{repo}"
+        outline = request.args.get('outline', '') not in ('', '0', 'false')
+        highlight_mode = request.args.get('highlight') or None
+        if highlight_mode not in (None, HIGHLIGHT_SERVER, HIGHLIGHT_CLIENT):
+            return _render_error(f"highlight must be '{HIGHLIGHT_SERVER}' or '{HIGHLIGHT_CLIENT}'", github_url), 400
         repo_id = create_repo_id(owner, repo)
+        cache_key = f"{repo_id}@{ref}" if ref else repo_id
+        cache_key += _page_options(highlight_mode, outline)[0]
+        cache_control = COMMIT_CACHE_CONTROL if ref else BRANCH_CACHE_CONTROL
         
         # Check if already rendered
-        if repo_id in rendered_pages:
-            logger.info(f"Serving cached version of {github_url}")
-            return rendered_pages[repo_id]['html']
-        
-        # Render the repository
-        logger.info(f"Direct rendering {github_url}")
-        html_content, stats = _render_repository(github_url, MAX_DEFAULT_BYTES)
+        if cache_key in rendered_pages:
+            logger.info(f"Serving cached version of {github_url}" + (f" at {ref}" if ref else ""))
+            return _send_page(rendered_pages[cache_key], cache_control)
         
-        # Cache the result
-        rendered_pages[repo_id] = {
-            'html': html_content,
-            'stats': stats,
-            'repo_url': github_url
-        }
+        # Render the repository, streaming sections as they are highlighted.
+        # The first chunk is produced eagerly so fetch errors keep their status code.
+        logger.info(f"Direct rendering {github_url}" + (f" at {ref}" if ref else ""))
+        stats = {}
+        chunks = _render_repository_iter(github_url, MAX_DEFAULT_BYTES, stats, highlight_mode, ref, outline)
+        first_chunk = next(chunks)
         
-        return html_content
+        response = Response(stream_with_context(_stream_and_cache(cache_key, github_url, first_chunk, chunks, stats)),
+                            mimetype='text/html')
+        response.set_etag(create_page_etag(stats['commit_sha'], MAX_DEFAULT_BYTES, _page_variant(stats)))
+        response.last_modified = datetime.now(timezone.utc)
+        response.headers['Cache-Control'] = cache_control
+        return response
         
     except GitHubAPIError as e:
         logger.error(f"GitHub API error for {github_url}: {str(e)}")
@@ -160,6 +398,601 @@ def render_github_repo_direct(owner, repo):
         return _render_error(f"Error rendering repository: {str(e)}", github_url), 500
 
 
+@app.route('/<owner>/<repo>/@<sha>/sections')
+def render_directory_sections(owner, repo, sha):
+    """Sections of one directory of a paged page, rendered on first request."""
+    sha = sha.lower()
+    dir_path = request.args.get('dir', '')
+    github_url = f"https://github.com/{owner}/{repo}"
+    try:
+        max_bytes = int(request.args.get('max_bytes', MAX_DEFAULT_BYTES))
+    except ValueError:
+        return "Invalid max_bytes", 400
+    if not is_commit_sha(sha):
+        return "Invalid commit SHA", 404
+    
+    key = (github_url, sha, max_bytes, dir_path)
+    entry = rendered_fragments.get(key)
+    if entry is None:
+        try:
+            checkout = checkouts.acquire(github_url, sha)
+        except GitHubAPIError as e:
+            logger.error(f"GitHub API error for {github_url}: {str(e)}")
+            return f"Failed to fetch repository: {str(e)}", 404
+        watchdog = HighlightWatchdog(highlight_job)
+        try:
+            files = [i for i in checkout.files(max_bytes)
+                     if i.decision.include and directory_of(i.rel) == dir_path]
+            if not files:
+                return "No rendered files in this directory", 404
+            fragment = compress_page(iter_directory_sections(files, RenderBudget(DEFAULT_RENDER_BUDGET_SECONDS),
+                                                             watchdog, raw_url=f"/{owner}/{repo}/@{checkout.sha}/raw/"))
+        finally:
+            watchdog.close()
+            checkouts.release(checkout)
+        entry = {
+            'page': fragment,
+            'etag': create_page_etag(checkout.sha, max_bytes, f"{RENDERER_VERSION}:{dir_path}"),
+            'rendered_at': datetime.now(timezone.utc).replace(microsecond=0)
+        }
+        rendered_fragments.put(key, entry)
+    return _send_page(entry, COMMIT_CACHE_CONTROL)
+
+
+@app.route('/<owner>/<repo>/blob/<path:path>')
+@app.route('/<owner>/<repo>/@<sha>/blob/<path:path>')
+def view_blob(owner, repo, path, sha=None):
+    """
+    One text file of a repository, BLOB_PAGE_LINES lines per page (?page=N);
+    the page's previews of files too large to render link here. Without a
+    commit, the file is shown at the commit the page was rendered at, or at
+    the default branch head.
+    """
+    github_url = f"https://github.com/{owner}/{repo}"
+    try:
+        page = int(request.args.get('page', 1))
+    except ValueError:
+        return "Invalid page", 400
+    if page < 1:
+        return "Invalid page", 400
+    if sha is not None:
+        sha, cache_control = sha.lower(), COMMIT_CACHE_CONTROL
+        if not is_commit_sha(sha):
+            return _render_error("Invalid commit SHA", github_url), 404
+    else:
+        cache_control = BRANCH_CACHE_CONTROL
+        try:
+            sha = _branch_commit(owner, repo)
+        except GitHubAPIError as e:
+            logger.error(f"GitHub API error for {github_url}: {str(e)}")
+            return _render_error(f"Failed to fetch repository: {str(e)}", github_url), 404
+    
+    body = blob_pages.get((github_url, sha, path, page))
+    if body is None:
+        try:
+            checkout = checkouts.acquire(github_url, sha)
+        except GitHubAPIError as e:
+            logger.error(f"GitHub API error for {github_url}: {str(e)}")
+            return _render_error(f"Failed to fetch repository: {str(e)}", github_url), 404
+        try:
+            body = blob_pages.get((github_url, checkout.sha, path, page))
+            if body is None:
+                info = next((i for i in checkout.files(MAX_DEFAULT_BYTES) if i.rel == path), None)
+                if info is None or info.decision.reason in ('ignored', 'binary') or looks_binary(info.path):
+                    return _render_error(f"No text file {path} at {checkout.sha[:8]}", github_url), 404
+                index = line_indexes.get((github_url, checkout.sha, path))
+                if index is None:
+                    index = LineIndex(info.path)
+                    line_indexes.put((github_url, checkout.sha, path), index)
+                    logger.info(f"Indexed {index.lines} lines of {path} in {github_url} at {checkout.sha[:8]}")
+                if page > index.pages():
+                    return _render_error(f"{path} has only {index.pages()} pages", github_url), 404
+                first = (page - 1) * BLOB_PAGE_LINES
+                lines = index.window(info.path, first, BLOB_PAGE_LINES)
+        finally:
+            checkouts.release(checkout)
+        if body is None:
+            body = _render_blob_page(owner, repo, checkout.sha, info, index, page, lines)
+            blob_pages.put((github_url, checkout.sha, path, page), body)
+    
+    response = Response(body, mimetype='text/html')
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def _branch_commit(owner: str, repo: str) -> str:
+    """
+    The commit served by file routes without one: the one the repository
+    page was rendered at, or else the default branch head. Resolving it
+    before acquiring lets a stored checkout of that commit be reused rather
+    than the branch downloaded again on every request.
+    """
+    cached = rendered_pages.get(create_repo_id(owner, repo))
+    if cached is not None:
+        return cached['stats']['commit_sha']
+    return resolve_commit(owner, repo)
+
+
+@app.route('/<owner>/<repo>/raw/<path:path>')
+@app.route('/<owner>/<repo>/@<sha>/raw/<path:path>')
+def raw_file(owner, repo, path, sha=None):
+    """
+    One file of a repository as stored, served from the checkout rather than
+    from GitHub. send_file answers conditional and Range requests, and lets
+    the WSGI server send the file without copying it through Python. Without
+    a commit, the file is served as for view_blob.
+    """
+    github_url = f"https://github.com/{owner}/{repo}"
+    if sha is not None:
+        sha, cache_control = sha.lower(), COMMIT_CACHE_CONTROL
+        if not is_commit_sha(sha):
+            return "Invalid commit SHA", 404
+    else:
+        cache_control = BRANCH_CACHE_CONTROL
+    
+    try:
+        if sha is None:
+            sha = _branch_commit(owner, repo)
+        checkout = checkouts.acquire(github_url, sha)
+    except GitHubAPIError as e:
+        logger.error(f"GitHub API error for {github_url}: {str(e)}")
+        return f"Failed to fetch repository: {str(e)}", 404
+    try:
+        root = checkout.repo_dir.resolve()
+        target = (root / path).resolve()
+        if not target.is_relative_to(root) or not target.is_file():
+            return f"No file {path} at {checkout.sha[:8]}", 404
+        # The file is opened here, so it stays readable if the checkout is evicted once released
+        response = send_file(target, mimetype=raw_content_type(target, looks_binary(target)), conditional=True,
+                             etag=create_page_etag(checkout.sha, 0, f"raw:{path}"))
+    finally:
+        checkouts.release(checkout)
+    response.headers['Cache-Control'] = cache_control
+    # Never let a browser sniff or run repository content on this origin
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    response.headers['Content-Security-Policy'] = 'sandbox'
+    return response
+
+
+def _render_blob_page(owner: str, repo: str, sha: str, info, index: LineIndex, page: int, lines) -> str:
+    """The blob viewer page for one window of a file, highlighted on its own."""
+    text = "".join(lines)
+    formatter = CompactHtmlFormatter()
+    css = formatter.base_style_defs('.highlight')
+    with HighlightWatchdog(highlight_job) as watchdog:
+        try:
+            result = watchdog.run(info.rel, info.kind.lexer_name, text, info.kind.lexer)
+            code_html = result.html
+            css += "\n" + formatter.token_style_defs(set(result.css_classes), '.highlight')
+        except (HighlightTimeout, RuntimeError):
+            code_html = f"<pre>{html.escape(text)}</pre>"
+    
+    first = (page - 1) * BLOB_PAGE_LINES
+    pages = index.pages()
+    base = f"/{owner}/{repo}/@{sha}/blob/{quote(info.rel)}"
+    return render_template_string(
+        BLOB_TEMPLATE,
+        repo_url=f"https://github.com/{owner}/{repo}",
+        page_url=f"/{owner}/{repo}/@{sha}",
+        path=info.rel,
+        raw_url=f"/{owner}/{repo}/@{sha}/raw/{quote(info.rel)}",
+        size=bytes_human(info.size),
+        page=page,
+        pages=pages,
+        first_line=first + 1,
+        last_line=first + len(lines),
+        total_lines=index.lines,
+        first_url=f"{base}?page=1",
+        prev_url=f"{base}?page={page - 1}" if page > 1 else None,
+        next_url=f"{base}?page={page + 1}" if page < pages else None,
+        last_url=f"{base}?page={pages}",
+        line_numbers="\n".join(str(n) for n in range(first + 1, first + len(lines) + 1)),
+        code_html=code_html,
+        style_css=css,
+    )
+
+
+@app.route('/<owner>/<repo>.cxml')
+@app.route('/<owner>/<repo>.txt')
+@app.route('/<owner>/<repo>/@<sha>.cxml')
+@app.route('/<owner>/<repo>/@<sha>.txt')
+def render_llm_text(owner, repo, sha=None):
+    """The LLM view as plain CXML text, streamed document by document from the checkout."""
+    github_url = f"https://github.com/{owner}/{repo}"
+    try:
+        max_bytes = int(request.args.get('max_bytes', MAX_DEFAULT_BYTES))
+    except ValueError:
+        return "Invalid max_bytes", 400
+    if sha is not None:
+        sha = sha.lower()
+        if not is_commit_sha(sha):
+            return "Invalid commit SHA", 404
+        ref, cache_control = sha, COMMIT_CACHE_CONTROL
+    else:
+        # Match the page already rendered for the repository, if any
+        cached = rendered_pages.get(create_repo_id(owner, repo))
+        ref, cache_control = (cached['stats']['commit_sha'] if cached else None), BRANCH_CACHE_CONTROL
+    
+    if ref and len(ref) == 40:
+        etag = create_page_etag(ref, max_bytes, f"{RENDERER_VERSION}:cxml")
+        if request.if_none_match.contains_weak(etag):
+            return _not_modified(etag, cache_control)
+    
+    try:
+        checkout = checkouts.acquire(github_url, ref)
+    except GitHubAPIError as e:
+        logger.error(f"GitHub API error for {github_url}: {str(e)}")
+        return f"Failed to fetch repository: {str(e)}", 404
+    etag = create_page_etag(checkout.sha, max_bytes, f"{RENDERER_VERSION}:cxml")
+    if request.if_none_match.contains_weak(etag):
+        checkouts.release(checkout)
+        return _not_modified(etag, cache_control)
+    
+    def stream():
+        try:
+            yield from iter_cxml_text(checkout.files(max_bytes), checkout.repo_dir)
+        finally:
+            checkouts.release(checkout)
+    
+    response = Response(stream_with_context(stream()), mimetype='text/plain')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
+@app.route('/<owner>/<repo>/@<sha>/search-index')
+def search_index_sidecar(owner, repo, sha):
+    """The content search index of a page, as gzipped JSON for the page's search worker."""
+    sha = sha.lower()
+    github_url = f"https://github.com/{owner}/{repo}"
+    try:
+        max_bytes = int(request.args.get('max_bytes', MAX_DEFAULT_BYTES))
+    except ValueError:
+        return "Invalid max_bytes", 400
+    if not is_commit_sha(sha):
+        return "Invalid commit SHA", 404
+    
+    etag = create_page_etag(sha, max_bytes, f"{RENDERER_VERSION}:search")
+    if len(sha) == 40 and request.if_none_match.contains_weak(etag):
+        return _not_modified(etag, COMMIT_CACHE_CONTROL)
+    try:
+        sha, index = _search_index(github_url, sha, max_bytes)
+    except GitHubAPIError as e:
+        logger.error(f"GitHub API error for {github_url}: {str(e)}")
+        return f"Failed to fetch repository: {str(e)}", 404
+    response = Response(index.sidecar(), mimetype='application/gzip')
+    response.set_etag(create_page_etag(sha, max_bytes, f"{RENDERER_VERSION}:search"))
+    response.headers['Cache-Control'] = COMMIT_CACHE_CONTROL
+    return response
+
+
+@app.route('/<owner>/<repo>/search')
+@app.route('/<owner>/<repo>/@<sha>/search')
+def search_repository(owner, repo, sha=None):
+    """
+    Search file contents of a rendered repository: ?q=text, or a regular
+    expression with &regex=1. Hits are paged with &page=N&per_page=M.
+    """
+    github_url = f"https://github.com/{owner}/{repo}"
+    query = request.args.get('q', '')
+    regex = request.args.get('regex', '') not in ('', '0', 'false')
+    try:
+        max_bytes = int(request.args.get('max_bytes', MAX_DEFAULT_BYTES))
+        page = int(request.args.get('page', 1))
+        per_page = int(request.args.get('per_page', SEARCH_PAGE_HITS))
+    except ValueError:
+        return jsonify({'error': 'page, per_page and max_bytes must be integers'}), 400
+    if not query:
+        return jsonify({'error': 'q is required'}), 400
+    if page < 1 or not 1 <= per_page <= SEARCH_MAX_PAGE_HITS:
+        return jsonify({'error': f'page must be positive and per_page between 1 and {SEARCH_MAX_PAGE_HITS}'}), 400
+    if sha is not None:
+        sha, cache_control = sha.lower(), COMMIT_CACHE_CONTROL
+        if not is_commit_sha(sha):
+            return jsonify({'error': 'Invalid commit SHA'}), 404
+    else:
+        # Search the commit the repository page was rendered at
+        cached = rendered_pages.get(create_repo_id(owner, repo))
+        if cached is None:
+            return jsonify({'error': 'Repository has not been rendered'}), 404
+        sha, cache_control = cached['stats']['commit_sha'], BRANCH_CACHE_CONTROL
+    
+    try:
+        sha, index = _search_index(github_url, sha, max_bytes)
+    except GitHubAPIError as e:
+        return jsonify({'error': f'GitHub API error: {str(e)}'}), 404
+    try:
+        results = bounded_search(index, query, regex, (page - 1) * per_page, per_page, SEARCH_TIME_LIMIT_SECONDS)
+    except re.error as e:
+        return jsonify({'error': f'Invalid regular expression: {str(e)}'}), 400
+    
+    response = jsonify({
+        'query': query,
+        'regex': regex,
+        'commit_sha': sha,
+        'page': page,
+        'per_page': per_page,
+        'hits': [{'path': hit.path, 'line': hit.line, 'snippet': hit.snippet, 'match': [hit.start, hit.end]}
+                 for hit in results.hits],
+        'more': results.more,
+        'timed_out': results.timed_out,
+        # Files beyond the index size limit are not searched
+        'index_truncated': index.truncated,
+    })
+    # Timed-out results depend on load; let them be retried
+    response.headers['Cache-Control'] = 'no-store' if results.timed_out else cache_control
+    return response
+
+
+def _search_index(github_url: str, sha: str, max_bytes: int):
+    """
+    (full commit SHA, search index) for a commit given by SHA or prefix: the
+    index built while the page rendered, or one built from the checkout now.
+    """
+    index = search_indexes.get((github_url, sha, max_bytes))
+    if index is not None:
+        return sha, index
+    # A prefix is resolved by the checkout store; the index may still be cached under the full SHA
+    checkout = checkouts.acquire(github_url, sha)
+    try:
+        index = search_indexes.get((github_url, checkout.sha, max_bytes))
+        if index is not None:
+            return checkout.sha, index
+        index = build_search_index(checkout.files(max_bytes))
+    finally:
+        checkouts.release(checkout)
+    logger.info(f"Indexed {len(index)} files of {github_url} at {checkout.sha[:8]} for search")
+    search_indexes.put((github_url, checkout.sha, max_bytes), index)
+    return checkout.sha, index
+
+
+@app.route('/<owner>/<repo>/symbols')
+@app.route('/<owner>/<repo>/@<sha>/symbols')
+def repository_symbols(owner, repo, sha=None):
+    """
+    Functions and classes defined in a rendered repository, in page order.
+    Filter by name with ?q= (a case-insensitive substring) and by &kind=;
+    at most &limit= symbols are returned.
+    """
+    github_url = f"https://github.com/{owner}/{repo}"
+    query = request.args.get('q', '').lower()
+    kind = request.args.get('kind', '')
+    try:
+        max_bytes = int(request.args.get('max_bytes', MAX_DEFAULT_BYTES))
+        limit = int(request.args.get('limit', SYMBOLS_LIMIT))
+    except ValueError:
+        return jsonify({'error': 'limit and max_bytes must be integers'}), 400
+    if not 1 <= limit <= SYMBOLS_MAX_LIMIT:
+        return jsonify({'error': f'limit must be between 1 and {SYMBOLS_MAX_LIMIT}'}), 400
+    if kind and kind not in SYMBOL_KINDS:
+        return jsonify({'error': f'kind must be one of {", ".join(SYMBOL_KINDS)}'}), 400
+    if sha is not None:
+        sha, cache_control = sha.lower(), COMMIT_CACHE_CONTROL
+        if not is_commit_sha(sha):
+            return jsonify({'error': 'Invalid commit SHA'}), 404
+    else:
+        cached = rendered_pages.get(create_repo_id(owner, repo))
+        if cached is None:
+            return jsonify({'error': 'Repository has not been rendered'}), 404
+        sha, cache_control = cached['stats']['commit_sha'], BRANCH_CACHE_CONTROL
+    
+    try:
+        sha, outline = _symbol_index(github_url, sha, max_bytes)
+    except GitHubAPIError as e:
+        return jsonify({'error': f'GitHub API error: {str(e)}'}), 404
+    
+    symbols = []
+    total = 0
+    for path, file_symbols in outline:
+        for symbol in file_symbols:
+            if (kind and symbol.kind != kind) or query not in symbol.name.lower():
+                continue
+            total += 1
+            if len(symbols) < limit:
+                symbols.append({'path': path, 'name': symbol.name, 'kind': symbol.kind, 'line': symbol.line})
+    response = jsonify({
+        'commit_sha': sha,
+        'symbols': symbols,
+        'total': total,
+        'truncated': total > len(symbols),
+    })
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def _symbol_index(github_url: str, sha: str, max_bytes: int):
+    """
+    (full commit SHA, [(path, symbols)]) for a commit given by SHA or prefix:
+    the symbols collected while the page was highlighted, or ones lexed from
+    the checkout now.
+    """
+    outline = symbol_indexes.get((github_url, sha, max_bytes))
+    if outline is not None:
+        return sha, outline
+    checkout = checkouts.acquire(github_url, sha)
+    try:
+        outline = symbol_indexes.get((github_url, checkout.sha, max_bytes))
+        if outline is not None:
+            return checkout.sha, outline
+        with HighlightWatchdog(symbols_job) as watchdog:
+            outline = collect_symbols(checkout.files(max_bytes), watchdog)
+    finally:
+        checkouts.release(checkout)
+    logger.info(f"Collected symbols of {len(outline)} files of {github_url} at {checkout.sha[:8]}")
+    symbol_indexes.put((github_url, checkout.sha, max_bytes), outline)
+    return checkout.sha, outline
+
+
+def _llm_chunk_summary(owner: str, repo: str, sha: str, max_bytes: int, chunk_tokens: int, infos=None) -> dict:
+    """Token totals and the chunk list of the LLM export, as included in stats; counted only given infos."""
+    base = f"/{owner}/{repo}/@{sha}/chunks"
+    query = f"?tokens={chunk_tokens}&max_bytes={max_bytes}"
+    summary = {
+        'chunk_tokens': chunk_tokens,
+        'chunks_url': base + query,
+        'total_tokens': None,
+        'chunks': None
+    }
+    if infos is not None:
+        doc_tokens = cxml_document_tokens(infos)
+        summary['total_tokens'] = sum(tokens for _, tokens in doc_tokens)
+        summary['chunks'] = [
+            {
+                'index': chunk.index,
+                'tokens': chunk.tokens,
+                'documents': [chunk.documents[0][0], chunk.documents[-1][0]],
+                'url': f"{base}/{chunk.index}.txt{query}"
+            }
+            for chunk in plan_cxml_chunks(infos, doc_tokens, chunk_tokens)
+        ]
+    return summary
+
+
+def _chunk_args():
+    """(chunk_tokens, max_bytes) from the query string; raises ValueError when invalid."""
+    chunk_tokens = int(request.args.get('tokens', DEFAULT_CHUNK_TOKENS))
+    max_bytes = int(request.args.get('max_bytes', MAX_DEFAULT_BYTES))
+    if chunk_tokens < MIN_CHUNK_TOKENS:
+        raise ValueError(f"tokens must be at least {MIN_CHUNK_TOKENS}")
+    return chunk_tokens, max_bytes
+
+
+@app.route('/<owner>/<repo>/@<sha>/chunks')
+def llm_chunks(owner, repo, sha):
+    """The LLM export split into chunks of at most `tokens` estimated tokens."""
+    try:
+        chunk_tokens, max_bytes = _chunk_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not is_commit_sha(sha.lower()):
+        return jsonify({'error': 'Invalid commit SHA'}), 404
+    try:
+        checkout = checkouts.acquire(f"https://github.com/{owner}/{repo}", sha.lower())
+    except GitHubAPIError as e:
+        return jsonify({'error': f'GitHub API error: {str(e)}'}), 404
+    try:
+        infos = checkout.files(max_bytes)
+        summary = _llm_chunk_summary(owner, repo, checkout.sha, max_bytes, chunk_tokens, infos)
+    finally:
+        checkouts.release(checkout)
+    summary['documents'] = sum(1 for i in infos if i.decision.include)
+    response = jsonify(summary)
+    response.headers['Cache-Control'] = COMMIT_CACHE_CONTROL
+    return response
+
+
+@app.route('/<owner>/<repo>/@<sha>/chunks/<int:number>.txt')
+def llm_chunk_text(owner, repo, sha, number):
+    """One chunk of the LLM export as CXML; document indexes match the full export."""
+    try:
+        chunk_tokens, max_bytes = _chunk_args()
+    except ValueError as e:
+        return str(e), 400
+    if not is_commit_sha(sha.lower()):
+        return "Invalid commit SHA", 404
+    try:
+        checkout = checkouts.acquire(f"https://github.com/{owner}/{repo}", sha.lower())
+    except GitHubAPIError as e:
+        return f"Failed to fetch repository: {str(e)}", 404
+    try:
+        infos = checkout.files(max_bytes)
+        chunks = plan_cxml_chunks(infos, cxml_document_tokens(infos), chunk_tokens)
+        if not 1 <= number <= len(chunks):
+            return f"No chunk {number}; there are {len(chunks)}", 404
+        body = "".join(iter_cxml_chunk(infos, chunks[number - 1], chunk_tokens))
+    finally:
+        checkouts.release(checkout)
+    response = Response(body, mimetype='text/plain')
+    response.headers['Cache-Control'] = COMMIT_CACHE_CONTROL
+    return response
+
+
+@app.route('/<owner>/<repo>/@<sha>/context')
+@app.route('/<owner>/<repo>/@<sha>/context.txt')
+def llm_context(owner, repo, sha):
+    """
+    The most important files that fit a budget, given as ?tokens=N or ?bytes=N.
+    context.txt is the CXML export in ranked order; context is a JSON report of
+    what was kept and dropped.
+    """
+    as_text = request.path.endswith('.txt')
+    try:
+        max_bytes = int(request.args.get('max_bytes', MAX_DEFAULT_BYTES))
+        unit = UNIT_BYTES if 'bytes' in request.args else UNIT_TOKENS
+        budget = int(request.args.get(unit, DEFAULT_CHUNK_TOKENS))
+    except ValueError:
+        return jsonify({'error': 'tokens, bytes and max_bytes must be integers'}), 400
+    if not is_commit_sha(sha.lower()):
+        return jsonify({'error': 'Invalid commit SHA'}), 404
+    try:
+        checkout = checkouts.acquire(f"https://github.com/{owner}/{repo}", sha.lower())
+    except GitHubAPIError as e:
+        return jsonify({'error': f'GitHub API error: {str(e)}'}), 404
+    try:
+        infos = checkout.files(max_bytes)
+        # No history in an archive checkout, so files are ranked without recency
+        selection = rank_cxml_documents(infos, budget, unit)
+        body = "".join(iter_cxml_selection(infos, selection)) if as_text else None
+    finally:
+        checkouts.release(checkout)
+    
+    if as_text:
+        response = Response(body, mimetype='text/plain')
+    else:
+        rendered = [i for i in infos if i.decision.include]
+        cost = (lambda i: i.tokens) if unit == UNIT_TOKENS else (lambda i: i.size)
+        response = jsonify({
+            'unit': unit,
+            'budget': budget,
+            'used': selection.used,
+            'selected': [{'index': pos + 1, 'source': rendered[pos].rel, unit: cost(rendered[pos])}
+                         for pos in selection.selected],
+            'dropped': [{'index': pos + 1, 'source': rendered[pos].rel, unit: cost(rendered[pos])}
+                        for pos in selection.dropped],
+            'url': f"{request.path}.txt?{request.query_string.decode()}"
+        })
+    response.headers['Cache-Control'] = COMMIT_CACHE_CONTROL
+    return response
+
+
+def _not_modified(etag: str, cache_control: str):
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def _send_page(entry: dict, cache_control: str):
+    """
+    Send a cached page in the smallest encoding the client accepts, or a 304
+    when the client's copy is current. Each encoding gets its own strong ETag.
+    """
+    page = entry['page']
+    etag = entry['etag']
+    etags = [etag] + [f"{etag}-{enc}" for enc in page.bodies]
+    
+    if request.if_none_match:
+        # If-None-Match compares weakly: W/"tag" matches "tag"
+        not_modified = any(request.if_none_match.contains_weak(tag) for tag in etags)
+    else:
+        since = request.if_modified_since
+        not_modified = since is not None and since >= entry['rendered_at']
+    
+    if not_modified:
+        response = Response(status=304)
+        response.set_etag(etag)
+    else:
+        encoding, body = page.select(lambda enc: request.accept_encodings[enc] > 0)
+        response = Response(body, mimetype='text/html')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.set_etag(f"{etag}-{encoding}" if encoding else etag)
+    response.last_modified = entry['rendered_at']
+    response.headers['Cache-Control'] = cache_control
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
 def _render_error(error_message: str, repo_url: str):
     """Render error page with consistent styling."""
     return render_template_string(
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Time build_html with highlighting taken out of the picture.
+
+Usage
+    python -m benchmarks.bench_build_html [REPO_DIR] [--repeat N]
+
+Pages are built in client highlight mode, so Pygments never runs (lexers are
+resolved by collect_files, outside the timed loop) and the timing covers TOC,
+stats, CXML, markdown and page assembly. Defaults to this repository.
+"""
+
+import argparse
+import pathlib
+import sys
+import time
+
+from core.repo_to_single_page import collect_files, build_html, bytes_human, MAX_DEFAULT_BYTES, HIGHLIGHT_CLIENT
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("repo", nargs="?", default=".", help="Repository directory to render")
+    ap.add_argument("--repeat", type=int, default=20, help="Number of builds; best and mean are reported")
+    args = ap.parse_args()
+
+    repo_dir = pathlib.Path(args.repo).resolve()
+    infos = collect_files(repo_dir, MAX_DEFAULT_BYTES)
+    print(f"Repo: {repo_dir} ({sum(1 for i in infos if i.decision.include)} rendered files)", file=sys.stderr)
+
+    timings = []
+    page = ""
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        page = build_html(f"https://github.com/example/{repo_dir.name}", repo_dir, "0" * 40, infos,
+                          highlight_mode=HIGHLIGHT_CLIENT)
+        timings.append(time.perf_counter() - start)
+
+    print(f"build_html: best {min(timings) * 1000:.2f} ms, mean {sum(timings) / len(timings) * 1000:.2f} ms, "
+          f"page {bytes_human(len(page.encode('utf-8')))}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Compare the compact formatter with Pygments' HtmlFormatter on a corpus of repos.
+
+Usage
+    python -m benchmarks.bench_formatter [REPO_DIR ...]
+
+Each directory is scanned like a render (same size limit and binary checks).
+Files are lexed once, then every formatter formats the same token lists, so the
+timings measure formatter throughput only. Defaults to this repository.
+"""
+
+import argparse
+import io
+import pathlib
+import sys
+import time
+
+from pygments.formatters import HtmlFormatter
+
+from core.formatter import CompactHtmlFormatter
+from core.classify import lexer_for
+from core.repo_to_single_page import collect_files, read_text, bytes_human
+
+
+def lex_corpus(repo_dirs):
+    corpus = []
+    for repo_dir in repo_dirs:
+        for info in collect_files(pathlib.Path(repo_dir), 50 * 1024):
+            if not info.decision.include or info.kind.markdown:
+                continue
+            text = read_text(info.path)
+            corpus.append(list(lexer_for(info.kind.lexer).get_tokens(text)))
+    return corpus
+
+
+def _format(formatter, tokens):
+    buf = io.StringIO()
+    formatter.format_unencoded(iter(tokens), buf)
+    return buf.getvalue()
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("repos", nargs="*", default=["."], help="Repository directories to use as the corpus")
+    ap.add_argument("--repeat", type=int, default=5, help="Runs per formatter; the best is reported")
+    args = ap.parse_args()
+
+    corpus = lex_corpus(args.repos)
+    tokens = sum(len(t) for t in corpus)
+    print(f"Corpus: {len(corpus)} files, {tokens} tokens", file=sys.stderr)
+
+    formatters = [
+        ("HtmlFormatter", lambda: HtmlFormatter(nowrap=False)),
+        ("CompactHtmlFormatter", CompactHtmlFormatter),
+    ]
+    results = []
+    for name, factory in formatters:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            out_bytes = sum(len(_format(factory(), t)) for t in corpus)
+            best = min(best, time.perf_counter() - start)
+        results.append((name, out_bytes, best))
+
+    base_bytes = results[0][1]
+    for name, out_bytes, seconds in results:
+        print(f"{name:<22} {bytes_human(out_bytes):>10} ({100 * out_bytes / base_bytes:5.1f}%)  "
+              f"{seconds * 1000:8.1f} ms  {tokens / seconds / 1e6:5.2f} Mtok/s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Build a page for a large synthetic repository, to measure how fast it loads.
+
+Usage
+    python -m benchmarks.bench_page_load [--files N] [--lines N] [--out PAGE]
+
+The fixture has --files Python files of --lines lines each, spread over
+nested directories. The page is rendered in client highlight mode, like the
+app renders large repositories. Open the written page with #perf appended to
+its URL: the page script prints its load timeline (performance marks and the
+page:time-to-interactive measure) to the browser console.
+"""
+
+import argparse
+import pathlib
+import sys
+import tempfile
+import time
+
+from core.repo_to_single_page import collect_files, build_html, bytes_human, MAX_DEFAULT_BYTES, HIGHLIGHT_CLIENT
+
+_FILE_TEMPLATE = '''"""Module {index} of the page load fixture."""
+
+import os
+
+
+class Widget{index}:
+    def __init__(self, name):
+        self.name = name
+
+'''
+_FUNCTION_TEMPLATE = '''    def method_{n}(self, value):
+        return os.path.join(self.name, str(value * {n}))
+
+'''
+
+
+def write_fixture(root: pathlib.Path, files: int, lines: int) -> None:
+    """files modules of about `lines` lines each, ten per directory, three directory levels deep."""
+    for index in range(files):
+        directory = root / f"pkg{index // 1000}" / f"sub{index // 100 % 10}" / f"mod{index // 10 % 10}"
+        directory.mkdir(parents=True, exist_ok=True)
+        methods = max(1, (lines - 8) // 3)
+        text = _FILE_TEMPLATE.format(index=index) + "".join(_FUNCTION_TEMPLATE.format(n=n) for n in range(methods))
+        (directory / f"module_{index}.py").write_text(text, encoding="utf-8")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--files", type=int, default=5000, help="Number of files in the fixture")
+    ap.add_argument("--lines", type=int, default=200, help="Lines per file")
+    ap.add_argument("--out", default="page_load_fixture.html", help="Where to write the page")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repo_dir = pathlib.Path(tmp)
+        write_fixture(repo_dir, args.files, args.lines)
+        infos = collect_files(repo_dir, MAX_DEFAULT_BYTES)
+        start = time.perf_counter()
+        page = build_html("https://github.com/example/page-load-fixture", repo_dir, "0" * 40, infos,
+                          highlight_mode=HIGHLIGHT_CLIENT)
+        elapsed = time.perf_counter() - start
+
+    out = pathlib.Path(args.out).resolve()
+    out.write_text(page, encoding="utf-8")
+    print(f"{args.files} files x {args.lines} lines: built in {elapsed:.2f} s, "
+          f"page {bytes_human(len(page.encode('utf-8')))}", file=sys.stderr)
+    print(f"Open {out.as_uri()}#perf and read the load timeline in the console")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,71 @@
+"""
+Fingerprinted static assets.
+The CSS and JavaScript shared by every rendered page are served once under
+/static/ with a content hash in the file name, so browsers cache them for good
+and cached pages no longer each carry their own copy.
+
+Usage:
+  python -m core.assets OUT_DIR
+"""
+
+import argparse
+import hashlib
+import pathlib
+import sys
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+
+STATIC_URL_PREFIX = "/static/"
+# The name changes whenever the content does, so the content never does.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+CONTENT_TYPES = {
+    ".css": "text/css; charset=utf-8",
+    ".js": "application/javascript; charset=utf-8",
+}
+
+
+@dataclass
+class StaticAsset:
+    name: str  # fingerprinted file name, e.g. page.3f2a9c1b04.css
+    content_type: str
+    body: bytes
+
+
+def make_asset(stem: str, ext: str, text: str) -> StaticAsset:
+    """Build an asset whose name carries a hash of its content."""
+    body = text.encode("utf-8")
+    digest = hashlib.sha256(body).hexdigest()[:10]
+    return StaticAsset(f"{stem}.{digest}{ext}", CONTENT_TYPES[ext], body)
+
+
+def asset_registry(assets: Iterable[StaticAsset]) -> Dict[str, StaticAsset]:
+    return {asset.name: asset for asset in assets}
+
+
+def write_assets(assets: Iterable[StaticAsset], out_dir: pathlib.Path) -> List[pathlib.Path]:
+    """Write assets to out_dir for serving from a CDN or any static file server."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    for asset in assets:
+        path = out_dir / asset.name
+        path.write_bytes(asset.body)
+        written.append(path)
+    return written
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Write the fingerprinted page assets to a directory")
+    ap.add_argument("out_dir", help="Directory to write the assets to")
+    args = ap.parse_args()
+
+    # Imported here: the page shell imports this module to build its assets
+    from core.repo_to_single_page import STATIC_ASSETS
+
+    for path in write_assets(STATIC_ASSETS.values(), pathlib.Path(args.out_dir)):
+        print(f"✓ Wrote {path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,89 @@
+"""
+Whole-file viewer for files too large for the page.
+A file is shown one window of BLOB_PAGE_LINES lines at a time. The first
+request for a file scans it memory-mapped for the offset of every line
+(LineIndex); windows are then sliced straight out of the mapping, so no
+request holds more of the file in memory than the lines it shows. Indexes
+and rendered windows are kept in small LRU caches by the app.
+
+Files are also served raw, as stored in the checkout. Text is always sent
+as text/plain and types a browser would run (HTML, SVG, ...) as opaque
+bytes, so repository content never executes on this site.
+"""
+
+import mimetypes
+import mmap
+import pathlib
+from array import array
+from typing import List
+
+BLOB_PAGE_LINES = 500
+# Longer lines (minified code, data blobs) are cut to this many bytes
+BLOB_MAX_LINE_BYTES = 16 * 1024
+# Line indexes and rendered windows kept by the app
+MAX_LINE_INDEXES = 32
+MAX_RENDERED_WINDOWS = 64
+# Werkzeug adds "; charset=utf-8" to text types
+RAW_TEXT_TYPE = "text/plain"
+RAW_BINARY_TYPE = "application/octet-stream"
+# Guessed types a browser would render as a document or run
+_ACTIVE_TYPES = {
+    "application/javascript", "application/xhtml+xml", "application/xml", "image/svg+xml",
+    "text/html", "text/javascript", "text/xml",
+}
+
+
+def raw_content_type(path: pathlib.Path, binary: bool) -> str:
+    """Content-Type for serving path raw; binary as decided by looks_binary()."""
+    if not binary:
+        return RAW_TEXT_TYPE
+    guessed, encoding = mimetypes.guess_type(path.name)
+    if guessed is None or encoding is not None or guessed in _ACTIVE_TYPES:
+        return RAW_BINARY_TYPE
+    return guessed
+
+
+class LineIndex:
+    """
+    Start offset of every line of a file, found by scanning it memory-mapped;
+    8 bytes per line at most. Offsets stay valid for any copy of the same
+    blob, so windows take the path to read from.
+    """
+
+    def __init__(self, path: pathlib.Path):
+        self.size = path.stat().st_size
+        self.offsets = array("I" if self.size < 2 ** 32 else "Q", [0])
+        if self.size:
+            with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                find = mm.find
+                append = self.offsets.append
+                pos = find(b"\n")
+                while pos != -1:
+                    append(pos + 1)
+                    pos = find(b"\n", pos + 1)
+        if self.offsets[-1] != self.size:
+            # The last line has no newline
+            self.offsets.append(self.size)
+
+    @property
+    def lines(self) -> int:
+        return len(self.offsets) - 1
+
+    def pages(self, page_lines: int = BLOB_PAGE_LINES) -> int:
+        return max(1, -(-self.lines // page_lines))
+
+    def window(self, path: pathlib.Path, first: int, count: int) -> List[str]:
+        """Lines [first, first + count) (0-based) of the file at path, overlong ones cut."""
+        last = min(first + count, self.lines)
+        if first >= last:
+            return []
+        offsets = self.offsets
+        lines = []
+        with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for k in range(first, last):
+                start, end = offsets[k], offsets[k + 1]
+                if end - start > BLOB_MAX_LINE_BYTES:
+                    lines.append(mm[start:start + BLOB_MAX_LINE_BYTES].decode("utf-8", errors="replace") + "\n")
+                else:
+                    lines.append(mm[start:end].decode("utf-8", errors="replace"))
+        return lines
@@ -0,0 +1,77 @@
+"""
+Per-render time budget.
+Tracks elapsed time across fetch, scan and highlight so that a pathological
+repository degrades gracefully instead of tying up a worker until it is killed.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# Vercel kills functions at 60 seconds; leave headroom for sending the page.
+DEFAULT_RENDER_BUDGET_SECONDS = 45.0
+
+# Fractions of the budget after which remaining files are degraded.
+PLAIN_TEXT_THRESHOLD = 0.75
+LISTED_ONLY_THRESHOLD = 0.90
+
+# Render modes handed out per file, from most to least expensive.
+MODE_HIGHLIGHT = "highlight"
+MODE_PLAIN = "plain"
+MODE_LISTED = "listed"
+
+
+class RenderBudget:
+    """Wall-clock budget shared by every phase of a single render."""
+
+    def __init__(self, limit_seconds: Optional[float] = DEFAULT_RENDER_BUDGET_SECONDS):
+        self.limit_seconds = limit_seconds
+        self.started = time.monotonic()
+        self.phases: Dict[str, float] = {}
+        self.degraded: List[Tuple[str, str]] = []  # (rel path, mode)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def used_fraction(self) -> float:
+        if not self.limit_seconds:
+            return 0.0
+        return self.elapsed() / self.limit_seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        """Accumulate the time spent inside the block under `name`."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.monotonic() - start
+
+    def file_mode(self, rel: str) -> str:
+        """Pick the render mode for the next file and record any degradation."""
+        used = self.used_fraction()
+        if used >= LISTED_ONLY_THRESHOLD:
+            mode = MODE_LISTED
+        elif used >= PLAIN_TEXT_THRESHOLD:
+            mode = MODE_PLAIN
+        else:
+            return MODE_HIGHLIGHT
+        self.degraded.append((rel, mode))
+        return mode
+
+    def degraded_paths(self, mode: str) -> List[str]:
+        return [rel for rel, m in self.degraded if m == mode]
+
+    def to_stats(self) -> Dict:
+        """Budget consumption summary for the JSON stats."""
+        elapsed = self.elapsed()
+        return {
+            'limit_seconds': self.limit_seconds,
+            'elapsed_seconds': round(elapsed, 3),
+            'used_percent': round(100 * self.used_fraction(), 1) if self.limit_seconds else None,
+            'phases': {name: round(seconds, 3) for name, seconds in self.phases.items()},
+            'degraded_files': {
+                MODE_PLAIN: len(self.degraded_paths(MODE_PLAIN)),
+                MODE_LISTED: len(self.degraded_paths(MODE_LISTED)),
+            },
+        }
@@ -0,0 +1,141 @@
+"""
+On-disk repository checkouts shared between requests.
+A render used to delete its checkout as soon as the page was built; keeping a
+few recent ones lets later requests (lazily loaded sections, the same commit
+rendered again) read files without downloading the archive a second time.
+"""
+
+import logging
+import os
+import pathlib
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Tuple
+
+from core.github_api import fetch_github_repo
+from core.repo_to_single_page import FileInfo, collect_files
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CHECKOUTS = 8
+# Vercel's /tmp is 512 MB; leave room for the archive being extracted.
+DEFAULT_MAX_CHECKOUT_BYTES = 384 * 1024 * 1024
+
+
+@dataclass
+class Checkout:
+    repo_url: str
+    sha: str
+    repo_dir: pathlib.Path
+    size_bytes: int
+    pins: int = 0
+    _files: Dict[int, List[FileInfo]] = field(default_factory=dict, repr=False)
+
+    def files(self, max_bytes: int) -> List[FileInfo]:
+        """
+        collect_files() for this checkout, scanned once per max_bytes. Each
+        call gets its own copies of the records, since renders fill in counts
+        on them; concurrent and later requests never see each other's.
+        """
+        if max_bytes not in self._files:
+            self._files[max_bytes] = collect_files(self.repo_dir, max_bytes)
+        return [replace(i) for i in self._files[max_bytes]]
+
+
+def _dir_size(path: pathlib.Path) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class CheckoutStore:
+    """
+    Least-recently-used set of extracted repository archives, keyed by commit.
+
+    acquire() pins a checkout so it cannot be evicted while a render reads from
+    it; every acquire() must be paired with a release().
+    """
+
+    def __init__(self, max_checkouts: int = DEFAULT_MAX_CHECKOUTS,
+                 max_bytes: int = DEFAULT_MAX_CHECKOUT_BYTES):
+        self.max_checkouts = max_checkouts
+        self.max_bytes = max_bytes
+        self._root: Optional[pathlib.Path] = None
+        self._entries: "OrderedDict[Tuple[str, str], Checkout]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _find(self, repo_url: str, ref: str) -> Optional[Checkout]:
+        """A stored checkout of repo_url whose SHA starts with ref."""
+        for (url, sha), entry in self._entries.items():
+            if url == repo_url and sha.startswith(ref):
+                return entry
+        return None
+
+    def _pin(self, entry: Checkout) -> Checkout:
+        entry.pins += 1
+        self._entries.move_to_end((entry.repo_url, entry.sha))
+        return entry
+
+    def acquire(self, repo_url: str, ref: str = None) -> Checkout:
+        """
+        Return a pinned checkout of repo_url at ref (a commit SHA or prefix), or
+        at the default branch if ref is None, fetching it if it is not stored.
+        Branch heads can move, so ref=None always asks GitHub for the commit.
+        """
+        with self._lock:
+            if ref:
+                entry = self._find(repo_url, ref)
+                if entry is not None:
+                    return self._pin(entry)
+            if self._root is None:
+                self._root = pathlib.Path(tempfile.mkdtemp(prefix="gitrender_checkouts_"))
+            workdir = pathlib.Path(tempfile.mkdtemp(dir=self._root))
+
+        # Fetch outside the lock so slow downloads do not serialize requests
+        repo_dir = workdir / "repo"
+        try:
+            sha = fetch_github_repo(repo_url, repo_dir, ref)
+        except Exception:
+            shutil.rmtree(workdir, ignore_errors=True)
+            raise
+        size = _dir_size(repo_dir)
+
+        with self._lock:
+            entry = self._entries.get((repo_url, sha))
+            if entry is not None:
+                # Another request fetched the same commit meanwhile
+                shutil.rmtree(workdir, ignore_errors=True)
+                return self._pin(entry)
+            entry = Checkout(repo_url, sha, repo_dir, size)
+            self._entries[(repo_url, sha)] = entry
+            self._pin(entry)
+            self._evict()
+            return entry
+
+    def release(self, entry: Checkout) -> None:
+        with self._lock:
+            entry.pins -= 1
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop unpinned checkouts, oldest first, until within both limits."""
+        total = sum(e.size_bytes for e in self._entries.values())
+        for key in list(self._entries):
+            if len(self._entries) <= self.max_checkouts and total <= self.max_bytes:
+                break
+            entry = self._entries[key]
+            if entry.pins:
+                continue
+            del self._entries[key]
+            total -= entry.size_bytes
+            shutil.rmtree(entry.repo_dir.parent, ignore_errors=True)
+            logger.info(f"Evicted checkout of {entry.repo_url} at {entry.sha[:8]}")
+
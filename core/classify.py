@@ -0,0 +1,154 @@
+"""
+File classification.
+Every file is classified once, while the repository is scanned, and the result
+is stored on its manifest record: the table of contents, file sections, stats
+and LLM exports read the record instead of each re-deriving the icon, language
+or lexer from the path.
+
+Classifications are cached per extension (or per file name, for names Pygments
+or the icon table treat specially), so the slow Pygments lexer lookup runs a
+handful of times per repository rather than once per file.
+"""
+
+import fnmatch
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional, Pattern, Set, Tuple
+
+from pygments.lexers import get_all_lexers, get_lexer_by_name, get_lexer_for_filename, TextLexer
+
+MARKDOWN_EXTENSIONS = {".md", ".markdown", ".mdown", ".mkd", ".mkdn"}
+
+DEFAULT_ICON = "📄"
+DEFAULT_LANGUAGE = "Other"
+TEXT_LEXER = "text"
+
+# Whole file names (lower-cased); these win over the extension tables
+NAME_ICONS: Dict[str, str] = {
+    "dockerfile": "🐳", ".dockerignore": "🐳", "docker-compose.yml": "🐳", "docker-compose.yaml": "🐳",
+    "readme": "📚", "readme.txt": "📚",
+    "license": "📜", "licence": "📜", "copying": "📜",
+    ".gitignore": "🙈", ".gitattributes": "🙈",
+}
+
+
+def _by_extension(groups: Dict[Tuple[str, ...], str]) -> Dict[str, str]:
+    return {ext: value for exts, value in groups.items() for ext in exts}
+
+
+EXTENSION_ICONS = _by_extension({
+    tuple(MARKDOWN_EXTENSIONS): "📝",
+    (".py", ".pyw"): "🐍",
+    (".js", ".jsx", ".ts", ".tsx"): "⚡",
+    (".html", ".htm"): "🌐",
+    (".css", ".scss", ".sass", ".less"): "🎨",
+    (".json", ".jsonl", ".yaml", ".yml", ".toml"): "⚙️",
+    (".sh", ".bash", ".zsh", ".fish", ".ps1", ".bat", ".cmd"): "🔧",
+    (".sql",): "🗃️",
+    (".java", ".class"): "☕",
+    (".cpp", ".cc", ".cxx", ".c", ".h", ".hpp"): "⚙️",
+    (".rs",): "🦀",
+    (".go",): "🔵",
+    (".php",): "🐘",
+    (".rb",): "💎",
+    (".swift",): "🕊️",
+    (".kt", ".kts"): "📱",
+    (".dockerfile",): "🐳",
+    (".txt", ".log"): "📋",
+    (".xml",): "🏷️",
+})
+
+EXTENSION_LANGUAGES = _by_extension({
+    (".py", ".pyw"): "Python",
+    (".js", ".jsx", ".ts", ".tsx"): "JavaScript/TypeScript",
+    (".html", ".htm"): "HTML",
+    (".css", ".scss", ".sass", ".less"): "CSS",
+    (".java",): "Java",
+    (".cpp", ".cc", ".cxx", ".c", ".h", ".hpp"): "C/C++",
+    (".rs",): "Rust",
+    (".go",): "Go",
+    (".php",): "PHP",
+    (".rb",): "Ruby",
+    (".swift",): "Swift",
+    (".kt", ".kts"): "Kotlin",
+    tuple(MARKDOWN_EXTENSIONS): "Markdown",
+    (".json", ".yaml", ".yml", ".toml", ".xml"): "Config/Data",
+    (".sh", ".bash", ".zsh", ".fish", ".ps1", ".bat", ".cmd"): "Shell Scripts",
+})
+
+
+@dataclass(frozen=True)
+class FileKind:
+    """What a file is, as far as rendering goes; shared by all files with the same extension."""
+    extension: str   # lower-cased, "" if none
+    language: str    # stats category
+    icon: str
+    lexer: str       # Pygments alias, TEXT_LEXER when there is none
+    lexer_name: str  # human-readable lexer name
+    markdown: bool
+
+
+def file_suffix(name: str) -> str:
+    """The extension of a file name, as pathlib computes it ("" for dotfiles)."""
+    dot = name.rfind(".")
+    if dot <= 0 or dot == len(name) - 1:
+        return ""
+    return name[dot:]
+
+
+_special_names: Optional[Tuple[Set[str], Pattern]] = None
+
+
+def _lexer_special_names() -> Tuple[Set[str], Pattern]:
+    """File name patterns in Pygments that look at more than the extension."""
+    global _special_names
+    if _special_names is None:
+        exact, patterns = set(), []
+        for _, _, filenames, _ in get_all_lexers():
+            for pattern in filenames:
+                if not any(c in pattern for c in "*?["):
+                    exact.add(pattern)
+                elif not (pattern.startswith("*.") and not any(c in pattern[2:] for c in "*?[")):
+                    patterns.append(fnmatch.translate(pattern))
+        _special_names = (exact, re.compile("|".join(patterns) or "(?!)"))
+    return _special_names
+
+
+@lru_cache(maxsize=4096)
+def _classify(name: str) -> FileKind:
+    suffix = file_suffix(name)
+    ext = suffix.lower()
+    try:
+        lexer = get_lexer_for_filename(name, stripall=False)
+    except Exception:
+        lexer = TextLexer(stripall=False)
+    if not lexer.aliases:
+        lexer = TextLexer(stripall=False)
+    return FileKind(
+        extension=ext,
+        language=EXTENSION_LANGUAGES.get(ext, DEFAULT_LANGUAGE),
+        icon=NAME_ICONS.get(name.lower()) or EXTENSION_ICONS.get(ext, DEFAULT_ICON),
+        lexer=lexer.aliases[0],
+        lexer_name=lexer.name,
+        markdown=ext in MARKDOWN_EXTENSIONS,
+    )
+
+
+def classify(name: str) -> FileKind:
+    """Classify a file by its base name."""
+    suffix = file_suffix(name)
+    exact, patterns = _lexer_special_names()
+    if not suffix or name in exact or name.lower() in NAME_ICONS or patterns.match(name):
+        return _classify(name)
+    # Any name with this extension classifies the same
+    return _classify("file" + suffix)
+
+
+@lru_cache(maxsize=256)
+def lexer_for(alias: str):
+    """A shared Pygments lexer instance for a FileKind.lexer alias."""
+    try:
+        return get_lexer_by_name(alias, stripall=False)
+    except Exception:
+        return TextLexer(stripall=False)
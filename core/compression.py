@@ -0,0 +1,119 @@
+"""
+Precompressed page storage.
+Rendered pages are compressed once, while they are generated, and kept only in
+compressed form; requests pick the smallest encoding the client accepts instead
+of re-sending (or re-compressing) the raw HTML on every hit.
+"""
+
+import gzip
+import zlib
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+# Optional encoders: used when installed, gzip is always available.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ENCODING_GZIP = "gzip"
+ENCODING_BROTLI = "br"
+ENCODING_ZSTD = "zstd"
+
+# Pages are compressed once and served many times, so favour ratio over speed,
+# but stay clear of the slowest levels: a multi-megabyte page still has to fit
+# in the render budget.
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 9
+ZSTD_LEVEL = 15
+
+
+def _gzip_compressor():
+    return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits 31: gzip container
+
+
+def _brotli_compressor():
+    return brotli.Compressor(quality=BROTLI_QUALITY, mode=brotli.MODE_TEXT)
+
+
+def _zstd_compressor():
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+
+def available_encodings() -> Dict[str, Callable]:
+    """Encoding name -> factory for a streaming compressor, for each installed encoder."""
+    encoders = {ENCODING_GZIP: _gzip_compressor}
+    if brotli is not None:
+        encoders[ENCODING_BROTLI] = _brotli_compressor
+    if zstandard is not None:
+        encoders[ENCODING_ZSTD] = _zstd_compressor
+    return encoders
+
+
+@dataclass
+class CompressedPage:
+    """One rendered page in every available encoding; the raw HTML is not kept."""
+    bodies: Dict[str, bytes] = field(default_factory=dict)
+    raw_size: int = 0
+
+    def stored_size(self) -> int:
+        return sum(len(body) for body in self.bodies.values())
+
+    def select(self, accepts: Callable[[str], bool]) -> Tuple[Optional[str], bytes]:
+        """
+        Return (content_encoding, body) for the smallest encoding the client accepts.
+
+        Clients that accept none of them get the HTML decompressed from gzip,
+        which is rare enough not to be worth storing.
+        """
+        candidates = [(len(body), enc) for enc, body in self.bodies.items() if accepts(enc)]
+        if candidates:
+            _, enc = min(candidates)
+            return enc, self.bodies[enc]
+        return None, gzip.decompress(self.bodies[ENCODING_GZIP])
+
+    def html(self) -> str:
+        return gzip.decompress(self.bodies[ENCODING_GZIP]).decode("utf-8")
+
+
+class PageCompressor:
+    """Feed a page chunk by chunk, as it is streamed, and compress into every encoding at once."""
+
+    def __init__(self):
+        self._compressors = {enc: factory() for enc, factory in available_encodings().items()}
+        self._parts: Dict[str, list] = {enc: [] for enc in self._compressors}
+        self._raw_size = 0
+
+    def feed(self, chunk: str) -> None:
+        data = chunk.encode("utf-8")
+        self._raw_size += len(data)
+        for enc, compressor in self._compressors.items():
+            if enc == ENCODING_BROTLI:
+                out = compressor.process(data)
+            else:
+                out = compressor.compress(data)
+            if out:
+                self._parts[enc].append(out)
+
+    def finish(self) -> CompressedPage:
+        page = CompressedPage(raw_size=self._raw_size)
+        for enc, compressor in self._compressors.items():
+            if enc == ENCODING_BROTLI:
+                tail = compressor.finish()
+            else:
+                tail = compressor.flush()
+            page.bodies[enc] = b"".join(self._parts[enc]) + tail
+        return page
+
+
+def compress_page(chunks: Iterable[str]) -> CompressedPage:
+    """Compress a whole page given as one string or an iterable of chunks."""
+    compressor = PageCompressor()
+    for chunk in [chunks] if isinstance(chunks, str) else chunks:
+        compressor.feed(chunk)
+    return compressor.finish()
@@ -0,0 +1,115 @@
+"""
+Compact Pygments HTML formatter.
+Emits far less markup than HtmlFormatter for the same visual result: one <pre>
+per file, no spans for unstyled or whitespace tokens, adjacent tokens with the
+same style merged into one span, and one (the shortest) class per distinct style.
+"""
+
+from typing import Dict, Iterable, List, Set, Tuple
+
+from pygments.formatters import HtmlFormatter
+from pygments.token import Token
+
+# Same escaping as HtmlFormatter; quotes only need escaping inside attributes.
+_ESCAPE_TABLE = {
+    ord('&'): '&amp;',
+    ord('<'): '&lt;',
+    ord('>'): '&gt;',
+}
+
+# Declarations that make whitespace visible, so such spans cannot be dropped.
+_VISIBLE_ON_WHITESPACE = ('background', 'underline', 'border')
+
+# style class -> (ttype -> class, class -> css declarations); computed once per style
+_CLASS_MAPS: Dict[type, Tuple[Dict, Dict[str, str]]] = {}
+
+
+def _build_class_map(formatter: HtmlFormatter) -> Tuple[Dict, Dict[str, str]]:
+    """Map every token type to the shortest class sharing its style ('' = unstyled)."""
+    by_style: Dict[str, List] = {}
+    for ttype, _ in formatter.style:
+        cls = formatter.ttype2class.get(ttype, '')
+        css = formatter.class2style[cls][0] if cls in formatter.class2style else ''
+        by_style.setdefault(css, []).append((ttype, cls))
+
+    ttype_class = {}
+    class_css = {}
+    for css, members in by_style.items():
+        short = min((cls for _, cls in members), key=lambda c: (len(c), c)) if css else ''
+        for ttype, _ in members:
+            ttype_class[ttype] = short
+        if short:
+            class_css[short] = css
+    return ttype_class, class_css
+
+
+class CompactHtmlFormatter(HtmlFormatter):
+    """HtmlFormatter emitting minimal markup; see the module docstring."""
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        if self.style not in _CLASS_MAPS:
+            _CLASS_MAPS[self.style] = _build_class_map(self)
+        self._ttype_class, self._class_css = _CLASS_MAPS[self.style]
+        self.used_classes: Set[str] = set()
+
+    def _class_for(self, ttype) -> str:
+        cls = self._ttype_class.get(ttype)
+        if cls is None:
+            # Lexer-specific subtypes inherit the style of their closest known parent
+            parent = ttype
+            while cls is None and parent is not Token:
+                parent = parent.parent
+                cls = self._ttype_class.get(parent)
+            cls = cls or ''
+            self._ttype_class[ttype] = cls
+        return cls
+
+    def format_unencoded(self, tokensource: Iterable, outfile) -> None:
+        out: List[str] = ['<pre>']
+        used = self.used_classes
+        class_css = self._class_css
+        open_cls = ''
+        pending_ws = ''  # whitespace held back until we know whether the span continues
+
+        for ttype, value in tokensource:
+            if not value:
+                continue
+            cls = self._class_for(ttype)
+            text = value.translate(_ESCAPE_TABLE)
+            if value.isspace() and not (cls and any(v in class_css[cls] for v in _VISIBLE_ON_WHITESPACE)):
+                pending_ws += text
+                continue
+            if cls != open_cls:
+                if open_cls:
+                    out.append('</span>')
+                if pending_ws:
+                    out.append(pending_ws)
+                    pending_ws = ''
+                if cls:
+                    out.append(f'<span class="{cls}">')
+                    used.add(cls)
+                open_cls = cls
+            elif pending_ws:
+                out.append(pending_ws)
+                pending_ws = ''
+            out.append(text)
+
+        if open_cls:
+            out.append('</span>')
+        out.append(pending_ws)
+        out.append('</pre>')
+        outfile.write(''.join(out))
+
+    def base_style_defs(self, prefix: str = '.highlight') -> str:
+        """The rules HtmlFormatter always emits, independent of the tokens used."""
+        return '\n'.join(['pre { line-height: 125%; }'] + self.get_background_style_defs(prefix))
+
+    def token_style_defs(self, classes: Iterable[str], prefix: str = '.highlight') -> str:
+        """CSS for just the given token classes."""
+        lines = []
+        for cls in sorted(set(classes)):
+            css = self._class_css.get(cls)
+            if css:
+                lines.append(f'{prefix} .{cls} {{ {css} }}')
+        return '\n'.join(lines)
@@ -9,6 +9,7 @@ import tempfile
 import pathlib
 import io
 import base64
+import re
 from typing import List, Dict, Any
 import logging
 
@@ -33,30 +34,40 @@ def parse_github_url(url: str) -> tuple[str, str]:
     
     return parts[0], parts[1]
 
-def fetch_repo_archive(owner: str, repo: str, target_dir: pathlib.Path) -> str:
+def resolve_commit(owner: str, repo: str, ref: str = None) -> str:
     """
-    Fetch repository archive from GitHub and extract to target directory.
-    Returns the commit SHA.
+    The full commit SHA of `ref` (a branch, tag or commit SHA), or of the
+    default branch head if not given, without downloading anything.
     """
-    # First, get the default branch and latest commit
-    api_url = f"https://api.github.com/repos/{owner}/{repo}"
-    
+    if ref is not None and re.fullmatch(r"[0-9a-f]{40}", ref):
+        return ref
     try:
-        response = requests.get(api_url, timeout=30)
-        response.raise_for_status()
-        repo_info = response.json()
-        
-        default_branch = repo_info.get('default_branch', 'main')
+        if ref is None:
+            # Get the default branch
+            api_url = f"https://api.github.com/repos/{owner}/{repo}"
+            response = requests.get(api_url, timeout=30)
+            response.raise_for_status()
+            repo_info = response.json()
+            ref = repo_info.get('default_branch', 'main')
         
-        # Get the latest commit SHA
-        commits_url = f"https://api.github.com/repos/{owner}/{repo}/commits/{default_branch}"
+        commits_url = f"https://api.github.com/repos/{owner}/{repo}/commits/{ref}"
         response = requests.get(commits_url, timeout=30)
         response.raise_for_status()
-        commit_info = response.json()
-        commit_sha = commit_info['sha']
+        return response.json()['sha']
+    except requests.exceptions.RequestException as e:
+        raise GitHubAPIError(f"Failed to resolve {ref or 'the default branch'}: {str(e)}")
+
+def fetch_repo_archive(owner: str, repo: str, target_dir: pathlib.Path, ref: str = None) -> str:
+    """
+    Fetch repository archive from GitHub and extract to target directory.
+    `ref` is a branch, tag or commit SHA; the default branch if not given.
+    Returns the commit SHA.
+    """
+    try:
+        commit_sha = resolve_commit(owner, repo, ref)
         
-        # Download the archive
-        archive_url = f"https://github.com/{owner}/{repo}/archive/{default_branch}.zip"
+        # Download the archive of exactly that commit, so the content always matches the SHA
+        archive_url = f"https://github.com/{owner}/{repo}/archive/{commit_sha}.zip"
         response = requests.get(archive_url, timeout=60)
         response.raise_for_status()
         
@@ -64,25 +75,20 @@ def fetch_repo_archive(owner: str, repo: str, target_dir: pathlib.Path) -> str:
         with zipfile.ZipFile(io.BytesIO(response.content)) as zip_file:
             zip_file.extractall(target_dir.parent)
             
-            # The extracted folder will be named repo-branch, move contents to target_dir
-            extracted_folder = target_dir.parent / f"{repo}-{default_branch}"
-            if extracted_folder.exists():
+            # Everything is under one top-level folder (repo-<sha>); move it to target_dir
+            names = zip_file.namelist()
+            extracted_folder = target_dir.parent / names[0].split('/')[0] if names else None
+            if extracted_folder is not None and extracted_folder.is_dir():
                 if target_dir.exists():
                     import shutil
                     shutil.rmtree(target_dir)
                 extracted_folder.rename(target_dir)
-            else:
-                # Try with master branch naming
-                extracted_folder = target_dir.parent / f"{repo}-master"
-                if extracted_folder.exists():
-                    if target_dir.exists():
-                        import shutil
-                        shutil.rmtree(target_dir)
-                    extracted_folder.rename(target_dir)
         
         logger.info(f"Successfully fetched {owner}/{repo} at commit {commit_sha[:8]}")
         return commit_sha
         
+    except GitHubAPIError:
+        raise
     except requests.exceptions.RequestException as e:
         raise GitHubAPIError(f"Failed to fetch repository: {str(e)}")
     except zipfile.BadZipFile as e:
@@ -90,13 +96,13 @@ def fetch_repo_archive(owner: str, repo: str, target_dir: pathlib.Path) -> str:
     except Exception as e:
         raise GitHubAPIError(f"Unexpected error: {str(e)}")
 
-def fetch_github_repo(repo_url: str, target_dir: pathlib.Path) -> str:
+def fetch_github_repo(repo_url: str, target_dir: pathlib.Path, ref: str = None) -> str:
     """
     Main function to fetch a GitHub repository using the API.
     Returns the commit SHA.
     """
     owner, repo = parse_github_url(repo_url)
-    return fetch_repo_archive(owner, repo, target_dir)
+    return fetch_repo_archive(owner, repo, target_dir, ref)
 
 # For compatibility with existing code
 def git_clone_api(url: str, dst: str) -> None:
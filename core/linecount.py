@@ -0,0 +1,107 @@
+"""
+Line counts (total, blank, comment, code) of rendered files.
+Files are counted from the text already read for their section. Comment lines
+come from the Pygments token stream when the file is highlighted on the
+server, and otherwise from the comment syntax of the file's extension, which
+is approximate: a line counts as a comment if it starts with a comment marker
+or lies inside a block comment.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from pygments.token import Comment, String
+
+# Comment syntax by extension: (line comment prefixes, block comment delimiters)
+_HASH = (("#",), None)
+_SLASH = (("//",), ("/*", "*/"))
+_COMMENT_SYNTAX: Dict[str, Tuple[Tuple[str, ...], Optional[Tuple[str, str]]]] = {
+    ext: syntax for exts, syntax in (
+        ((".py", ".pyw", ".sh", ".bash", ".zsh", ".fish", ".rb", ".pl", ".r", ".yaml", ".yml", ".toml",
+          ".cfg", ".ini", ".conf", ".cmake", ".mk", ".dockerfile", ".ps1", ".tf"), _HASH),
+        ((".c", ".h", ".cc", ".cpp", ".cxx", ".hpp", ".java", ".js", ".jsx", ".ts", ".tsx", ".go", ".rs",
+          ".swift", ".kt", ".kts", ".php", ".cs", ".scala", ".dart", ".groovy", ".gradle",
+          ".css", ".scss", ".sass", ".less"), _SLASH),
+        ((".sql", ".lua", ".hs"), (("--",), None)),
+        ((".html", ".htm", ".xml", ".svg", ".vue"), ((), ("<!--", "-->"))),
+        ((".bat", ".cmd"), (("rem ", "REM ", "::"), None)),
+    ) for ext in exts
+}
+
+
+@dataclass
+class LineCounts:
+    lines: int = 0
+    blank: int = 0
+    comment: int = 0
+
+    @property
+    def code(self) -> int:
+        return self.lines - self.blank - self.comment
+
+    def add(self, other: "LineCounts") -> None:
+        self.lines += other.lines
+        self.blank += other.blank
+        self.comment += other.comment
+
+    def to_dict(self) -> dict:
+        return {"lines": self.lines, "code": self.code, "comment": self.comment, "blank": self.blank}
+
+
+def count_lines(text: str, extension: str, comment_lines: Optional[int] = None) -> LineCounts:
+    """
+    Line counts of text. comment_lines, when highlighting already counted
+    them from the token stream, replaces the comment syntax heuristic.
+    """
+    prefixes, block = _COMMENT_SYNTAX.get(extension, ((), None))
+    if comment_lines is not None:
+        prefixes, block = (), None
+    counts = LineCounts()
+    closing = None  # end delimiter of the open block comment
+    for line in text.splitlines():
+        counts.lines += 1
+        stripped = line.strip()
+        if not stripped:
+            counts.blank += 1
+        elif closing:
+            counts.comment += 1
+            if closing in stripped:
+                closing = None
+        elif prefixes and stripped.startswith(prefixes):
+            counts.comment += 1
+        elif block and stripped.startswith(block[0]):
+            counts.comment += 1
+            if block[1] not in stripped[len(block[0]):]:
+                closing = block[1]
+    if comment_lines is not None:
+        counts.comment = min(comment_lines, counts.lines - counts.blank)
+    return counts
+
+
+class CommentLineCounter:
+    """Passes a Pygments token stream through, counting the lines holding only comments."""
+
+    def __init__(self):
+        self.comment_lines = 0
+        self._comment = False
+        self._code = False
+
+    def feed(self, tokens: Iterable) -> Iterator:
+        for ttype, value in tokens:
+            yield ttype, value
+            pieces = value.split("\n")
+            for k, piece in enumerate(pieces):
+                if k:
+                    self._end_line()
+                if piece.strip():
+                    # Docstrings count as comments; preprocessor directives are code
+                    if (ttype in Comment and ttype not in Comment.Preproc) or ttype in String.Doc:
+                        self._comment = True
+                    else:
+                        self._code = True
+        self._end_line()
+
+    def _end_line(self) -> None:
+        if self._comment and not self._code:
+            self.comment_lines += 1
+        self._comment = self._code = False
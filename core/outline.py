@@ -0,0 +1,213 @@
+"""
+Outlines: the top-level definitions of a file, for skimming large repositories.
+An outline keeps each definition's signature and the comments or docstring
+that document it, and drops the bodies. Python files are outlined from their
+syntax tree; other languages from the Pygments token stream, where a line
+declaring a function, class or type at (nearly) top-level indentation counts
+as a definition. Markdown files are outlined by their headings.
+"""
+
+import ast
+from typing import List, Optional, Set
+
+from pygments.token import Comment, Keyword, Name, Punctuation, String, Text
+
+from core.classify import lexer_for
+from core.linecount import CommentLineCounter
+from core.symbols import SymbolCollector, leading_lines
+
+PYTHON_LEXERS = {"python", "python2"}
+# Definitions indented further than this (in columns, tabs counting 4) are
+# left out, so classes keep their methods but nested functions are dropped
+OUTLINE_MAX_INDENT = 4
+# Longest signature kept, and longest comment block kept above a definition
+OUTLINE_SIGNATURE_LINES = 8
+OUTLINE_COMMENT_LINES = 20
+ELIDED = "..."
+# Class body statements kept in Python outlines
+_MEMBER_TYPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Assign, ast.AnnAssign)
+# Keywords that introduce a named definition in the languages Pygments
+# lexes without tagging definition names (JavaScript, Go, ...)
+_DEFINITION_KEYWORDS = {
+    "class", "def", "enum", "fn", "fun", "func", "function", "impl", "interface", "module",
+    "object", "proc", "record", "struct", "sub", "trait", "type",
+}
+
+
+def outline_text(text: str, lexer: str, counter: Optional[CommentLineCounter] = None) -> str:
+    """
+    The outline of a code file, "" when it has no definitions; runs inside the
+    watchdog worker. With counter, the whole file's token stream is passed
+    through it, so comment lines are counted as when the file is highlighted.
+    """
+    if lexer in PYTHON_LEXERS:
+        try:
+            outline = python_outline(text)
+        except (SyntaxError, ValueError, RecursionError):
+            pass
+        else:
+            if counter is not None:
+                for _ in counter.feed(lexer_for(lexer).get_tokens(text)):
+                    pass
+            return outline
+    return token_outline(text, lexer, counter)
+
+
+def markdown_outline(text: str) -> str:
+    """The headings of a Markdown document, skipping fenced code blocks."""
+    headings = []
+    fence = None
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith(("```", "~~~")):
+            if fence is None:
+                fence = stripped[:3]
+            elif stripped.startswith(fence):
+                fence = None
+        elif fence is None and stripped.startswith("#"):
+            headings.append(stripped)
+    return "\n\n".join(headings)
+
+
+def python_outline(text: str) -> str:
+    """Module docstring, then each top-level function and class with their methods."""
+    tree = ast.parse(text)
+    lines = text.splitlines()
+    out: List[str] = []
+    docstring = _docstring(tree)
+    if docstring is not None:
+        out.extend(lines[docstring.lineno - 1:docstring.end_lineno])
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            if out:
+                out.append("")
+            _outline_definition(node, lines, out, nested=False)
+    return "\n".join(out)
+
+
+def _docstring(node):
+    """The expression node of node's docstring, if it has one."""
+    body = getattr(node, "body", None)
+    if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) \
+            and isinstance(body[0].value.value, str):
+        return body[0]
+    return None
+
+
+def _outline_definition(node, lines: List[str], out: List[str], nested: bool) -> None:
+    start = min([d.lineno for d in node.decorator_list] + [node.lineno])
+    out.extend(_comments_above(lines, start))
+    body = node.body
+    # The header runs up to the line before the body, unless the body shares its last line
+    header_end = body[0].lineno - 1 if body[0].lineno > node.lineno else body[0].lineno
+    header = lines[start - 1:header_end]
+    while header and not header[-1].strip():
+        header.pop()
+    out.extend(header)
+    if body[0].lineno <= node.lineno:
+        return
+    indent = " " * body[0].col_offset
+    docstring = _docstring(node)
+    if docstring is not None:
+        out.extend(lines[docstring.lineno - 1:docstring.end_lineno])
+        body = body[1:]
+    members = [] if nested else [m for m in body if isinstance(m, _MEMBER_TYPES)]
+    if isinstance(node, ast.ClassDef) and members:
+        for member in members:
+            if isinstance(member, (ast.Assign, ast.AnnAssign)):
+                # Class attributes (dataclass fields and the like), when they fit on one line
+                if member.lineno == member.end_lineno:
+                    out.append(lines[member.lineno - 1])
+            else:
+                _outline_definition(member, lines, out, nested=True)
+    elif body:
+        out.append(indent + ELIDED)
+
+
+def _comments_above(lines: List[str], line: int) -> List[str]:
+    """The block of comment lines directly above 1-based line."""
+    start = line - 1
+    while start > 0 and line - start <= OUTLINE_COMMENT_LINES and lines[start - 1].strip().startswith("#"):
+        start -= 1
+    return lines[start:line - 1]
+
+
+def token_outline(text: str, lexer: str, counter: Optional[CommentLineCounter] = None) -> str:
+    """
+    The file's leading comment, then each definition line at top-level or
+    one level of indentation, with the comments and annotations directly
+    above it and the rest of a signature spanning several lines.
+    """
+    lines = text.splitlines()
+    comment_only, definitions = _scan_tokens(text, lexer, counter)
+    keep: Set[int] = set()  # 0-based line numbers
+    first = next((n for n, line in enumerate(lines) if line.strip()), None)
+    if first is not None:
+        n = first
+        while n + 1 in comment_only and n - first < OUTLINE_COMMENT_LINES:
+            keep.add(n)
+            n += 1
+    for line in definitions:
+        n = line - 1
+        if n >= len(lines) or _indent(lines[n]) > OUTLINE_MAX_INDENT:
+            continue
+        above = n - 1
+        while above >= 0 and n - above <= OUTLINE_COMMENT_LINES and (
+                above + 1 in comment_only or lines[above].strip().startswith(("@", "#["))):
+            keep.add(above)
+            above -= 1
+        depth = 0
+        for k in range(n, min(n + OUTLINE_SIGNATURE_LINES, len(lines))):
+            keep.add(k)
+            depth += lines[k].count("(") - lines[k].count(")")
+            if depth <= 0:
+                break
+    out: List[str] = []
+    previous = None
+    for n in sorted(keep):
+        if previous is not None and n != previous + 1:
+            out.append("")
+        out.append(lines[n])
+        previous = n
+    return "\n".join(out)
+
+
+def _indent(line: str) -> int:
+    expanded = line.expandtabs(4)
+    return len(expanded) - len(expanded.lstrip())
+
+
+def _scan_tokens(text: str, lexer: str, counter: Optional[CommentLineCounter] = None):
+    """(1-based lines holding only comments, 1-based lines declaring a definition)."""
+    first_line = 1 + leading_lines(text)
+    collector = SymbolCollector(first_line)
+    comment_only: Set[int] = set()
+    definitions: Set[int] = set()
+    line = first_line
+    comment = code = False
+    declaring = None  # line of a definition keyword awaiting its name
+    tokens = lexer_for(lexer).get_tokens(text)
+    if counter is not None:
+        tokens = counter.feed(tokens)
+    for ttype, value in collector.feed(tokens):
+        if declaring is not None and value.strip():
+            if ttype in Name or (ttype in Punctuation and value.strip() == "("):
+                definitions.add(declaring)
+            declaring = None
+        if ttype in Keyword and value in _DEFINITION_KEYWORDS:
+            declaring = line
+        for k, piece in enumerate(value.split("\n")):
+            if k:
+                if comment and not code:
+                    comment_only.add(line)
+                line += 1
+                comment = code = False
+            if piece.strip():
+                if ttype in Comment or ttype in String.Doc:
+                    comment = True
+                elif ttype not in Text:
+                    code = True
+    if comment and not code:
+        comment_only.add(line)
+    definitions.update(symbol.line for symbol in collector.symbols)
+    return comment_only, sorted(definitions)
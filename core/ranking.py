@@ -0,0 +1,139 @@
+"""
+Importance ranking for budget-fitted LLM exports.
+When a repository does not fit the requested budget, the export keeps the most
+useful files instead of an alphabetical prefix: the README and top-level config
+first, then shallow files, entry points, files imported by many others and
+recently changed files.
+
+Every signal is a small integer, so files are ordered with a bucket sort over
+the combined key; ranking and fitting are linear in the number of files.
+"""
+
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence
+
+UNIT_TOKENS = "tokens"
+UNIT_BYTES = "bytes"
+
+TOP_LEVEL_CONFIG = {
+    "pyproject.toml", "setup.py", "setup.cfg", "requirements.txt", "tox.ini", "pipfile",
+    "package.json", "tsconfig.json", "cargo.toml", "go.mod", "gemfile", "composer.json",
+    "pom.xml", "build.gradle", "build.gradle.kts", "cmakelists.txt", "makefile",
+    "dockerfile", "docker-compose.yml", "docker-compose.yaml", "vercel.json",
+}
+ENTRY_POINTS = {
+    "__main__.py", "main.py", "app.py", "cli.py", "manage.py", "wsgi.py", "asgi.py",
+    "index.js", "index.ts", "main.js", "main.ts", "server.js", "server.ts",
+    "main.go", "main.rs", "lib.rs", "main.c", "main.cpp", "main.java", "program.cs",
+}
+# Files that stand for their directory when imported
+_PACKAGE_FILES = {"__init__", "index", "mod"}
+
+# Python/JS/TS import statements, C includes and Rust use paths
+_IMPORT_RE = re.compile(
+    r"""^[ \t]*(?:from[ \t]+([\w.]+)[ \t]+import|import[ \t]+([\w.]+)|\#[ \t]*include[ \t]*["<]([^">]+)[">]|use[ \t]+([\w:]+))"""
+    r"""|(?:\bfrom|\brequire\(|^import)[ \t]*['"]([^'"]+)['"]""",
+    re.MULTILINE,
+)
+_NAME_SPLIT_RE = re.compile(r"[./:\\]+")
+_EXTENSION_RE = re.compile(r"\.\w+$")
+
+# Bucket ranges of each signal, most important first
+_TIERS = 3          # root README, top-level config, everything else
+_DEPTHS = 8         # directory depth, capped
+_ENTRY = 2          # entry point or not
+_FAN_IN = 8         # bit length of the import count, capped, inverted
+_RECENCY = 4        # recently changed ... unknown
+RECENT_CHANGES = (50, 500)  # rank cut-offs in the list of recently changed paths
+
+
+def imported_names(text: str) -> Iterable[str]:
+    """Module name components referenced by import-like statements in text."""
+    for match in _IMPORT_RE.finditer(text):
+        groups = match.groups()
+        target = next(group for group in groups if group)
+        if groups[2] or groups[4]:
+            # A file path rather than a module name
+            target = _EXTENSION_RE.sub("", target)
+        for part in _NAME_SPLIT_RE.split(target):
+            if part and part not in ("crate", "self", "super"):
+                yield part
+
+
+def module_name(rel: str) -> str:
+    """The name other files use to import rel, approximately."""
+    parts = rel.rsplit("/", 2)
+    stem = parts[-1].split(".", 1)[0]
+    if stem in _PACKAGE_FILES and len(parts) > 1:
+        return parts[-2]
+    return stem
+
+
+def rank_key(rel: str, fan_in: int, recency: Optional[int], depth: Optional[int] = None) -> int:
+    """Combined bucket index of a file; lower sorts first."""
+    name = rel.rsplit("/", 1)[-1].lower()
+    if depth is None:
+        depth = rel.count("/")
+    if depth == 0 and name.startswith("readme"):
+        tier = 0
+    elif depth == 0 and name in TOP_LEVEL_CONFIG:
+        tier = 1
+    else:
+        tier = 2
+    entry = 0 if name in ENTRY_POINTS else 1
+    fan_in_bucket = _FAN_IN - 1 - min(fan_in.bit_length(), _FAN_IN - 1)
+    if recency is None:
+        recency_bucket = _RECENCY - 1
+    else:
+        recency_bucket = sum(recency >= cut for cut in RECENT_CHANGES)
+
+    key = tier
+    key = key * _DEPTHS + min(depth, _DEPTHS - 1)
+    key = key * _ENTRY + entry
+    key = key * _FAN_IN + fan_in_bucket
+    key = key * _RECENCY + recency_bucket
+    return key
+
+
+def rank_files(rels: Sequence[str], imports: Counter,
+               recency: Optional[Dict[str, int]] = None,
+               depths: Optional[Sequence[int]] = None) -> List[int]:
+    """
+    Positions of rels, most important first. `imports` counts imported name
+    components (see imported_names); `recency` maps paths to their rank in a
+    list of recent changes, most recent first; `depths`, when the caller has
+    them already, saves recounting directory levels. Ties keep their input order.
+    """
+    recency = recency or {}
+    buckets: List[List[int]] = [[] for _ in range(_TIERS * _DEPTHS * _ENTRY * _FAN_IN * _RECENCY)]
+    for pos, rel in enumerate(rels):
+        depth = depths[pos] if depths is not None else None
+        buckets[rank_key(rel, imports.get(module_name(rel), 0), recency.get(rel), depth)].append(pos)
+    return [pos for bucket in buckets for pos in bucket]
+
+
+@dataclass
+class BudgetSelection:
+    unit: str
+    budget: int
+    used: int = 0
+    selected: List[int] = field(default_factory=list)  # positions, in ranked order
+    dropped: List[int] = field(default_factory=list)   # positions, in ranked order
+
+
+def fit_budget(ranked: Iterable[int], costs: Sequence[int], budget: int, unit: str) -> BudgetSelection:
+    """
+    Greedily take files in ranked order while they fit; a file that does not
+    fit is dropped but smaller files after it may still be taken.
+    """
+    selection = BudgetSelection(unit, budget)
+    for pos in ranked:
+        cost = costs[pos]
+        if selection.used + cost <= budget:
+            selection.selected.append(pos)
+            selection.used += cost
+        else:
+            selection.dropped.append(pos)
+    return selection
@@ -13,7 +13,7 @@ Features
 - Includes repo metadata, counts, and a directory tree header
 
 Usage
-    python repo_to_single_page.py https://github.com/user/repo -o out.html
+    python -m core.repo_to_single_page https://github.com/user/repo -o out.html
 
 Requirements
     pip install pygments markdown
@@ -25,7 +25,9 @@ Notes
 
 from __future__ import annotations
 import argparse
+import base64
 import html
+import json
 import os
 import pathlib
 import shutil
@@ -34,13 +36,31 @@ import sys
 import tempfile
 import webbrowser
 from collections import defaultdict, Counter
-from dataclasses import dataclass
-from typing import List, Tuple
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import quote
 
 # External deps
-from pygments import highlight
+from pygments import highlight, format as format_tokens
 from pygments.formatters import HtmlFormatter
-from pygments.lexers import get_lexer_for_filename, TextLexer
+from pygments.lexers import TextLexer
+from pygments.token import Token
+
+from core.formatter import CompactHtmlFormatter
+from core.navigation import (
+    add_navigation_bar, get_navigation_styles, get_body_adjustments,
+    get_sidebar_adjustments, get_mobile_nav_adjustments,
+)
+from core.budget import RenderBudget, MODE_PLAIN, MODE_LISTED
+from core.watchdog import HighlightWatchdog, HighlightTimeout, DEFAULT_HIGHLIGHT_TIMEOUT_SECONDS
+from core.assets import make_asset, asset_registry
+from core.tokens import DEFAULT_CHUNK_TOKENS, Chunk, estimate_tokens, plan_chunks, split_document
+from core.linecount import LineCounts, CommentLineCounter, count_lines
+from core.outline import markdown_outline, outline_text
+from core.symbols import SYMBOL_KINDS, Symbol, SymbolCollector, leading_lines
+from core.classify import TEXT_LEXER, FileKind, classify, lexer_for
+from core.search_index import SearchIndex
+from core.ranking import UNIT_BYTES, UNIT_TOKENS, BudgetSelection, fit_budget, imported_names, rank_files
 
 try:
     import markdown  # Python-Markdown
@@ -49,6 +69,10 @@ except ImportError as e:
     raise
 
 MAX_DEFAULT_BYTES = 50 * 1024
+# History searched for recently changed files when ranking a budgeted export
+RECENT_COMMITS = 200
+# Bump whenever the generated HTML changes, so cached pages and ETags are invalidated
+RENDERER_VERSION = "5"
 BINARY_EXTENSIONS = {
     ".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp", ".svg", ".ico",
     ".pdf", ".zip", ".tar", ".gz", ".bz2", ".xz", ".7z", ".rar",
@@ -56,19 +80,81 @@ BINARY_EXTENSIONS = {
     ".ttf", ".otf", ".eot", ".woff", ".woff2",
     ".so", ".dll", ".dylib", ".class", ".jar", ".exe", ".bin",
 }
-MARKDOWN_EXTENSIONS = {".md", ".markdown", ".mdown", ".mkd", ".mkdn"}
+# Highlighting modes: Pygments on the server, or highlight.js in the browser
+# as each section scrolls into view (much smaller pages for large repos).
+HIGHLIGHT_SERVER = "server"
+HIGHLIGHT_CLIENT = "client"
+# Estimated section heights in px (see section_height): header, padding and
+# footer, plus one line of code or of markdown source
+SECTION_CHROME_PX = 240
+CODE_LINE_PX = 21
+MARKDOWN_LINE_PX = 27
+# Text files over max_bytes get a section showing their first lines, read with
+# a bounded read; previews stop once together they would pass PREVIEW_TOTAL_BYTES
+PREVIEW_LINES = 200
+PREVIEW_BYTES = 16 * 1024
+PREVIEW_TOTAL_BYTES = 1024 * 1024
+HLJS_SRC = "https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/highlight.min.js"
+# highlight.js scopes mapped onto Pygments token types, so client-highlighted
+# code uses the same colours as the server-rendered pages.
+HLJS_TOKEN_MAP = {
+    "keyword": Token.Keyword,
+    "built_in": Token.Name.Builtin,
+    "type": Token.Keyword.Type,
+    "literal": Token.Keyword.Constant,
+    "number": Token.Literal.Number,
+    "string": Token.Literal.String,
+    "regexp": Token.Literal.String.Regex,
+    "symbol": Token.Literal.String.Symbol,
+    "subst": Token.Literal.String.Interpol,
+    "comment": Token.Comment,
+    "doctag": Token.Literal.String.Doc,
+    "meta": Token.Comment.Preproc,
+    "title": Token.Name.Function,
+    "title.class_": Token.Name.Class,
+    "title.function_": Token.Name.Function,
+    "params": Token.Name,
+    "variable": Token.Name.Variable,
+    "attr": Token.Name.Attribute,
+    "attribute": Token.Name.Attribute,
+    "property": Token.Name.Attribute,
+    "tag": Token.Name.Tag,
+    "name": Token.Name.Tag,
+    "selector-tag": Token.Name.Tag,
+    "selector-class": Token.Name.Class,
+    "selector-id": Token.Name.Label,
+    "operator": Token.Operator,
+    "section": Token.Generic.Heading,
+    "addition": Token.Generic.Inserted,
+    "deletion": Token.Generic.Deleted,
+    "emphasis": Token.Generic.Emph,
+    "strong": Token.Generic.Strong,
+}
 
 @dataclass
 class RenderDecision:
     include: bool
     reason: str  # "ok" | "binary" | "too_large" | "ignored"
 
+@dataclass
+class HighlightResult:
+    html: str
+    css_classes: List[str]  # token classes used, so the page CSS only covers those
+    comment_lines: Optional[int] = None  # lines holding only comments, from the token stream
+    symbols: List[Symbol] = field(default_factory=list)  # definitions, from the token stream
+    outline: Optional[str] = None  # the text highlighted instead of the file, for outline_job
+
 @dataclass
 class FileInfo:
     path: pathlib.Path  # absolute path on disk
     rel: str            # path relative to repo root (slash-separated)
     size: int
     decision: RenderDecision
+    kind: FileKind      # icon, language, lexer; see core.classify
+    depth: int          # number of directories above the file
+    tokens: Optional[int] = None  # estimated; set by the first pass that reads the file
+    lines: Optional[LineCounts] = None  # set by the section pass
+    symbols: Optional[List[Symbol]] = None  # set when the section is highlighted on the server
 
 
 def run(cmd: List[str], cwd: str | None = None, check: bool = True) -> subprocess.CompletedProcess:
@@ -87,6 +173,21 @@ def git_head_commit(repo_dir: str) -> str:
         return "(unknown)"
 
 
+def git_recent_paths(repo_dir: str, commits: int = RECENT_COMMITS) -> Dict[str, int]:
+    """
+    Paths changed in the last `commits` commits, mapped to their rank (0 = most
+    recently changed). Deepens a shallow clone with commits and trees only.
+    """
+    run(["git", "fetch", "--quiet", f"--depth={commits}", "--filter=blob:none", "origin"], cwd=repo_dir, check=False)
+    cp = run(["git", "log", f"-n{commits}", "--no-renames", "--name-only", "--format="], cwd=repo_dir, check=False)
+    recency: Dict[str, int] = {}
+    if cp.returncode == 0:
+        for line in cp.stdout.splitlines():
+            if line and line not in recency:
+                recency[line] = len(recency)
+    return recency
+
+
 def bytes_human(n: int) -> str:
     """Human-readable bytes: 1 decimal for KiB and above, integer for B."""
     units = ["B", "KiB", "MiB", "GiB", "TiB"]
@@ -121,20 +222,62 @@ def looks_binary(path: pathlib.Path) -> bool:
         return True
 
 
+def read_head(path: pathlib.Path, max_bytes: int = PREVIEW_BYTES, max_lines: int = PREVIEW_LINES) -> Optional[str]:
+    """
+    The first lines of a file, reading at most max_bytes of it; None if it
+    cannot be read or looks binary. A line cut by the byte limit is left out
+    unless it is the only one.
+    """
+    try:
+        with path.open("rb") as f:
+            data = f.read(max_bytes)
+    except OSError:
+        return None
+    if b"\x00" in data:
+        return None
+    if len(data) == max_bytes and b"\n" in data:
+        data = data[:data.rfind(b"\n") + 1]
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # A character cut by the byte limit is dropped; anything else is binary
+        if e.start < len(data) - 3:
+            return None
+        text = data[:e.start].decode("utf-8")
+    return "".join(text.splitlines(keepends=True)[:max_lines])
+
+
+def plan_previews(files: List[FileInfo]) -> List[FileInfo]:
+    """The oversized files to preview, in TOC order, until previews would pass PREVIEW_TOTAL_BYTES."""
+    previews = []
+    total = 0
+    for i in sorted(files, key=lambda i: toc_sort_key(i.rel)):
+        size = min(i.size, PREVIEW_BYTES)
+        if total + size > PREVIEW_TOTAL_BYTES:
+            break
+        if looks_binary(i.path):
+            continue
+        previews.append(i)
+        total += size
+    return previews
+
+
 def decide_file(path: pathlib.Path, repo_root: pathlib.Path, max_bytes: int) -> FileInfo:
     rel = str(path.relative_to(repo_root)).replace(os.sep, "/")
     try:
         size = path.stat().st_size
     except FileNotFoundError:
         size = 0
+    kind = classify(path.name)
+    depth = rel.count("/")
     # Ignore VCS and build junk
     if "/.git/" in f"/{rel}/" or rel.startswith(".git/"):
-        return FileInfo(path, rel, size, RenderDecision(False, "ignored"))
+        return FileInfo(path, rel, size, RenderDecision(False, "ignored"), kind, depth)
     if size > max_bytes:
-        return FileInfo(path, rel, size, RenderDecision(False, "too_large"))
+        return FileInfo(path, rel, size, RenderDecision(False, "too_large"), kind, depth)
     if looks_binary(path):
-        return FileInfo(path, rel, size, RenderDecision(False, "binary"))
-    return FileInfo(path, rel, size, RenderDecision(True, "ok"))
+        return FileInfo(path, rel, size, RenderDecision(False, "binary"), kind, depth)
+    return FileInfo(path, rel, size, RenderDecision(True, "ok"), kind, depth)
 
 
 def collect_files(repo_root: pathlib.Path, max_bytes: int) -> List[FileInfo]:
@@ -184,12 +327,70 @@ def render_markdown_text(md_text: str) -> str:
     return markdown.markdown(md_text, extensions=["fenced_code", "tables", "toc"])  # type: ignore
 
 
-def highlight_code(text: str, filename: str, formatter: HtmlFormatter) -> str:
-    try:
-        lexer = get_lexer_for_filename(filename, stripall=False)
-    except Exception:
-        lexer = TextLexer(stripall=False)
-    return highlight(text, lexer, formatter)
+def get_lexer(filename: str):
+    return lexer_for(classify(pathlib.PurePosixPath(filename).name).lexer)
+
+
+def lazy_code_html(text: str, lexer: str) -> str:
+    """Escaped source tagged with its language, highlighted later in the browser."""
+    lang = lexer if lexer != TEXT_LEXER else "plaintext"
+    return (
+        f'<pre><code class="lazy-code language-{html.escape(lang)}" data-lang="{html.escape(lang)}">'
+        f'{html.escape(text)}</code></pre>'
+    )
+
+
+def highlightjs_theme_css(formatter: HtmlFormatter, prefix: str = ".highlight") -> str:
+    """CSS giving highlight.js scopes the colours of the Pygments style."""
+    rules = []
+    for scope, ttype in HLJS_TOKEN_MAP.items():
+        style = formatter.style.style_for_token(ttype)
+        decls = []
+        if style["color"]:
+            decls.append(f"color: #{style['color']}")
+        if style["bold"]:
+            decls.append("font-weight: bold")
+        if style["italic"]:
+            decls.append("font-style: italic")
+        if style["underline"]:
+            decls.append("text-decoration: underline")
+        if decls:
+            selector = ".".join(f"hljs-{part}" if n == 0 else part for n, part in enumerate(scope.split(".")))
+            rules.append(f"{prefix} .{selector} {{ {'; '.join(decls)} }}")
+    return "\n".join(rules)
+
+
+def highlight_job(text: str, lexer: str) -> HighlightResult:
+    """Highlight one file with the compact formatter; runs inside the watchdog worker."""
+    formatter = CompactHtmlFormatter()
+    counter = CommentLineCounter()
+    symbols = SymbolCollector(1 + leading_lines(text))
+    code_html = format_tokens(symbols.feed(counter.feed(lexer_for(lexer).get_tokens(text))), formatter)
+    return HighlightResult(code_html, sorted(formatter.used_classes), counter.comment_lines, symbols.symbols)
+
+
+def outline_job(text: str, lexer: str) -> HighlightResult:
+    """
+    Outline one file (see core.outline) and highlight the outline; runs inside
+    the watchdog worker. The result's outline is "" when the file has no
+    definitions; its comment_lines are counted over the whole file, as
+    highlight_job counts them.
+    """
+    counter = CommentLineCounter()
+    shown = outline_text(text, lexer, counter)
+    result = highlight_job(shown, lexer) if shown else HighlightResult("", [])
+    # Symbols of the outline point at its own lines, not the file's
+    result.comment_lines, result.symbols = counter.comment_lines, []
+    result.outline = shown
+    return result
+
+
+def symbols_job(text: str, lexer: str) -> List[Symbol]:
+    """The definitions in one file, without highlighting it; runs inside a watchdog worker."""
+    symbols = SymbolCollector(1 + leading_lines(text))
+    for _ in symbols.feed(lexer_for(lexer).get_tokens(text)):
+        pass
+    return symbols.symbols
 
 
 def slugify(path_str: str) -> str:
@@ -203,71 +404,173 @@ def slugify(path_str: str) -> str:
     return "".join(out)
 
 
-def generate_cxml_text(infos: List[FileInfo], repo_dir: pathlib.Path) -> str:
-    """Generate CXML format text for LLM consumption."""
-    lines = ["<documents>"]
+def read_document(i: FileInfo) -> str:
+    """A file's text for the CXML export, estimating its tokens on first read."""
+    try:
+        text = read_text(i.path)
+    except Exception as e:
+        text = f"Failed to read: {str(e)}"
+    if i.tokens is None:
+        i.tokens = estimate_tokens(text)
+    return text
+
+
+def collect_symbols(infos: List[FileInfo], watchdog: HighlightWatchdog) -> List[Tuple[str, List[Symbol]]]:
+    """
+    (path, definitions) of the rendered code files, lexing each under the
+    watchdog; for pages whose sections were not highlighted on the server.
+    Files whose lexer times out are left out.
+    """
+    found = []
+    for i in infos:
+        if not i.decision.include or i.kind.markdown:
+            continue
+        if i.symbols is None:
+            try:
+                i.symbols = watchdog.run(i.rel, i.kind.lexer_name, read_text(i.path), i.kind.lexer)
+            except Exception:
+                continue
+        if i.symbols:
+            found.append((i.rel, i.symbols))
+    return found
+
+
+def build_search_index(infos: List[FileInfo]) -> SearchIndex:
+    """A content search index of the rendered files, for pages that did not read them all."""
+    index = SearchIndex()
+    for i in infos:
+        if i.decision.include:
+            try:
+                index.add(i.rel, read_text(i.path))
+            except Exception:
+                continue
+    return index
+
+
+def cxml_document(index: int, rel: str, content: str, part: int = 1, parts: int = 1) -> str:
+    part_attrs = f' part="{part}" parts="{parts}"' if parts > 1 else ""
+    return "\n".join([
+        f'<document index="{index}"{part_attrs}>',
+        f"<source>{rel}</source>",
+        "<document_content>",
+        content,
+        "</document_content>",
+        "</document>",
+    ])
+
+
+def iter_cxml_text(infos: List[FileInfo], repo_dir: pathlib.Path, omitted: Set[str] = frozenset()) -> Iterator[str]:
+    """Yield the CXML text one document at a time (see generate_cxml_text)."""
+    yield "<documents>"
     
     rendered = [i for i in infos if i.decision.include]
     for index, i in enumerate(rendered, 1):
-        lines.append(f'<document index="{index}">')
-        lines.append(f"<source>{i.rel}</source>")
-        lines.append("<document_content>")
-        
-        try:
-            text = read_text(i.path)
-            lines.append(text)
-        except Exception as e:
-            lines.append(f"Failed to read: {str(e)}")
-            
-        lines.append("</document_content>")
-        lines.append("</document>")
+        if i.rel in omitted:
+            content = "(content omitted: render time budget exhausted)"
+        else:
+            content = read_document(i)
+        yield "\n" + cxml_document(index, i.rel, content)
     
-    lines.append("</documents>")
-    return "\n".join(lines)
+    yield "\n</documents>"
 
 
-def generate_advanced_stats(infos: List[FileInfo]) -> str:
-    """Generate detailed repository statistics."""
+def cxml_document_tokens(infos: List[FileInfo]) -> List[Tuple[int, int]]:
+    """(document index, estimated tokens) for every CXML document, reading only files not counted yet."""
     rendered = [i for i in infos if i.decision.include]
-    
-    # File type analysis
+    for i in rendered:
+        if i.tokens is None:
+            read_document(i)
+    return [(index, i.tokens) for index, i in enumerate(rendered, 1)]
+
+
+def plan_cxml_chunks(infos: List[FileInfo], doc_tokens: List[Tuple[int, int]], chunk_tokens: int) -> List[Chunk]:
+    """Chunks of the CXML export (see plan_chunks); rereads the documents that must be split."""
+    rendered = [i for i in infos if i.decision.include]
+
+    def part_tokens(index: int) -> List[int]:
+        return [estimate_tokens(part) for part in split_document(read_document(rendered[index - 1]), chunk_tokens)]
+
+    return plan_chunks(doc_tokens, chunk_tokens, part_tokens)
+
+
+def iter_cxml_chunk(infos: List[FileInfo], chunk: Chunk, chunk_tokens: int = DEFAULT_CHUNK_TOKENS) -> Iterator[str]:
+    """
+    Yield one chunk of the CXML export; document indexes match the full export.
+    chunk_tokens must be the size the chunk was planned with, to cut split documents alike.
+    """
+    rendered = [i for i in infos if i.decision.include]
+    yield "<documents>"
+    for index, part, parts in chunk.documents:
+        i = rendered[index - 1]
+        content = read_document(i)
+        if parts > 1:
+            content = split_document(content, chunk_tokens)[part - 1]
+        yield "\n" + cxml_document(index, i.rel, content, part, parts)
+    yield "\n</documents>"
+
+
+def rank_cxml_documents(infos: List[FileInfo], budget: int, unit: str = UNIT_TOKENS,
+                        recency: Optional[Dict[str, int]] = None) -> BudgetSelection:
+    """
+    Rank the CXML documents by importance (see core.ranking) and fit them to
+    budget tokens or bytes. Reads each file once, for its imports and tokens.
+    Positions in the selection are document indexes minus one.
+    """
+    rendered = [i for i in infos if i.decision.include]
+    imports: Counter = Counter()
+    for i in rendered:
+        imports.update(imported_names(read_document(i)))
+    ranked = rank_files([i.rel for i in rendered], imports, recency, [i.depth for i in rendered])
+    costs = [i.tokens if unit == UNIT_TOKENS else i.size for i in rendered]
+    return fit_budget(ranked, costs, budget, unit)
+
+
+def iter_cxml_selection(infos: List[FileInfo], selection: BudgetSelection) -> Iterator[str]:
+    """The selected documents in ranked order, keeping their full-export indexes."""
+    chunk = Chunk(1, selection.used, [(pos + 1, 1, 1) for pos in selection.selected])
+    yield from iter_cxml_chunk(infos, chunk)
+
+
+def generate_cxml_text(infos: List[FileInfo], repo_dir: pathlib.Path, omitted: Set[str] = frozenset()) -> str:
+    """Generate CXML format text for LLM consumption.
+
+    Files in `omitted` (e.g. dropped by the render budget) are listed without content.
+    """
+    return "".join(iter_cxml_text(infos, repo_dir, omitted))
+
+
+def generate_advanced_stats(infos: List[FileInfo], lines_counted: bool = True) -> str:
+    """
+    Generate detailed repository statistics. Line counts are only known once
+    the sections are rendered, so the page gets an empty card that the page
+    script fills from line_stats_html() at the end of the page; with
+    lines_counted False (paged pages) the card says so instead.
+    """
+    # File type analysis, in one pass over the rendered files
     ext_stats = Counter()
     lang_stats = defaultdict(lambda: {'count': 0, 'size': 0})
-    
-    for file_info in rendered:
-        ext = pathlib.Path(file_info.rel).suffix.lower() or 'no-extension'
-        ext_stats[ext] += 1
-        
-        # Language categorization
-        lang = 'Other'
-        if ext in {'.py', '.pyw'}: lang = 'Python'
-        elif ext in {'.js', '.jsx', '.ts', '.tsx'}: lang = 'JavaScript/TypeScript'
-        elif ext in {'.html', '.htm'}: lang = 'HTML'
-        elif ext in {'.css', '.scss', '.sass', '.less'}: lang = 'CSS'
-        elif ext in {'.java'}: lang = 'Java'
-        elif ext in {'.cpp', '.cc', '.cxx', '.c', '.h', '.hpp'}: lang = 'C/C++'
-        elif ext in {'.rs'}: lang = 'Rust'
-        elif ext in {'.go'}: lang = 'Go'
-        elif ext in {'.php'}: lang = 'PHP'
-        elif ext in {'.rb'}: lang = 'Ruby'
-        elif ext in {'.swift'}: lang = 'Swift'
-        elif ext in {'.kt', '.kts'}: lang = 'Kotlin'
-        elif ext in MARKDOWN_EXTENSIONS: lang = 'Markdown'
-        elif ext in {'.json', '.yaml', '.yml', '.toml', '.xml'}: lang = 'Config/Data'
-        elif ext in {'.sh', '.bash', '.zsh', '.fish', '.ps1', '.bat', '.cmd'}: lang = 'Shell Scripts'
-        
-        lang_stats[lang]['count'] += 1
-        lang_stats[lang]['size'] += file_info.size
-    
-    # Directory depth analysis
     depth_stats = Counter()
-    for file_info in rendered:
-        depth = len(file_info.rel.split('/')) - 1
-        depth_stats[depth] += 1
+    rendered_count = 0
+    total_size = 0
+    largest = 0
+    for file_info in infos:
+        if not file_info.decision.include:
+            continue
+        rendered_count += 1
+        total_size += file_info.size
+        largest = max(largest, file_info.size)
+        ext_stats[file_info.kind.extension or 'no-extension'] += 1
+        lang_stats[file_info.kind.language]['count'] += 1
+        lang_stats[file_info.kind.language]['size'] += file_info.size
+        depth_stats[file_info.depth] += 1
     
     # Size analysis
-    total_size = sum(f.size for f in rendered)
-    avg_size = total_size / len(rendered) if rendered else 0
+    avg_size = total_size / rendered_count if rendered_count else 0
+    if lines_counted:
+        lines_card = '<div style="color: var(--text-secondary);">Counting lines…</div>'
+    else:
+        lines_card = ('<div style="color: var(--text-secondary);">Lines are not counted for repositories '
+                      'whose sections load on demand.</div>')
     
     # Generate HTML
     stats_html = f"""
@@ -276,7 +579,7 @@ def generate_advanced_stats(infos: List[FileInfo]) -> str:
         <h3 style="margin: 0 0 1rem 0; font-size: 1.1rem;">📊 Size Analysis</h3>
         <div>Total Size: <strong>{bytes_human(total_size)}</strong></div>
         <div>Average File Size: <strong>{bytes_human(int(avg_size))}</strong></div>
-        <div>Largest File: <strong>{bytes_human(max((f.size for f in rendered), default=0))}</strong></div>
+        <div>Largest File: <strong>{bytes_human(largest)}</strong></div>
       </div>
       
       <div class="stat-card" style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 1.5rem; border-radius: var(--radius-lg); box-shadow: var(--shadow-md);">
@@ -313,12 +616,70 @@ def generate_advanced_stats(infos: List[FileInfo]) -> str:
           ''' for ext, count in ext_stats.most_common(12))}
         </div>
       </div>
+      
+      <div id="line-stats" style="background: white; padding: 2rem; border-radius: var(--radius-lg); box-shadow: var(--shadow-md); margin-top: 1.5rem;">
+        <h3 style="margin: 0 0 1rem 0;">📏 Lines of Code</h3>
+        {lines_card}
+      </div>
     </div>
     """
     
     return stats_html
 
 
+def line_stats(infos: List[FileInfo]) -> Optional[dict]:
+    """
+    Line counts in total and per language, in one pass over the rendered
+    files whose sections counted them; None when none did (paged pages).
+    Languages are ordered by lines of code.
+    """
+    total = LineCounts()
+    languages: Dict[str, LineCounts] = {}
+    files: Counter = Counter()
+    for i in infos:
+        if not i.decision.include or i.lines is None:
+            continue
+        total.add(i.lines)
+        language = i.kind.language
+        if language not in languages:
+            languages[language] = LineCounts()
+        languages[language].add(i.lines)
+        files[language] += 1
+    if not files:
+        return None
+    return {
+        'files': sum(files.values()),
+        **total.to_dict(),
+        'languages': {
+            language: {'files': files[language], **counts.to_dict()}
+            for language, counts in sorted(languages.items(), key=lambda item: item[1].code, reverse=True)
+        },
+    }
+
+
+def line_stats_html(stats: dict) -> str:
+    """The contents of the Lines of Code card, from line_stats()."""
+    return f"""
+        <h3 style="margin: 0 0 1rem 0;">📏 Lines of Code</h3>
+        <div style="margin-bottom: 1rem; color: var(--text-secondary);">
+          <strong style="color: var(--text-primary);">{stats["code"]:,}</strong> code •
+          <strong style="color: var(--text-primary);">{stats["comment"]:,}</strong> comment •
+          <strong style="color: var(--text-primary);">{stats["blank"]:,}</strong> blank •
+          {stats["lines"]:,} lines in {stats["files"]} files
+        </div>
+        <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 1rem;">
+          {''.join(f'''
+            <div style="padding: 1rem; background: var(--bg-secondary); border-radius: var(--radius-md); border-left: 4px solid var(--text-accent);">
+              <div style="font-weight: 600; color: var(--text-primary);">{html.escape(language)}</div>
+              <div style="font-size: 0.9rem; color: var(--text-secondary);">
+                {counts["code"]:,} code • {counts["comment"]:,} comment • {counts["blank"]:,} blank
+              </div>
+            </div>
+          ''' for language, counts in list(stats["languages"].items())[:8])}
+        </div>
+    """
+
+
 def add_pwa_features() -> str:
     """Add PWA manifest and service worker inline."""
     return '''
@@ -384,7 +745,7 @@ def add_interactive_features() -> str:
       const searchHTML = `
         <div class="search-container" style="margin-bottom: 1.5rem;">
           <div class="search-box">
-            <input type="text" id="file-search" placeholder="🔍 Search files..." 
+            <input type="text" id="file-search" placeholder="🔍 Search files and code..." 
                    style="width: 100%; padding: 0.75rem 1rem; border: 2px solid var(--border-light); 
                           border-radius: var(--radius-md); font-size: 0.9rem; background: white;
                           transition: all 0.2s ease;">
@@ -392,6 +753,7 @@ def add_interactive_features() -> str:
           </div>
           <div class="search-stats" style="font-size: 0.8rem; color: var(--text-tertiary); 
                                          margin-top: 0.5rem; text-align: center;"></div>
+          <div id="content-results" class="content-results"></div>
         </div>`;
       
       sidebarInner.insertAdjacentHTML('afterbegin', searchHTML);
@@ -399,60 +761,70 @@ def add_interactive_features() -> str:
       const searchInput = document.getElementById('file-search');
       const searchResults = document.getElementById('search-results');
       const searchStats = document.querySelector('.search-stats');
-      const allFiles = Array.from(document.querySelectorAll('.toc-file a'));
+      const contentResults = document.getElementById('content-results');
+      let contentTimer = null;
+      
+      // Lines containing the query, from the content search worker
+      function showContentResults(query) {
+        searchContent(query).then(found => {
+          if (!found || searchInput.value.toLowerCase().trim() !== query) return;
+          if (found.error) {
+            contentResults.innerHTML = `<div class="content-results-summary">Content search unavailable: ${escapeHTML(found.error)}</div>`;
+            return;
+          }
+          const paged = tocManifest && tocManifest.paged;
+          const hits = found.results.map(hit => {
+            const dir = paged ? hit.path.slice(0, Math.max(hit.path.lastIndexOf('/'), 0)) : undefined;
+            return `<a class="content-hit" href="#${pathAnchor(hit.path)}" data-line="${hit.line}"` +
+              `${dir !== undefined ? ` data-dir="${escapeHTML(dir)}"` : ''}>` +
+              `<span class="content-hit-path">${escapeHTML(hit.path)}:${hit.line}</span>` +
+              `<code>${markMatch(hit.text.trim(), query)}</code></a>`;
+          }).join('');
+          const shown = found.results.length < found.total ? ` (first ${found.results.length})` : '';
+          contentResults.innerHTML =
+            `<div class="content-results-summary">${found.total} matching line(s)${shown} · ${Math.round(found.ms)} ms` +
+            `${found.truncated ? ' · index covers part of the repository' : ''}</div>${hits}`;
+        });
+      }
+      
+      contentResults.addEventListener('click', (e) => {
+        const hit = e.target.closest('a.content-hit');
+        if (!hit) return;
+        e.preventDefault();
+        jumpToLine(hit.getAttribute('href'), hit.dataset.dir, Number(hit.dataset.line));
+        if (window.innerWidth <= 768) closeSidebar();
+      });
       
       searchInput.addEventListener('input', (e) => {
         const query = e.target.value.toLowerCase().trim();
+        clearTimeout(contentTimer);
         
         if (query.length < 2) {
           searchResults.style.display = 'none';
-          resetFileVisibility();
+          filterToc('');
           searchStats.textContent = '';
+          contentResults.innerHTML = '';
           return;
         }
+        contentTimer = setTimeout(() => showContentResults(query), 150);
         
-        const matches = allFiles.filter(link => {
-          const filename = link.textContent.toLowerCase();
-          return filename.includes(query);
-        });
-        
-        // Show/hide files in TOC based on search
-        allFiles.forEach(link => {
-          const listItem = link.closest('.toc-file');
-          if (matches.includes(link)) {
-            listItem.style.display = 'list-item';
-            // Highlight matching text
-            const text = link.innerHTML;
-            const regex = new RegExp(`(${query})`, 'gi');
-            link.innerHTML = text.replace(regex, '<mark style="background: yellow; padding: 0.1em;">$1</mark>');
-          } else {
-            listItem.style.display = 'none';
-          }
-        });
+        // Filters the table of contents trees and marks the match in each name
+        const matches = filterToc(query);
         
-        searchStats.textContent = `${matches.length} file(s) match "${query}"`;
+        searchStats.textContent = `${matches} file(s) match "${query}"`;
         
-        if (matches.length === 0) {
+        if (matches === 0) {
           searchResults.innerHTML = '<div style="padding: 0.5rem; color: var(--text-tertiary); font-style: italic;">No matching files found</div>';
           searchResults.style.display = 'block';
         } else {
           searchResults.style.display = 'none';
         }
       });
-      
-      function resetFileVisibility() {
-        allFiles.forEach(link => {
-          link.closest('.toc-file').style.display = 'list-item';
-          // Remove highlighting
-          const text = link.textContent;
-          link.innerHTML = link.innerHTML.replace(/<mark[^>]*>([^<]*)<\\/mark>/gi, '$1');
-        });
-      }
     }
 
     // Add breadcrumb navigation
-    function addBreadcrumbs() {
-      document.querySelectorAll('.file-section h2').forEach(header => {
+    function addBreadcrumbs(section) {
+      section.querySelectorAll(':scope > h2').forEach(header => {
         const filePath = header.textContent.split('(')[0].trim();
         const pathParts = filePath.split('/');
         
@@ -478,8 +850,8 @@ def add_interactive_features() -> str:
     }
 
     // Add line numbers
-    function addLineNumbers() {
-      document.querySelectorAll('.highlight pre').forEach(pre => {
+    function addLineNumbers(section) {
+      section.querySelectorAll('.highlight pre').forEach(pre => {
         const code = pre.textContent;
         const lines = code.split('\\n');
         const lineNumbers = lines.map((_, i) => i + 1).join('\\n');
@@ -501,35 +873,33 @@ def add_interactive_features() -> str:
     }
 
     // File content analysis
-    function addContentAnalysis() {
-      document.querySelectorAll('.file-section').forEach(section => {
-        const codeBlock = section.querySelector('.highlight, .markdown-content');
-        if (!codeBlock) return;
-        
-        const content = codeBlock.textContent || '';
-        const lines = content.split('\\n').length;
-        const words = content.split(/\\s+/).length;
-        const chars = content.length;
-        
-        const analysisEl = document.createElement('div');
-        analysisEl.className = 'content-analysis';
-        analysisEl.style.cssText = `
-          background: var(--bg-tertiary); padding: 0.75rem 1rem; 
-          border-radius: var(--radius-sm); margin-bottom: 1rem;
-          font-size: 0.85rem; color: var(--text-secondary);
-          display: flex; gap: 1rem; flex-wrap: wrap;
-        `;
-        
-        analysisEl.innerHTML = `
-          <span>📏 <strong>${lines}</strong> lines</span>
-          <span>📝 <strong>${words}</strong> words</span>
-          <span>🔤 <strong>${chars.toLocaleString()}</strong> chars</span>
-          <span>⏱️ ~<strong>${Math.ceil(words / 200)}</strong> min read</span>
-        `;
-        
-        const fileBody = section.querySelector('.file-body');
-        fileBody.insertBefore(analysisEl, fileBody.firstChild);
-      });
+    function addContentAnalysis(section) {
+      const codeBlock = section.querySelector('.highlight, .markdown-content');
+      if (!codeBlock) return;
+      
+      const content = codeBlock.textContent || '';
+      const lines = content.split('\\n').length;
+      const words = content.split(/\\s+/).length;
+      const chars = content.length;
+      
+      const analysisEl = document.createElement('div');
+      analysisEl.className = 'content-analysis';
+      analysisEl.style.cssText = `
+        background: var(--bg-tertiary); padding: 0.75rem 1rem; 
+        border-radius: var(--radius-sm); margin-bottom: 1rem;
+        font-size: 0.85rem; color: var(--text-secondary);
+        display: flex; gap: 1rem; flex-wrap: wrap;
+      `;
+      
+      analysisEl.innerHTML = `
+        <span>📏 <strong>${lines}</strong> lines</span>
+        <span>📝 <strong>${words}</strong> words</span>
+        <span>🔤 <strong>${chars.toLocaleString()}</strong> chars</span>
+        <span>⏱️ ~<strong>${Math.ceil(words / 200)}</strong> min read</span>
+      `;
+      
+      const fileBody = section.querySelector('.file-body');
+      fileBody.insertBefore(analysisEl, fileBody.firstChild);
     }
 
     // Export functions
@@ -589,242 +959,22 @@ def add_interactive_features() -> str:
       setTimeout(() => toast.remove(), 3000);
     }
 
-    // Initialize all interactive features
+    // Initialize all interactive features; the per-section ones are
+    // attached by the page script as each section comes into view
     document.addEventListener('DOMContentLoaded', () => {
-      setTimeout(() => {
-        addLineNumbers();
-        addContentAnalysis();
-        initSearchFeatures();
-        addBreadcrumbs();
-      }, 500);
+      registerSectionWidget(addLineNumbers);
+      registerSectionWidget(addContentAnalysis);
+      initSearchFeatures();
+      registerSectionWidget(addBreadcrumbs);
     });
     </script>
     '''
 
 
-def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: List[FileInfo]) -> str:
-    formatter = HtmlFormatter(nowrap=False)
-    pygments_css = formatter.get_style_defs('.highlight')
-
-    # Stats
-    rendered = [i for i in infos if i.decision.include]
-    skipped_binary = [i for i in infos if i.decision.reason == "binary"]
-    skipped_large = [i for i in infos if i.decision.reason == "too_large"]
-    skipped_ignored = [i for i in infos if i.decision.reason == "ignored"]
-    total_files = len(rendered) + len(skipped_binary) + len(skipped_large) + len(skipped_ignored)
-
-    # Directory tree
-    tree_text = try_tree_command(repo_dir)
-    
-    # Generate CXML text for LLM view
-    cxml_text = generate_cxml_text(infos, repo_dir)
-    
-    # Generate advanced stats
-    advanced_stats_html = generate_advanced_stats(infos)
-    
-    # Get additional features
-    pwa_features = add_pwa_features()
-    export_features = add_export_features()
-    interactive_features = add_interactive_features()
-
-    # Table of contents with directory tree structure
-    toc_items: List[str] = []
-    
-    # Group files by directory for tree structure
-    file_tree = {}
-    for i in rendered:
-        path_parts = i.rel.split('/')
-        current = file_tree
-        for part in path_parts[:-1]:  # directories
-            if part not in current:
-                current[part] = {}
-            current = current[part]
-        # Add file to the current directory
-        if '_files' not in current:
-            current['_files'] = []
-        current['_files'].append(i)
-    
-    def generate_tree_items(tree, path_prefix="", depth=0):
-        items = []
-        
-        # First add directories
-        for dir_name in sorted(key for key in tree.keys() if key != '_files'):
-            dir_path = f"{path_prefix}/{dir_name}" if path_prefix else dir_name
-            indent = "  " * depth
-            folder_icon = "📁" if depth == 0 else "📂"
-            items.append(f'<li class="toc-directory" data-depth="{depth}"><span class="directory-name">{indent}{folder_icon} {html.escape(dir_name)}/</span></li>')
-            items.extend(generate_tree_items(tree[dir_name], dir_path, depth + 1))
-        
-        # Then add files in current directory
-        if '_files' in tree:
-            for file_info in sorted(tree['_files'], key=lambda f: f.rel.split('/')[-1].lower()):
-                anchor = slugify(file_info.rel)
-                filename = file_info.rel.split('/')[-1]
-                indent = "  " * (depth + 1)
-                
-                # Get file icon
-                ext = pathlib.Path(filename).suffix.lower()
-                file_icon = "📄"  # default
-                if ext in MARKDOWN_EXTENSIONS:
-                    file_icon = "📝"
-                elif ext in {".py", ".pyw"}:
-                    file_icon = "🐍"
-                elif ext in {".js", ".jsx", ".ts", ".tsx"}:
-                    file_icon = "⚡"
-                elif ext in {".html", ".htm"}:
-                    file_icon = "🌐"
-                elif ext in {".css", ".scss", ".sass", ".less"}:
-                    file_icon = "🎨"
-                elif ext in {".json", ".jsonl", ".yaml", ".yml", ".toml"}:
-                    file_icon = "⚙️"
-                elif ext in {".sh", ".bash", ".zsh", ".fish", ".ps1", ".bat", ".cmd"}:
-                    file_icon = "🔧"
-                elif ext in {".sql"}:
-                    file_icon = "🗃️"
-                elif ext in {".java", ".class"}:
-                    file_icon = "☕"
-                elif ext in {".cpp", ".cc", ".cxx", ".c", ".h", ".hpp"}:
-                    file_icon = "⚙️"
-                elif ext in {".rs"}:
-                    file_icon = "🦀"
-                elif ext in {".go"}:
-                    file_icon = "🔵"
-                elif ext in {".php"}:
-                    file_icon = "🐘"
-                elif ext in {".rb"}:
-                    file_icon = "💎"
-                elif ext in {".swift"}:
-                    file_icon = "🕊️"
-                elif ext in {".kt", ".kts"}:
-                    file_icon = "📱"
-                elif filename.lower() in {"readme", "readme.md", "readme.txt"}:
-                    file_icon = "📚"
-                elif filename.lower() in {"license", "licence", "copying"}:
-                    file_icon = "📜"
-                elif ext in {".txt", ".log"}:
-                    file_icon = "📋"
-                elif ext in {".xml"}:
-                    file_icon = "🏷️"
-                elif ext in {".gitignore", ".gitattributes"}:
-                    file_icon = "🙈"
-                
-                items.append(f'<li class="toc-file" data-depth="{depth + 1}"><a href="#file-{anchor}">{indent}{file_icon} {html.escape(filename)} <span class="muted">({bytes_human(file_info.size)})</span></a></li>')
-        
-        return items
-    
-    # Generate root level items
-    root_items = generate_tree_items(file_tree)
-    toc_html = "".join(root_items)
-
-    # Render file sections
-    sections: List[str] = []
-    for i in rendered:
-        anchor = slugify(i.rel)
-        p = i.path
-        ext = p.suffix.lower()
-        
-        # Determine file icon based on extension
-        file_icon = "📄"  # default
-        if ext in MARKDOWN_EXTENSIONS:
-            file_icon = "📝"
-        elif ext in {".py", ".pyw"}:
-            file_icon = "🐍"
-        elif ext in {".js", ".jsx", ".ts", ".tsx"}:
-            file_icon = "⚡"
-        elif ext in {".html", ".htm"}:
-            file_icon = "🌐"
-        elif ext in {".css", ".scss", ".sass", ".less"}:
-            file_icon = "🎨"
-        elif ext in {".json", ".jsonl", ".yaml", ".yml", ".toml"}:
-            file_icon = "⚙️"
-        elif ext in {".sh", ".bash", ".zsh", ".fish", ".ps1", ".bat", ".cmd"}:
-            file_icon = "🔧"
-        elif ext in {".sql"}:
-            file_icon = "🗃️"
-        elif ext in {".java", ".class"}:
-            file_icon = "☕"
-        elif ext in {".cpp", ".cc", ".cxx", ".c", ".h", ".hpp"}:
-            file_icon = "⚙️"
-        elif ext in {".rs"}:
-            file_icon = "🦀"
-        elif ext in {".go"}:
-            file_icon = "🔵"
-        elif ext in {".php"}:
-            file_icon = "🐘"
-        elif ext in {".rb"}:
-            file_icon = "💎"
-        elif ext in {".swift"}:
-            file_icon = "🕊️"
-        elif ext in {".kt", ".kts"}:
-            file_icon = "📱"
-        elif ext in {".dockerfile", ".dockerignore"} or p.name.lower() in {"dockerfile", "docker-compose.yml", "docker-compose.yaml"}:
-            file_icon = "🐳"
-        elif p.name.lower() in {"readme", "readme.md", "readme.txt"}:
-            file_icon = "📚"
-        elif p.name.lower() in {"license", "licence", "copying"}:
-            file_icon = "📜"
-        elif ext in {".txt", ".log"}:
-            file_icon = "📋"
-        elif ext in {".xml"}:
-            file_icon = "🏷️"
-        elif ext in {".gitignore", ".gitattributes"}:
-            file_icon = "🙈"
-        
-        try:
-            text = read_text(p)
-            if ext in MARKDOWN_EXTENSIONS:
-                body_html = f'<div class="markdown-content">{render_markdown_text(text)}</div>'
-            else:
-                code_html = highlight_code(text, i.rel, formatter)
-                body_html = f'<div class="highlight">{code_html}</div>'
-        except Exception as e:
-            body_html = f'<pre class="error">Failed to render: {html.escape(str(e))}</pre>'
-        
-        sections.append(f"""
-<section class="file-section" id="file-{anchor}">
-  <h2 data-icon="{file_icon}">
-    <div class="file-header-left">
-      <span>{html.escape(i.rel)} <span class="muted">({bytes_human(i.size)})</span></span>
-    </div>
-  </h2>
-  <div class="file-body">{body_html}</div>
-  <div class="back-top"><a href="#top">↑ Back to top</a></div>
-</section>
-""")
-
-    # Skips lists
-    def render_skip_list(title: str, items: List[FileInfo]) -> str:
-        if not items:
-            return ""
-        lis = [
-            f"<li><code>{html.escape(i.rel)}</code> "
-            f"<span class='muted'>({bytes_human(i.size)})</span></li>"
-            for i in items
-        ]
-        return (
-            f"<details open><summary>{html.escape(title)} ({len(items)})</summary>"
-            f"<ul class='skip-list'>\n" + "\n".join(lis) + "\n</ul></details>"
-        )
-
-    skipped_html = (
-        render_skip_list("Skipped binaries", skipped_binary) +
-        render_skip_list("Skipped large files", skipped_large)
-    )
-
-    # HTML with left sidebar TOC
-    return f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-<meta charset="utf-8" />
-<meta name="viewport" content="width=device-width, initial-scale=1" />
-<title>📚 {html.escape(repo_url)} - Code Repository</title>
-{pwa_features}
-<link rel="preconnect" href="https://fonts.googleapis.com">
-<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-<link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&family=JetBrains+Mono:wght@300;400;500&display=swap" rel="stylesheet">
-<style>
-  :root {{
+# Static page shell. None of this depends on the repository, so it is built
+# once at import and build_html only joins it with the per-repo parts.
+_CSS_BASE = """
+  :root {
     --primary-gradient: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
     --secondary-gradient: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);
     --success-gradient: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%);
@@ -855,105 +1005,23 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
     --radius-md: 12px;
     --radius-lg: 16px;
     --radius-xl: 20px;
-  }}
+  }
 
-  * {{
+  * {
     box-sizing: border-box;
-  }}
-
-  body {{
-    font-family: 'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-    margin: 0; 
-    padding: 0; 
-    padding-top: 60px; /* Account for fixed top nav */
-    line-height: 1.6;
-    color: var(--text-primary);
-    background: var(--bg-secondary);
-    font-size: 14px;
-  }}
-
-  /* Top Navigation Bar */
-  .top-nav {{
-    position: fixed;
-    top: 0;
-    left: 0;
-    right: 0;
-    height: 60px;
-    background: var(--bg-primary);
-    border-bottom: 1px solid var(--border-light);
-    z-index: 1000;
-    display: flex;
-    align-items: center;
-    padding: 0 24px;
-    box-shadow: var(--shadow-sm);
-  }}
-
-  .nav-brand {{
-    display: flex;
-    align-items: center;
-    gap: 12px;
-    font-weight: 600;
-    font-size: 1.1rem;
-    color: var(--text-primary);
-    text-decoration: none;
-  }}
-
-  .nav-brand:hover {{
-    color: var(--text-accent);
-  }}
-
-  .nav-brand .brand-icon {{
-    font-size: 1.5rem;
-  }}
-
-  .nav-actions {{
-    margin-left: auto;
-    display: flex;
-    align-items: center;
-    gap: 16px;
-  }}
-
-  .nav-btn {{
-    display: flex;
-    align-items: center;
-    gap: 8px;
-    padding: 8px 16px;
-    background: var(--bg-secondary);
-    border: 1px solid var(--border-light);
-    border-radius: var(--radius-md);
-    color: var(--text-secondary);
-    text-decoration: none;
-    font-size: 0.875rem;
-    font-weight: 500;
-    transition: all 0.2s ease;
-  }}
-
-  .nav-btn:hover {{
-    background: var(--bg-tertiary);
-    border-color: var(--border-medium);
-    color: var(--text-primary);
-    transform: translateY(-1px);
-  }}
+  }
 
-  .nav-btn.primary {{
-    background: var(--primary-gradient);
-    border-color: transparent;
-    color: white;
-  }}
-
-  .nav-btn.primary:hover {{
-    transform: translateY(-1px);
-    box-shadow: var(--shadow-md);
-  }}
+"""
 
-  .container {{ 
+_CSS_LAYOUT = """
+  .container { 
     max-width: 1200px; 
     margin: 0 auto; 
     padding: 0 2rem; 
-  }}
+  }
 
   /* Animated background elements */
-  .bg-decoration {{
+  .bg-decoration {
     position: fixed;
     top: 0;
     left: 0;
@@ -962,9 +1030,9 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
     pointer-events: none;
     z-index: -1;
     overflow: hidden;
-  }}
+  }
   
-  .bg-decoration::before {{
+  .bg-decoration::before {
     content: '';
     position: absolute;
     top: -50%;
@@ -973,9 +1041,9 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
     height: 200%;
     background: radial-gradient(circle, rgba(102, 126, 234, 0.1) 0%, transparent 50%);
     animation: float 20s ease-in-out infinite;
-  }}
+  }
   
-  .bg-decoration::after {{
+  .bg-decoration::after {
     content: '';
     position: absolute;
     bottom: -50%;
@@ -984,56 +1052,47 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
     height: 200%;
     background: radial-gradient(circle, rgba(118, 75, 162, 0.1) 0%, transparent 50%);
     animation: float 25s ease-in-out infinite reverse;
-  }}
+  }
 
-  @keyframes float {{
-    0%, 100% {{ transform: translate(0px, 0px) rotate(0deg); }}
-    33% {{ transform: translate(30px, -30px) rotate(120deg); }}
-    66% {{ transform: translate(-20px, 20px) rotate(240deg); }}
-  }}
+  @keyframes float {
+    0%, 100% { transform: translate(0px, 0px) rotate(0deg); }
+    33% { transform: translate(30px, -30px) rotate(120deg); }
+    66% { transform: translate(-20px, 20px) rotate(240deg); }
+  }
 
   /* Layout with enhanced sidebar */
-  .page {{ 
+  .page { 
     display: grid; 
     grid-template-columns: 360px minmax(0,1fr); 
     gap: 0; 
     min-height: 100vh;
-  }}
-
-  #sidebar {{
-    position: sticky; 
-    top: 60px; /* Account for fixed top nav */
-    align-self: start;
-    height: calc(100vh - 60px); /* Subtract top nav height */
-    overflow: auto;
-    background: var(--bg-sidebar);
-    border-right: 2px solid var(--border-light);
-    backdrop-filter: blur(10px);
-    box-shadow: var(--shadow-lg);
-  }}
-  
-  #sidebar::-webkit-scrollbar {{
+  }
+
+"""
+
+_CSS_COMPONENTS = """  
+  #sidebar::-webkit-scrollbar {
     width: 8px;
-  }}
+  }
   
-  #sidebar::-webkit-scrollbar-track {{
+  #sidebar::-webkit-scrollbar-track {
     background: transparent;
-  }}
+  }
   
-  #sidebar::-webkit-scrollbar-thumb {{
+  #sidebar::-webkit-scrollbar-thumb {
     background: var(--border-medium);
     border-radius: 4px;
-  }}
+  }
   
-  #sidebar::-webkit-scrollbar-thumb:hover {{
+  #sidebar::-webkit-scrollbar-thumb:hover {
     background: var(--border-strong);
-  }}
+  }
 
-  #sidebar .sidebar-inner {{ 
+  #sidebar .sidebar-inner { 
     padding: 2rem 1.5rem; 
-  }}
+  }
 
-  #sidebar h2 {{ 
+  #sidebar h2 { 
     margin: 0 0 1.5rem 0; 
     font-size: 1.25rem; 
     font-weight: 700;
@@ -1041,37 +1100,37 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
     display: flex;
     align-items: center;
     gap: 0.5rem;
-  }}
+  }
 
-  #sidebar h2::before {{
+  #sidebar h2::before {
     content: '📋';
     font-size: 1.5rem;
-  }}
+  }
 
-  .toc {{ 
+  .toc { 
     list-style: none; 
     padding-left: 0; 
     margin: 0; 
     font-family: 'JetBrains Mono', ui-monospace, SFMono-Regular, Menlo, Monaco, Consolas, monospace;
     font-size: 0.85rem;
     line-height: 1.4;
-  }}
+  }
 
-  .toc li {{ 
+  .toc li { 
     margin-bottom: 0.25rem;
     transition: all 0.2s ease;
-  }}
+  }
 
-  .toc li:hover {{
+  .toc li:hover {
     background: rgba(255, 255, 255, 0.7);
     border-radius: var(--radius-sm);
-  }}
+  }
 
-  .toc-directory {{
+  .toc-directory {
     margin-bottom: 0.1rem;
-  }}
+  }
 
-  .toc-directory .directory-name {{
+  .toc-directory .directory-name {
     display: block;
     padding: 0.4rem 0.75rem;
     color: var(--text-primary);
@@ -1079,13 +1138,13 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
     font-size: 0.8rem;
     white-space: pre;
     cursor: default;
-  }}
+  }
 
-  .toc-file {{
+  .toc-file {
     margin-left: 0;
-  }}
+  }
 
-  .toc-file a {{ 
+  .toc-file a { 
     text-decoration: none; 
     color: var(--text-secondary);
     display: block;
@@ -1098,9 +1157,9 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
     overflow: hidden;
     white-space: pre;
     font-family: inherit;
-  }}
+  }
 
-  .toc-file a::before {{
+  .toc-file a::before {
     content: '';
     position: absolute;
     left: 0;
@@ -1110,112 +1169,250 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
     background: var(--primary-gradient);
     transform: scaleY(0);
     transition: transform 0.2s ease;
-  }}
+  }
 
-  .toc-file a:hover {{
+  .toc-file a:hover {
     color: var(--text-primary);
     background: rgba(255, 255, 255, 0.9);
     box-shadow: var(--shadow-sm);
     transform: translateX(2px);
-  }}
+  }
 
-  .toc-file a:hover::before {{
+  .toc-file a:hover::before {
     transform: scaleY(1);
-  }}
-
-  /* Special styling for root files */
-  .toc-file[data-depth="1"] a {{
-    font-weight: 500;
-  }}
-
-  /* Deeper nesting gets slightly muted */
-  .toc-file[data-depth="3"] a,
-  .toc-file[data-depth="4"] a {{
-    color: var(--text-tertiary);
-    font-size: 0.75rem;
-  }}
-
-  .muted {{ 
-    color: var(--text-tertiary); 
-    font-weight: 400; 
-    font-size: 0.85em; 
-  }}
-
-  main.container {{ 
-    padding: 2rem; 
-    background: var(--bg-primary);
-    border-radius: var(--radius-lg) 0 0 var(--radius-lg);
-    margin-left: -1rem;
-    box-shadow: var(--shadow-lg);
-    position: relative;
-    z-index: 1;
-  }}
+  }
 
-  /* Header section with gradient */
-  .header-section {{
-    background: var(--primary-gradient);
-    color: white;
-    padding: 3rem;
-    margin: -2rem -2rem 2rem -2rem;
-    border-radius: var(--radius-lg) 0 0 0;
+  /* Virtual-scrolling trees: the page script positions the rows in view */
+  .toc-tree {
     position: relative;
-    overflow: hidden;
-  }}
+  }
 
-  .header-section::before {{
-    content: '';
+  .toc-tree > li {
     position: absolute;
-    top: 0;
     left: 0;
     right: 0;
-    bottom: 0;
-    background: url('data:image/svg+xml,<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100"><defs><pattern id="grain" width="100" height="100" patternUnits="userSpaceOnUse"><circle cx="25" cy="25" r="1" fill="rgba(255,255,255,0.1)"/><circle cx="75" cy="75" r="1" fill="rgba(255,255,255,0.1)"/><circle cx="50" cy="10" r="0.5" fill="rgba(255,255,255,0.05)"/><circle cx="10" cy="50" r="0.5" fill="rgba(255,255,255,0.05)"/><circle cx="90" cy="30" r="0.5" fill="rgba(255,255,255,0.05)"/></pattern></defs><rect width="100" height="100" fill="url(%23grain)"/></svg>');
-    opacity: 0.3;
-  }}
+    height: 30px;
+    margin: 0;
+    overflow: hidden;
+  }
 
-  .header-content {{
-    position: relative;
-    z-index: 1;
-  }}
+  .toc-tree .directory-name {
+    cursor: pointer;
+  }
 
-  .repo-title {{
-    font-size: 2rem;
-    font-weight: 700;
-    margin: 0 0 1rem 0;
-    display: flex;
-    align-items: center;
-    gap: 1rem;
-  }}
+  .skipped-file {
+    white-space: pre;
+  }
+
+  .content-results {
+    margin-top: 0.75rem;
+    font-size: 0.8rem;
+  }
+
+  .content-results-summary {
+    color: var(--text-tertiary);
+    margin-bottom: 0.5rem;
+  }
+
+  .content-hit {
+    display: block;
+    padding: 0.35rem 0.5rem;
+    border-radius: var(--radius-sm);
+    color: var(--text-secondary);
+    text-decoration: none;
+  }
+
+  .content-hit:hover {
+    background: rgba(255, 255, 255, 0.9);
+  }
+
+  .content-hit-path {
+    display: block;
+    color: var(--text-accent);
+    font-family: 'JetBrains Mono', monospace;
+    font-size: 0.75rem;
+  }
+
+  .content-hit code {
+    display: block;
+    white-space: pre;
+    overflow: hidden;
+    text-overflow: ellipsis;
+  }
+
+  .finder-overlay {
+    position: fixed;
+    inset: 0;
+    z-index: 10000;
+    display: flex;
+    justify-content: center;
+    align-items: flex-start;
+    padding-top: 12vh;
+    background: rgb(15 23 42 / 0.4);
+  }
+
+  .finder-overlay[hidden] {
+    display: none;
+  }
+
+  .finder {
+    width: min(640px, 92vw);
+    background: var(--bg-primary);
+    border-radius: var(--radius-md);
+    box-shadow: var(--shadow-xl);
+    overflow: hidden;
+  }
+
+  .finder input {
+    width: 100%;
+    padding: 0.9rem 1rem;
+    border: none;
+    border-bottom: 1px solid var(--border-light);
+    font-size: 1rem;
+    outline: none;
+  }
+
+  .finder-results {
+    list-style: none;
+    margin: 0;
+    padding: 0.25rem 0;
+    max-height: 50vh;
+    overflow-y: auto;
+  }
+
+  .finder-results li {
+    padding: 0.4rem 1rem;
+    cursor: pointer;
+    white-space: nowrap;
+    overflow: hidden;
+    text-overflow: ellipsis;
+    font-family: 'JetBrains Mono', monospace;
+    font-size: 0.85rem;
+  }
+
+  .finder-results li.active {
+    background: var(--bg-tertiary);
+  }
+
+  .finder-kind {
+    display: inline-block;
+    width: 1.2em;
+    color: var(--text-secondary);
+    font-weight: 600;
+    text-align: center;
+  }
+
+  .finder-dir,
+  .finder-status {
+    color: var(--text-tertiary);
+  }
+
+  .finder-status {
+    padding: 0.4rem 1rem;
+    border-top: 1px solid var(--border-light);
+    font-size: 0.75rem;
+  }
+
+  .content-hit mark,
+  .finder mark,
+  .toc-tree mark {
+    background: yellow;
+    padding: 0.1em;
+  }
+
+  /* Special styling for root files */
+  .toc-file[data-depth="1"] a {
+    font-weight: 500;
+  }
+
+  /* Deeper nesting gets slightly muted */
+  .toc-file[data-depth="3"] a,
+  .toc-file[data-depth="4"] a {
+    color: var(--text-tertiary);
+    font-size: 0.75rem;
+  }
+
+  .muted { 
+    color: var(--text-tertiary); 
+    font-weight: 400; 
+    font-size: 0.85em; 
+  }
+
+  main.container { 
+    padding: 2rem; 
+    background: var(--bg-primary);
+    border-radius: var(--radius-lg) 0 0 var(--radius-lg);
+    margin-left: -1rem;
+    box-shadow: var(--shadow-lg);
+    position: relative;
+    z-index: 1;
+  }
+
+  /* Header section with gradient */
+  .header-section {
+    background: var(--primary-gradient);
+    color: white;
+    padding: 3rem;
+    margin: -2rem -2rem 2rem -2rem;
+    border-radius: var(--radius-lg) 0 0 0;
+    position: relative;
+    overflow: hidden;
+  }
+
+  .header-section::before {
+    content: '';
+    position: absolute;
+    top: 0;
+    left: 0;
+    right: 0;
+    bottom: 0;
+    background: url('data:image/svg+xml,<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100"><defs><pattern id="grain" width="100" height="100" patternUnits="userSpaceOnUse"><circle cx="25" cy="25" r="1" fill="rgba(255,255,255,0.1)"/><circle cx="75" cy="75" r="1" fill="rgba(255,255,255,0.1)"/><circle cx="50" cy="10" r="0.5" fill="rgba(255,255,255,0.05)"/><circle cx="10" cy="50" r="0.5" fill="rgba(255,255,255,0.05)"/><circle cx="90" cy="30" r="0.5" fill="rgba(255,255,255,0.05)"/></pattern></defs><rect width="100" height="100" fill="url(%23grain)"/></svg>');
+    opacity: 0.3;
+  }
+
+  .header-content {
+    position: relative;
+    z-index: 1;
+  }
 
-  .repo-title::before {{
+  .repo-title {
+    font-size: 2rem;
+    font-weight: 700;
+    margin: 0 0 1rem 0;
+    display: flex;
+    align-items: center;
+    gap: 1rem;
+  }
+
+  .repo-title::before {
     content: '🚀';
     font-size: 2.5rem;
     animation: pulse 2s infinite;
-  }}
+  }
 
-  @keyframes pulse {{
-    0%, 100% {{ transform: scale(1); }}
-    50% {{ transform: scale(1.1); }}
-  }}
+  @keyframes pulse {
+    0%, 100% { transform: scale(1); }
+    50% { transform: scale(1.1); }
+  }
 
-  .meta {{
+  .meta {
     font-size: 1rem;
     opacity: 0.9;
-  }}
+  }
 
-  .meta a {{
+  .meta a {
     color: rgba(255, 255, 255, 0.9);
     text-decoration: none;
     border-bottom: 1px dotted rgba(255, 255, 255, 0.5);
     transition: all 0.2s ease;
-  }}
+  }
 
-  .meta a:hover {{
+  .meta a:hover {
     color: white;
     border-bottom-color: white;
-  }}
+  }
 
-  .counts {{
+  .counts {
     margin-top: 1rem;
     font-size: 0.95rem;
     background: rgba(255, 255, 255, 0.1);
@@ -1223,10 +1420,10 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
     padding: 1rem 1.5rem;
     border-radius: var(--radius-md);
     border: 1px solid rgba(255, 255, 255, 0.2);
-  }}
+  }
 
   /* View toggle with enhanced styling */
-  .view-toggle {{ 
+  .view-toggle { 
     margin: 2rem 0; 
     display: flex; 
     gap: 0.5rem; 
@@ -1236,15 +1433,15 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
     border-radius: var(--radius-md);
     box-shadow: var(--shadow-sm);
     border: 1px solid var(--border-light);
-  }}
+  }
 
-  .view-toggle strong {{
+  .view-toggle strong {
     margin-right: 0.5rem;
     color: var(--text-secondary);
     font-weight: 600;
-  }}
+  }
 
-  .toggle-btn {{ 
+  .toggle-btn { 
     padding: 0.75rem 1.5rem; 
     border: none; 
     background: white;
@@ -1255,9 +1452,9 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
     transition: all 0.2s ease;
     position: relative;
     overflow: hidden;
-  }}
+  }
 
-  .toggle-btn::before {{
+  .toggle-btn::before {
     content: '';
     position: absolute;
     top: 0;
@@ -1267,28 +1464,28 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
     background: var(--primary-gradient);
     opacity: 0;
     transition: opacity 0.2s ease;
-  }}
+  }
 
-  .toggle-btn span {{
+  .toggle-btn span {
     position: relative;
     z-index: 1;
-  }}
+  }
 
-  .toggle-btn.active {{ 
+  .toggle-btn.active { 
     background: var(--primary-gradient);
     color: white;
     box-shadow: var(--shadow-md);
     transform: translateY(-1px);
-  }}
+  }
 
-  .toggle-btn:hover:not(.active) {{ 
+  .toggle-btn:hover:not(.active) { 
     background: var(--bg-tertiary);
     transform: translateY(-1px);
     box-shadow: var(--shadow-sm);
-  }}
+  }
 
   /* Enhanced sections */
-  .content-section {{
+  .content-section {
     background: white;
     margin: 2rem 0;
     padding: 2rem;
@@ -1296,14 +1493,14 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
     box-shadow: var(--shadow-md);
     border: 1px solid var(--border-light);
     transition: all 0.2s ease;
-  }}
+  }
 
-  .content-section:hover {{
+  .content-section:hover {
     box-shadow: var(--shadow-lg);
     transform: translateY(-2px);
-  }}
+  }
 
-  .content-section h2 {{
+  .content-section h2 {
     margin: 0 0 1.5rem 0;
     font-size: 1.5rem;
     font-weight: 700;
@@ -1313,10 +1510,10 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
     gap: 0.75rem;
     padding-bottom: 1rem;
     border-bottom: 2px solid var(--border-light);
-  }}
+  }
 
   /* Enhanced code styling */
-  pre {{ 
+  pre { 
     background: var(--bg-code);
     color: var(--text-code);
     padding: 1.5rem; 
@@ -1327,9 +1524,9 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
     line-height: 1.5;
     box-shadow: inset 0 2px 4px rgba(0, 0, 0, 0.1);
     position: relative;
-  }}
+  }
 
-  pre::before {{
+  pre::before {
     content: '';
     position: absolute;
     top: 0;
@@ -1338,21 +1535,21 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
     height: 3px;
     background: var(--primary-gradient);
     border-radius: var(--radius-md) var(--radius-md) 0 0;
-  }}
+  }
 
-  code {{ 
+  code { 
     font-family: 'JetBrains Mono', ui-monospace, SFMono-Regular, Menlo, Monaco, Consolas, monospace;
     font-size: 0.875rem;
-  }}
+  }
 
-  .highlight {{ 
+  .highlight { 
     overflow-x: auto;
     background: var(--bg-code) !important;
     border-radius: var(--radius-md);
     position: relative;
-  }}
+  }
 
-  .highlight::before {{
+  .highlight::before {
     content: '';
     position: absolute;
     top: 0;
@@ -1361,10 +1558,11 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
     height: 3px;
     background: var(--success-gradient);
     border-radius: var(--radius-md) var(--radius-md) 0 0;
-  }}
+  }
 
-  /* File sections with enhanced styling */
-  .file-section {{ 
+  /* File sections with enhanced styling. Off-screen sections are not laid
+     out; the renderer sets their estimated height in contain-intrinsic-size. */
+  .file-section { 
     background: white;
     margin: 1.5rem 0;
     border-radius: var(--radius-lg);
@@ -1372,14 +1570,32 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
     border: 1px solid var(--border-light);
     overflow: hidden;
     transition: all 0.3s ease;
-  }}
+    content-visibility: auto;
+    contain-intrinsic-size: auto 600px;
+  }
+
+  .fade-sections .file-section {
+    transition: all 0.6s ease;
+  }
 
-  .file-section:hover {{
+  .fade-sections .file-section:not(.in-view) {
+    opacity: 0;
+    transform: translateY(30px);
+  }
+
+  @media print {
+    .fade-sections .file-section:not(.in-view) {
+      opacity: 1;
+      transform: none;
+    }
+  }
+
+  .file-section:hover {
     box-shadow: var(--shadow-xl);
     transform: translateY(-4px);
-  }}
+  }
 
-  .file-section h2 {{ 
+  .file-section h2 { 
     margin: 0;
     font-size: 1.25rem;
     font-weight: 600;
@@ -1391,17 +1607,17 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
     justify-content: flex-start;
     gap: 1rem;
     position: relative;
-  }}
+  }
 
-  .file-header-left {{
+  .file-header-left {
     display: flex;
     align-items: center;
     gap: 1rem;
     flex: 1;
-  }}
+  }
 
   /* Copy button will be positioned absolutely on the right */
-  .copy-code-btn {{
+  .copy-code-btn {
     position: absolute;
     right: 2rem;
     background: var(--primary-gradient);
@@ -1416,25 +1632,36 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
     font-family: 'Inter', sans-serif;
     font-weight: 500;
     flex-shrink: 0;
-  }}
+  }
+
+  .raw-link {
+    font-size: 0.8rem;
+    font-weight: 500;
+    color: var(--text-accent);
+    text-decoration: none;
+  }
+
+  .raw-link:hover {
+    text-decoration: underline;
+  }
 
-  .file-section h2::before {{
+  .file-section h2::before {
     content: attr(data-icon);
     font-size: 1.5rem;
-  }}
+  }
 
-  .file-body {{ 
+  .file-body { 
     padding: 2rem;
-  }}
+  }
 
-  .back-top {{ 
+  .back-top { 
     padding: 1rem 2rem;
     text-align: right;
     background: var(--bg-secondary);
     border-top: 1px solid var(--border-light);
-  }}
+  }
 
-  .back-top a {{
+  .back-top a {
     color: var(--text-accent);
     text-decoration: none;
     font-weight: 500;
@@ -1444,68 +1671,112 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
     display: inline-flex;
     align-items: center;
     gap: 0.5rem;
-  }}
+  }
 
-  .back-top a:hover {{
+  .back-top a:hover {
     background: var(--primary-gradient);
     color: white;
     transform: translateY(-2px);
     box-shadow: var(--shadow-md);
-  }}
+  }
 
   /* Enhanced skip lists */
-  .skip-section {{
+  .skip-section {
     background: linear-gradient(135deg, rgba(250, 112, 154, 0.1) 0%, rgba(254, 225, 64, 0.1) 100%);
     border: 1px solid rgba(250, 112, 154, 0.2);
     border-radius: var(--radius-lg);
     padding: 2rem;
-  }}
+  }
 
-  .skip-list {{ 
+  .skip-list { 
     list-style: none;
     padding: 0;
     margin: 0;
-  }}
+  }
 
-  .skip-list li {{
-    padding: 0.75rem 1rem;
-    margin: 0.5rem 0;
+  .skip-list li {
+    padding: 0.2rem 1rem;
     background: rgba(255, 255, 255, 0.7);
     border-radius: var(--radius-sm);
     border-left: 4px solid var(--danger-gradient);
     transition: all 0.2s ease;
-  }}
+  }
 
-  .skip-list li:hover {{
+  .skip-list li:hover {
     background: white;
     transform: translateX(4px);
     box-shadow: var(--shadow-sm);
-  }}
+  }
 
-  .skip-list code {{ 
+  .skip-list code { 
     background: rgba(15, 23, 42, 0.1);
     color: var(--text-primary);
     padding: 0.25rem 0.5rem; 
     border-radius: 4px;
     font-weight: 500;
-  }}
+  }
 
-  .error {{ 
+  .error { 
     color: #dc2626;
     background: linear-gradient(135deg, rgba(220, 38, 38, 0.1) 0%, rgba(239, 68, 68, 0.1) 100%);
     border: 1px solid rgba(220, 38, 38, 0.2);
     border-radius: var(--radius-md);
     padding: 1rem;
-  }}
+  }
+
+  .dir-sections {
+    margin-bottom: 2rem;
+  }
+
+  .dir-skeleton {
+    color: var(--text-tertiary);
+    background: var(--bg-secondary);
+    border: 1px dashed var(--border-light);
+    border-radius: var(--radius-md);
+    padding: 1rem 1.5rem;
+    font-family: 'JetBrains Mono', monospace;
+    font-size: 0.85rem;
+  }
+
+  .dir-skeleton[data-error]::after {
+    content: " · failed to load (" attr(data-error) "), follow a file link to retry";
+    color: #dc2626;
+  }
+
+  .degraded-note {
+    color: var(--text-secondary);
+    background: var(--bg-tertiary);
+    border-left: 4px solid #f59e0b;
+    border-radius: var(--radius-sm);
+    padding: 0.75rem 1rem;
+    margin-bottom: 1rem;
+    font-size: 0.85rem;
+  }
+
+  .preview-note {
+    color: var(--text-secondary);
+    background: var(--bg-tertiary);
+    border-left: 4px solid var(--text-accent);
+    border-radius: var(--radius-sm);
+    padding: 0.75rem 1rem;
+    margin-bottom: 1rem;
+    font-size: 0.85rem;
+  }
+
+  .outline-note {
+    color: var(--text-tertiary);
+    font-size: 0.85rem;
+    font-style: italic;
+  }
 
   /* Details/Summary styling */
-  details {{
+  details {
     margin: 1rem 0;
     border-radius: var(--radius-md);
     overflow: hidden;
-  }}
+  }
 
-  summary {{
+  summary {
     background: var(--bg-secondary);
     padding: 1rem 1.5rem;
     cursor: pointer;
@@ -1516,37 +1787,37 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
     display: flex;
     align-items: center;
     gap: 0.5rem;
-  }}
+  }
 
-  summary:hover {{
+  summary:hover {
     background: var(--bg-tertiary);
-  }}
+  }
 
-  summary::before {{
+  summary::before {
     content: '📂';
     font-size: 1.2rem;
-  }}
+  }
 
-  details[open] summary {{
+  details[open] summary {
     background: var(--primary-gradient);
     color: white;
     border-color: transparent;
-  }}
+  }
 
-  details[open] summary::before {{
+  details[open] summary::before {
     content: '📁';
-  }}
+  }
 
   /* Hide duplicate top TOC on wide screens */
-  .toc-top {{ display: block; }}
-  @media (min-width: 1200px) {{ .toc-top {{ display: none; }} }}
+  .toc-top { display: block; }
+  @media (min-width: 1200px) { .toc-top { display: none; } }
 
-  :target {{ scroll-margin-top: 100px; }}
+  :target { scroll-margin-top: 100px; }
 
   /* LLM view enhancements */
-  #llm-view {{ display: none; }}
+  #llm-view { display: none; }
   
-  #llm-text {{ 
+  #llm-text { 
     width: 100%; 
     height: 70vh; 
     font-family: 'JetBrains Mono', ui-monospace, SFMono-Regular, Menlo, Monaco, Consolas, monospace;
@@ -1559,9 +1830,9 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
     color: var(--text-code);
     line-height: 1.5;
     box-shadow: inset 0 2px 4px rgba(0, 0, 0, 0.1);
-  }}
+  }
 
-  .copy-hint {{ 
+  .copy-hint { 
     margin-top: 1rem; 
     color: var(--text-tertiary); 
     font-size: 0.9em;
@@ -1570,39 +1841,39 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
     background: var(--bg-tertiary);
     border-radius: var(--radius-md);
     border: 1px solid var(--border-light);
-  }}
+  }
 
   /* Responsive design */
-  @media (max-width: 1200px) {{
-    .page {{
+  @media (max-width: 1200px) {
+    .page {
       grid-template-columns: 280px minmax(0,1fr);
-    }}
+    }
     
-    .container {{
+    .container {
       padding: 0 1rem;
-    }}
+    }
     
-    main.container {{
+    main.container {
       padding: 1.5rem;
-    }}
+    }
     
-    .header-section {{
+    .header-section {
       padding: 2rem;
       margin: -1.5rem -1.5rem 1.5rem -1.5rem;
-    }}
+    }
     
-    .repo-title {{
+    .repo-title {
       font-size: 1.75rem;
-    }}
-  }}
+    }
+  }
 
-  @media (max-width: 768px) {{
-    .page {{
+  @media (max-width: 768px) {
+    .page {
       grid-template-columns: 1fr;
       gap: 0;
-    }}
+    }
     
-    #sidebar {{
+    #sidebar {
       position: fixed;
       top: 0;
       left: -100%;
@@ -1611,13 +1882,13 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
       z-index: 1000;
       transition: left 0.3s ease;
       border-right: 2px solid var(--border-light);
-    }}
+    }
     
-    #sidebar.open {{
+    #sidebar.open {
       left: 0;
-    }}
+    }
     
-    .sidebar-overlay {{
+    .sidebar-overlay {
       display: none;
       position: fixed;
       top: 0;
@@ -1627,26 +1898,16 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
       background: rgba(0, 0, 0, 0.5);
       z-index: 999;
       backdrop-filter: blur(4px);
-    }}
+    }
     
-    .sidebar-overlay.show {{
+    .sidebar-overlay.show {
       display: block;
-    }}
+    }
     
-    .mobile-nav {{
-      display: flex;
-      align-items: center;
-      justify-content: space-between;
-      padding: 1rem;
-      background: var(--bg-primary);
-      border-bottom: 1px solid var(--border-light);
-      position: sticky;
-      top: 60px; /* Account for fixed top nav */
-      z-index: 100;
-      box-shadow: var(--shadow-sm);
-    }}
-    
-    .mobile-nav-btn {{
+"""
+
+_CSS_RESPONSIVE = """    
+    .mobile-nav-btn {
       display: flex;
       align-items: center;
       gap: 0.5rem;
@@ -1659,14 +1920,14 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
       font-weight: 500;
       cursor: pointer;
       transition: all 0.2s ease;
-    }}
+    }
     
-    .mobile-nav-btn:hover {{
+    .mobile-nav-btn:hover {
       transform: translateY(-1px);
       box-shadow: var(--shadow-md);
-    }}
+    }
     
-    .mobile-nav-title {{
+    .mobile-nav-title {
       font-size: 1rem;
       font-weight: 600;
       color: var(--text-primary);
@@ -1674,268 +1935,265 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
       overflow: hidden;
       text-overflow: ellipsis;
       max-width: 60%;
-    }}
+    }
     
-    main.container {{
+    main.container {
       order: 1;
       margin-left: 0;
       border-radius: 0;
       padding: 1rem;
-    }}
+    }
     
-    .header-section {{
+    .header-section {
       border-radius: 0;
       padding: 2rem 1rem;
       margin: -1rem -1rem 1rem -1rem;
-    }}
+    }
     
-    .repo-title {{
+    .repo-title {
       font-size: 1.5rem;
       flex-direction: column;
       align-items: flex-start;
       gap: 0.5rem;
-    }}
+    }
     
-    .repo-title::before {{
+    .repo-title::before {
       font-size: 2rem;
-    }}
+    }
     
-    .meta {{
+    .meta {
       font-size: 0.9rem;
-    }}
+    }
     
-    .counts {{
+    .counts {
       font-size: 0.85rem;
       padding: 0.75rem 1rem;
-    }}
+    }
     
-    .view-toggle {{
+    .view-toggle {
       flex-wrap: wrap;
       gap: 0.25rem;
       padding: 0.25rem;
-    }}
+    }
     
-    .toggle-btn {{
+    .toggle-btn {
       padding: 0.5rem 1rem;
       font-size: 0.85rem;
-    }}
+    }
     
-    .content-section {{
+    .content-section {
       padding: 1.5rem;
       margin: 1.5rem 0;
-    }}
+    }
     
-    .content-section h2 {{
+    .content-section h2 {
       font-size: 1.25rem;
-    }}
+    }
     
-    .file-section {{
+    .file-section {
       margin: 1rem 0;
-    }}
+    }
     
-    .file-section h2 {{
+    .file-section h2 {
       font-size: 1.1rem;
       padding: 1rem 1.5rem;
-    }}
+    }
     
-    .file-body {{
+    .file-body {
       padding: 1.5rem;
-    }}
+    }
     
-    .back-top {{
+    .back-top {
       padding: 0.75rem 1.5rem;
-    }}
+    }
     
-    pre {{
+    pre {
       padding: 1rem;
       font-size: 0.8rem;
-    }}
+    }
     
-    .highlight {{
+    .highlight {
       font-size: 0.8rem;
-    }}
+    }
     
-    #llm-text {{
+    #llm-text {
       height: 60vh;
       padding: 1rem;
       font-size: 0.8rem;
-    }}
+    }
     
-    .copy-hint {{
+    .copy-hint {
       font-size: 0.85rem;
       padding: 0.75rem;
-    }}
+    }
     
     /* Hide desktop TOC on mobile */
-    .toc-top {{
+    .toc-top {
       display: none;
-    }}
-  }}
+    }
+  }
 
-  @media (max-width: 480px) {{
-    .top-nav {{
+  @media (max-width: 480px) {
+    .top-nav {
       padding: 0 16px;
-    }}
+    }
     
-    .nav-brand {{
+    .nav-brand {
       font-size: 1rem;
       gap: 8px;
-    }}
+    }
     
-    .nav-brand .brand-icon {{
+    .nav-brand .brand-icon {
       font-size: 1.3rem;
-    }}
+    }
     
-    .nav-actions {{
+    .nav-actions {
       gap: 12px;
-    }}
+    }
     
-    .nav-btn {{
+    .nav-btn {
       padding: 6px 12px;
       font-size: 0.8rem;
-    }}
+    }
     
-    .nav-btn span:last-child {{
+    .nav-btn span:last-child {
       display: none; /* Hide text labels on very small screens */
-    }}
+    }
     
-    #sidebar {{
+    #sidebar {
       width: 100%;
       left: -100%;
-    }}
+    }
     
-    .mobile-nav {{
+    .mobile-nav {
       padding: 0.75rem;
-    }}
+    }
     
-    .mobile-nav-btn {{
+    .mobile-nav-btn {
       padding: 0.5rem 0.75rem;
       font-size: 0.85rem;
-    }}
+    }
     
-    .mobile-nav-title {{
+    .mobile-nav-title {
       font-size: 0.9rem;
       max-width: 50%;
-    }}
+    }
     
-    main.container {{
+    main.container {
       padding: 0.75rem;
-    }}
+    }
     
-    .header-section {{
+    .header-section {
       padding: 1.5rem 0.75rem;
       margin: -0.75rem -0.75rem 1rem -0.75rem;
-    }}
+    }
     
-    .repo-title {{
+    .repo-title {
       font-size: 1.25rem;
-    }}
+    }
     
-    .content-section {{
+    .content-section {
       padding: 1rem;
-    }}
+    }
     
-    .file-section h2 {{
+    .file-section h2 {
       padding: 0.75rem 1rem;
       font-size: 1rem;
-    }}
+    }
     
-    .file-body {{
+    .file-body {
       padding: 1rem;
-    }}
+    }
     
-    .back-top {{
+    .back-top {
       padding: 0.5rem 1rem;
-    }}
+    }
     
-    pre {{
+    pre {
       padding: 0.75rem;
       font-size: 0.75rem;
-    }}
+    }
     
-    .highlight {{
+    .highlight {
       font-size: 0.75rem;
-    }}
+    }
     
-    #llm-text {{
+    #llm-text {
       height: 50vh;
       padding: 0.75rem;
       font-size: 0.75rem;
-    }}
-  }}
+    }
+  }
 
   /* Show mobile navigation only on mobile */
-  .mobile-nav {{
+  .mobile-nav {
     display: none;
-  }}
+  }
   
-  @media (max-width: 768px) {{
-    .mobile-nav {{
+  @media (max-width: 768px) {
+    .mobile-nav {
       display: flex;
-    }}
-  }}
+    }
+  }
 
   /* Pygments theme overrides */
-  .highlight pre {{
+  .highlight pre {
     background: var(--bg-code) !important;
     color: var(--text-code) !important;
-  }}
+  }
 
-  /* Custom pygments styling */
-  {pygments_css}
-  
   /* Export button styles */
-  .export-btn {{
+  .export-btn {
     padding: 0.75rem 1rem; background: var(--primary-gradient); color: white;
     border: none; border-radius: var(--radius-sm); font-size: 0.9rem;
     cursor: pointer; transition: all 0.2s ease;
-  }}
-  .export-btn:hover {{
+  }
+  .export-btn:hover {
     transform: translateY(-1px); box-shadow: var(--shadow-md);
-  }}
+  }
   
   /* Animation for toasts */
-  @keyframes slideIn {{
-    from {{ transform: translateX(100%); opacity: 0; }}
-    to {{ transform: translateX(0); opacity: 1; }}
-  }}
+  @keyframes slideIn {
+    from { transform: translateX(100%); opacity: 0; }
+    to { transform: translateX(0); opacity: 1; }
+  }
   
   /* Markdown content styling */
-  .markdown-content {{
+  .markdown-content {
     font-size: 1rem;
     line-height: 1.7;
-  }}
+  }
   
   .markdown-content h1, .markdown-content h2, .markdown-content h3,
-  .markdown-content h4, .markdown-content h5, .markdown-content h6 {{
+  .markdown-content h4, .markdown-content h5, .markdown-content h6 {
     margin-top: 2rem;
     margin-bottom: 1rem;
     font-weight: 700;
     line-height: 1.25;
     color: var(--text-primary);
-  }}
+  }
   
-  .markdown-content h1 {{ font-size: 2rem; border-bottom: 3px solid var(--border-light); padding-bottom: 0.5rem; }}
-  .markdown-content h2 {{ font-size: 1.75rem; border-bottom: 2px solid var(--border-light); padding-bottom: 0.5rem; }}
-  .markdown-content h3 {{ font-size: 1.5rem; }}
-  .markdown-content h4 {{ font-size: 1.25rem; }}
-  .markdown-content h5 {{ font-size: 1.125rem; }}
-  .markdown-content h6 {{ font-size: 1rem; color: var(--text-secondary); }}
+  .markdown-content h1 { font-size: 2rem; border-bottom: 3px solid var(--border-light); padding-bottom: 0.5rem; }
+  .markdown-content h2 { font-size: 1.75rem; border-bottom: 2px solid var(--border-light); padding-bottom: 0.5rem; }
+  .markdown-content h3 { font-size: 1.5rem; }
+  .markdown-content h4 { font-size: 1.25rem; }
+  .markdown-content h5 { font-size: 1.125rem; }
+  .markdown-content h6 { font-size: 1rem; color: var(--text-secondary); }
   
-  .markdown-content p {{
+  .markdown-content p {
     margin-bottom: 1.25rem;
-  }}
+  }
   
-  .markdown-content ul, .markdown-content ol {{
+  .markdown-content ul, .markdown-content ol {
     margin-bottom: 1.25rem;
     padding-left: 2rem;
-  }}
+  }
   
-  .markdown-content li {{
+  .markdown-content li {
     margin-bottom: 0.5rem;
-  }}
+  }
   
-  .markdown-content blockquote {{
+  .markdown-content blockquote {
     border-left: 4px solid var(--primary-gradient);
     padding-left: 1.5rem;
     margin: 1.5rem 0;
@@ -1944,190 +2202,783 @@ def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: L
     background: linear-gradient(135deg, rgba(102, 126, 234, 0.05) 0%, rgba(118, 75, 162, 0.05) 100%);
     padding: 1rem 1.5rem;
     border-radius: var(--radius-md);
-  }}
+  }
   
-  .markdown-content table {{
+  .markdown-content table {
     width: 100%;
     margin: 1.5rem 0;
     border-collapse: collapse;
     border-radius: var(--radius-md);
     overflow: hidden;
     box-shadow: var(--shadow-sm);
-  }}
+  }
   
-  .markdown-content th, .markdown-content td {{
+  .markdown-content th, .markdown-content td {
     padding: 1rem;
     text-align: left;
     border-bottom: 1px solid var(--border-light);
-  }}
+  }
   
-  .markdown-content th {{
+  .markdown-content th {
     background: var(--primary-gradient);
     color: white;
     font-weight: 600;
-  }}
+  }
   
-  .markdown-content tr:nth-child(even) {{
+  .markdown-content tr:nth-child(even) {
     background: var(--bg-secondary);
-  }}
+  }
   
-  .markdown-content a {{
+  .markdown-content a {
     color: var(--text-accent);
     text-decoration: none;
     border-bottom: 1px dotted var(--text-accent);
     transition: all 0.2s ease;
-  }}
+  }
   
-  .markdown-content a:hover {{
+  .markdown-content a:hover {
     color: var(--text-primary);
     border-bottom-color: var(--text-primary);
-  }}
+  }
   
-  .markdown-content img {{
+  .markdown-content img {
     max-width: 100%;
     height: auto;
     border-radius: var(--radius-md);
     box-shadow: var(--shadow-md);
     margin: 1rem 0;
-  }}
+  }
   
-  .markdown-content hr {{
+  .markdown-content hr {
     border: none;
     height: 2px;
     background: var(--primary-gradient);
     margin: 2rem 0;
     border-radius: 1px;
-  }}
-</style>
-</head>
-<body>
-<!-- Top Navigation Bar -->
-<nav class="top-nav">
-  <a href="/" class="nav-brand">
-    <span class="brand-icon">🔧</span>
-    <span>GitRender</span>
-  </a>
-  <div class="nav-actions">
-    <a href="{html.escape(repo_url)}" class="nav-btn" target="_blank" rel="noopener">
-      <span>📂</span>
-      <span>View on GitHub</span>
-    </a>
-    <a href="/" class="nav-btn primary">
-      <span>🏠</span>
-      <span>Home</span>
-    </a>
-  </div>
-</nav>
+  }
+"""
 
-<div class="bg-decoration"></div>
-<a id="top"></a>
+PAGE_CSS = "".join([
+    _CSS_BASE,
+    get_body_adjustments(),
+    get_navigation_styles(),
+    _CSS_LAYOUT,
+    get_sidebar_adjustments(),
+    _CSS_COMPONENTS,
+    get_mobile_nav_adjustments(),
+    _CSS_RESPONSIVE,
+])
+
+_PAGE_JS = """// Load timeline as performance marks and measures named page:*; open the
+// page with #perf to have it printed to the console once interactive
+function pageMark(name) {
+  if (window.performance && performance.mark) performance.mark('page:' + name);
+}
+pageMark('script');
+
+function markInteractive() {
+  pageMark('interactive');
+  if (!window.performance || !performance.measure) return;
+  performance.measure('page:time-to-interactive', undefined, 'page:interactive');
+  if (location.hash === '#perf') {
+    console.table(performance.getEntriesByType('measure').concat(performance.getEntriesByType('mark'))
+      .filter(entry => entry.name.startsWith('page:'))
+      .map(({ name, entryType, startTime, duration }) => ({ name, entryType, startTime, duration })));
+  }
+}
 
-<!-- Mobile Navigation -->
-<div class="mobile-nav">
-  <button class="mobile-nav-btn" onclick="toggleSidebar()">
-    <span>📋</span>
-    <span>Files</span>
-  </button>
-  <div class="mobile-nav-title">Repository Explorer</div>
-</div>
+// Per-section widgets (highlighting, the copy button and any registered by
+// the interactive features) are attached when a section first comes into
+// view rather than to every section at load. Sections off screen are not laid
+// out at all (content-visibility), sized by the renderer's height hint.
+const sectionWidgets = [addCopyButton];
+function registerSectionWidget(widget) {
+  sectionWidgets.push(widget);
+  document.querySelectorAll('.file-section[data-ready]').forEach(widget);
+}
 
-<!-- Sidebar Overlay for Mobile -->
-<div class="sidebar-overlay" onclick="closeSidebar()"></div>
+function prepareSection(section) {
+  if (section.dataset.ready) return;
+  section.dataset.ready = '1';
+  highlightSection(section);
+  sectionWidgets.forEach(widget => widget(section));
+}
 
-<div class="page">
-  <nav id="sidebar"><div class="sidebar-inner">
-      <h2>Contents ({len(rendered)})</h2>
-      <ul class="toc toc-sidebar">
-        <li><a href="#top">↑ Back to top</a></li>
-        {toc_html}
-      </ul>
-  </div></nav>
+// The 0 threshold catches sections taller than ten viewports
+const sectionObserver = new IntersectionObserver(entries => {
+  entries.forEach(entry => {
+    if (!entry.isIntersecting) return;
+    sectionObserver.unobserve(entry.target);
+    entry.target.classList.add('in-view');
+    prepareSection(entry.target);
+  });
+}, { threshold: [0, 0.1] });
+
+// Paged pages: each directory's sections are fetched when its placeholder
+// nears the viewport or a link to one of its files is followed
+function loadDirSections(placeholder) {
+  if (!placeholder) return Promise.resolve();
+  if (!placeholder.loading) {
+    placeholder.loading = fetch(placeholder.dataset.src).then(response => {
+      if (!response.ok) throw new Error(response.status + ' ' + response.statusText);
+      return response.text();
+    }).then(fragment => {
+      placeholder.innerHTML = fragment;
+      placeholder.style.minHeight = '';
+      placeholder.querySelectorAll('.file-section').forEach(section => sectionObserver.observe(section));
+      pageMark('sections:' + placeholder.dataset.dir);
+    }).catch(err => {
+      placeholder.loading = null;
+      const skeleton = placeholder.querySelector('.dir-skeleton');
+      if (skeleton) skeleton.dataset.error = err.message;
+    });
+  }
+  return placeholder.loading;
+}
 
-  <main class="container">
-    <div class="header-section">
-      <div class="header-content">
-        <h1 class="repo-title">Repository Explorer</h1>
-        <div class="meta">
-          <div><strong>📍 Repository:</strong> <a href="{html.escape(repo_url)}" target="_blank" rel="noopener">{html.escape(repo_url)}</a></div>
-          <div><strong>🔗 HEAD commit:</strong> <code>{html.escape(head_commit[:12])}</code></div>
-          <div class="counts">
-            <strong>📊 Statistics:</strong> {total_files} total files • {len(rendered)} rendered • {len(skipped_binary) + len(skipped_large) + len(skipped_ignored)} skipped
-          </div>
-        </div>
-      </div>
-    </div>
+function findDirSections(dir) {
+  return Array.from(document.querySelectorAll('.dir-sections')).find(el => el.dataset.dir === dir);
+}
 
-    {advanced_stats_html}
+const dirObserver = new IntersectionObserver(entries => {
+  entries.forEach(entry => {
+    if (entry.isIntersecting) {
+      dirObserver.unobserve(entry.target);
+      loadDirSections(entry.target);
+    }
+  });
+}, { rootMargin: '1000px 0px' });
+document.querySelectorAll('.dir-sections').forEach(el => dirObserver.observe(el));
+
+// dir: the directory of the linked file on paged pages, undefined otherwise
+function scrollToFile(href, dir) {
+  const target = document.querySelector(href);
+  if (target) {
+    target.scrollIntoView({ behavior: 'smooth', block: 'start' });
+  } else if (dir !== undefined) {
+    loadDirSections(findDirSections(dir)).then(() => {
+      const loaded = document.querySelector(href);
+      if (loaded) loaded.scrollIntoView({ behavior: 'smooth', block: 'start' });
+    });
+  }
+  return Boolean(target || dir !== undefined);
+}
 
-    <div class="view-toggle">
-      <strong>View Mode:</strong>
-      <button class="toggle-btn active" onclick="showHumanView(this)"><span>👤 Human Readable</span></button>
-      <button class="toggle-btn" onclick="showLLMView(this)"><span>🤖 LLM Format</span></button>
-    </div>
+// Scroll to a line of a file section, loading its directory first on paged pages
+function jumpToLine(href, dir, line) {
+  const go = () => {
+    const section = document.querySelector(href);
+    if (!section) return;
+    const pre = section.querySelector('.highlight pre, pre.plain-text');
+    if (!pre) {
+      section.scrollIntoView({ behavior: 'smooth', block: 'start' });
+      return;
+    }
+    const style = getComputedStyle(pre);
+    const lineHeight = parseFloat(style.lineHeight) || parseFloat(style.fontSize) * 1.5;
+    const top = pre.getBoundingClientRect().top + window.scrollY + parseFloat(style.paddingTop) + (line - 1) * lineHeight;
+    window.scrollTo({ top: top - window.innerHeight / 3, behavior: 'smooth' });
+  };
+  if (document.querySelector(href)) go();
+  else if (dir !== undefined) loadDirSections(findDirSections(dir)).then(go);
+}
 
-    <div id="human-view">
-      <div class="content-section">
-        <h2>🌳 Directory Structure</h2>
-        <pre>{html.escape(tree_text)}</pre>
-      </div>
+// Content search: the index is loaded into a worker by the first query.
+// Resolves to { results: [{ path, line, text }], total, ms }, or null when
+// the page has no index or the browser cannot decompress it.
+let searchWorker = null;
+let searchSeq = 0;
+const searchPending = new Map();
+function searchContent(query) {
+  const source = document.getElementById('search-index');
+  if (!source || !window.Worker || !window.DecompressionStream) return Promise.resolve(null);
+  if (!searchWorker) {
+    searchWorker = new Worker(URL.createObjectURL(new Blob([SEARCH_WORKER_SRC], { type: 'text/javascript' })));
+    searchWorker.onmessage = e => {
+      const resolve = searchPending.get(e.data.id);
+      searchPending.delete(e.data.id);
+      if (resolve) resolve(e.data);
+    };
+    // A worker started from a Blob URL cannot resolve relative URLs
+    searchWorker.postMessage({ load: source.dataset.src
+      ? { url: new URL(source.dataset.src, location.href).href }
+      : { base64: source.textContent.trim() } });
+  }
+  const id = ++searchSeq;
+  return new Promise(resolve => {
+    searchPending.set(id, resolve);
+    searchWorker.postMessage({ id, query });
+  });
+}
 
-      <div class="content-section toc-top">
-        <h2>📋 File Index ({len(rendered)} files)</h2>
-        <ul class="toc">{toc_html}</ul>
-      </div>
+// Section id of a file, as slugify() in the renderer
+function pathAnchor(path) {
+  return 'file-' + path.replace(/[^\\p{L}\\p{N}_-]/gu, '-');
+}
 
-      {export_features}
+// Table of contents and skip lists, drawn from the JSON manifest as
+// collapsible trees. Rows have a fixed height and only those near the
+// viewport exist in the DOM, so 20k-file repositories stay responsive.
+const TOC_ROW_HEIGHT = 30;
+const TOC_OVERSCAN = 20;
+const tocManifestEl = document.getElementById('toc-manifest');
+const tocManifest = tocManifestEl ? JSON.parse(tocManifestEl.textContent) : null;
+const tocTrees = [];
+// Listed files with a preview section, whose skip list rows link to it
+const tocPreviews = new Set(tocManifest ? tocManifest.previews : []);
+let tocDirPaths = null;
+let tocPathsLower = null;
+
+function escapeHTML(text) {
+  return text.replace(/[&<>"']/g, ch => ({ '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' })[ch]);
+}
 
-      <div class="content-section skip-section">
-        <h2>⚠️ Excluded Files</h2>
-        {skipped_html}
-      </div>
+// Same output as bytes_human() in the renderer
+function bytesHuman(n) {
+  const units = ['B', 'KiB', 'MiB', 'GiB', 'TiB'];
+  let i = 0;
+  while (n >= 1024 && i < units.length - 1) { n /= 1024; i++; }
+  return i === 0 ? `${Math.floor(n)} ${units[i]}` : `${n.toFixed(1)} ${units[i]}`;
+}
 
-      <div style="margin-top: 2rem;">
-        {''.join(sections)}
-      </div>
-    </div>
+function tocDirPath(dir) {
+  if (!tocDirPaths) {
+    const { dirs, names } = tocManifest;
+    tocDirPaths = [''];
+    for (let d = 1; d < dirs.length / 2; d++) {
+      const parent = tocDirPaths[dirs[2 * d]];
+      tocDirPaths.push(parent ? parent + '/' + names[dirs[2 * d + 1]] : names[dirs[2 * d + 1]]);
+    }
+  }
+  return tocDirPaths[dir];
+}
 
-    <div id="llm-view">
-      <div class="content-section">
-        <h2>🤖 LLM-Optimized View</h2>
-        <p style="margin-bottom: 1.5rem; color: var(--text-secondary); line-height: 1.6;">
-          This view presents the repository content in CXML format, optimized for Large Language Model analysis. 
-          Simply copy the content below and paste it into your preferred LLM interface.
-        </p>
-        <textarea id="llm-text" readonly>{html.escape(cxml_text)}</textarea>
-        <div class="copy-hint">
-          💡 <strong>Pro tip:</strong> Click in the text area above and use <kbd>Ctrl+A</kbd> (or <kbd>Cmd+A</kbd> on Mac) to select all content, then <kbd>Ctrl+C</kbd> (or <kbd>Cmd+C</kbd>) to copy to clipboard.
-        </div>
-      </div>
-    </div>
-  </main>
-</div>
+function tocFilePath(file) {
+  const { files, names } = tocManifest;
+  const dir = tocDirPath(files[4 * file]);
+  return dir ? dir + '/' + names[files[4 * file + 1]] : names[files[4 * file + 1]];
+}
+
+function tocFileAnchor(file) {
+  return pathAnchor(tocFilePath(file));
+}
+
+// Directory of the file a #file-... link points to, on paged pages
+function tocDirOfAnchor(hash) {
+  if (!tocManifest || !tocManifest.paged) return undefined;
+  for (let f = 0; f < tocManifest.toc; f++) {
+    if ('#' + tocFileAnchor(f) === hash) return tocDirPath(tocManifest.files[4 * f]);
+  }
+  return undefined;
+}
+
+function markMatch(name, query) {
+  const at = query ? name.toLowerCase().indexOf(query) : -1;
+  if (at < 0) return escapeHTML(name);
+  return escapeHTML(name.slice(0, at)) + '<mark>' + escapeHTML(name.slice(at, at + query.length)) +
+    '</mark>' + escapeHTML(name.slice(at + query.length));
+}
+
+class TocTree {
+  // files: manifest file indexes in display order; links: rows link to file sections
+  constructor(list, files, { links = false, collapsed = false } = {}) {
+    const { dirs, files: table } = tocManifest;
+    this.list = list;
+    this.links = links;
+    this.filter = '';
+    this.dirFiles = new Map();
+    this.childDirs = new Map();
+    const present = new Set();
+    files.forEach(f => {
+      let dir = table[4 * f];
+      if (!this.dirFiles.has(dir)) this.dirFiles.set(dir, []);
+      this.dirFiles.get(dir).push(f);
+      while (dir > 0 && !present.has(dir)) {
+        present.add(dir);
+        dir = dirs[2 * dir];
+      }
+    });
+    for (let d = 1; d < dirs.length / 2; d++) {
+      if (!present.has(d)) continue;
+      const parent = dirs[2 * d];
+      if (!this.childDirs.has(parent)) this.childDirs.set(parent, []);
+      this.childDirs.get(parent).push(d);
+    }
+    this.expanded = collapsed ? new Set() : present;
+    tocTrees.push(this);
+    list.addEventListener('click', e => this.onClick(e));
+    new ResizeObserver(() => this.render()).observe(list);
+    this.flatten();
+  }
+
+  // Rebuild the list of visible rows after a toggle or a new filter
+  flatten() {
+    const rows = [];
+    const query = this.filter;
+    const walk = (dir, depth) => {
+      let found = 0;
+      (this.childDirs.get(dir) || []).forEach(child => {
+        const at = rows.length;
+        rows.push({ dir: child, depth });
+        if (query || this.expanded.has(child)) {
+          const matches = walk(child, depth + 1);
+          if (query && !matches) rows.length = at;
+          found += matches;
+        }
+      });
+      (this.dirFiles.get(dir) || []).forEach(file => {
+        if (query && !tocPathsLower[file].includes(query)) return;
+        rows.push({ file, depth: depth + 1 });
+        found++;
+      });
+      return found;
+    };
+    this.matches = walk(0, 0);
+    this.rows = rows;
+    this.drawn = null;
+    this.list.style.height = rows.length * TOC_ROW_HEIGHT + 'px';
+    this.render();
+  }
+
+  setFilter(query) {
+    if (query) tocLowerPaths();
+    this.filter = query;
+    this.flatten();
+    return this.matches;
+  }
+
+  render() {
+    const rect = this.list.getBoundingClientRect();
+    if (!rect.width) {
+      this.drawn = null;  // hidden; drawn again by the ResizeObserver when shown
+      return;
+    }
+    const first = Math.max(0, Math.floor(-rect.top / TOC_ROW_HEIGHT) - TOC_OVERSCAN);
+    const last = Math.min(this.rows.length, Math.ceil((window.innerHeight - rect.top) / TOC_ROW_HEIGHT) + TOC_OVERSCAN);
+    if (this.drawn && this.drawn[0] === first && this.drawn[1] === last) return;
+    this.drawn = [first, last];
+    let out = '';
+    for (let r = first; r < last; r++) out += this.rowHTML(this.rows[r], r);
+    this.list.innerHTML = out;
+  }
+
+  rowHTML(row, r) {
+    const { names, icons, dirs, files, paged } = tocManifest;
+    const indent = '  '.repeat(row.depth);
+    const top = `style="top: ${r * TOC_ROW_HEIGHT}px"`;
+    if (row.dir !== undefined) {
+      const open = this.filter || this.expanded.has(row.dir);
+      return `<li class="toc-directory" data-depth="${row.depth}" ${top}><span class="directory-name" data-toggle="${row.dir}">` +
+        `${indent}${open ? '▾ 📂' : '▸ 📁'} ${escapeHTML(names[dirs[2 * row.dir + 1]])}/</span></li>`;
+    }
+    const f = row.file;
+    const name = markMatch(names[files[4 * f + 1]], this.filter);
+    const size = `<span class="muted">(${bytesHuman(files[4 * f + 2])})</span>`;
+    if (!this.links && !tocPreviews.has(f)) {
+      return `<li class="toc-file" data-depth="${row.depth}" ${top}><span class="skipped-file">${indent}<code>${name}</code> ${size}</span></li>`;
+    }
+    // Previews of listed files are always on the page; only rendered files are paged
+    const dirAttr = paged && f < tocManifest.toc ? ` data-dir="${escapeHTML(tocDirPath(files[4 * f]))}"` : '';
+    return `<li class="toc-file" data-depth="${row.depth}" ${top}><a href="#${tocFileAnchor(f)}"${dirAttr}>` +
+      `${indent}${icons[files[4 * f + 3]]} ${name} ${size}</a></li>`;
+  }
+
+  onClick(e) {
+    const toggle = e.target.closest('[data-toggle]');
+    if (toggle) {
+      const dir = Number(toggle.dataset.toggle);
+      if (this.expanded.has(dir)) this.expanded.delete(dir); else this.expanded.add(dir);
+      this.flatten();
+      return;
+    }
+    const link = e.target.closest('a[href^="#"]');
+    if (link) {
+      e.preventDefault();
+      if (scrollToFile(link.getAttribute('href'), link.dataset.dir) && window.innerWidth <= 768) {
+        closeSidebar();
+      }
+    }
+  }
+}
+
+// Filter every table of contents by path; returns the number of matching files
+function filterToc(query) {
+  let matches = 0;
+  tocTrees.filter(tree => tree.links).forEach(tree => { matches = tree.setFilter(query); });
+  return matches;
+}
+
+function initTocTrees() {
+  if (!tocManifest) return;
+  const tocFiles = Array.from({ length: tocManifest.toc }, (_, f) => f);
+  document.querySelectorAll('ul[data-toc]').forEach(list => new TocTree(list, tocFiles, { links: true }));
+  // Skip lists start collapsed to their top-level directories
+  document.querySelectorAll('.skip-lists[data-manifest]').forEach(container => {
+    const source = document.getElementById(container.dataset.manifest);
+    if (!source) return;
+    const lists = source === tocManifestEl ? tocManifest.lists : JSON.parse(source.textContent).lists;
+    lists.forEach(({ title, files }) => {
+      const details = document.createElement('details');
+      details.open = true;
+      details.innerHTML = `<summary>${escapeHTML(title)} (${files.length})</summary><ul class="toc toc-tree skip-list"></ul>`;
+      container.appendChild(details);
+      new TocTree(details.querySelector('ul'), files, { collapsed: true });
+    });
+  });
+  let pending = false;
+  const redraw = () => {
+    if (pending) return;
+    pending = true;
+    requestAnimationFrame(() => {
+      pending = false;
+      tocTrees.forEach(tree => tree.render());
+    });
+  };
+  // Capturing catches scrolling of the sidebar as well as of the page
+  document.addEventListener('scroll', redraw, true);
+  window.addEventListener('resize', redraw);
+}
+initTocTrees();
+pageMark('toc');
+
+// Ctrl/Cmd+K file finder: fuzzy matching over every rendered path, scored
+// like fzf. Paths missing a character class of the query are rejected with
+// the manifest's name masks before any scoring, and a query extending the
+// previous one only rescans the previous matches. A query starting with @
+// matches the names of functions and classes instead, and jumps to their line.
+const FINDER_MAX_RESULTS = 50;
+const SCORE_MATCH = 16;
+const SCORE_GAP_START = -3;
+const SCORE_GAP_EXTENSION = -1;
+const BONUS_SEPARATOR = 9;
+const BONUS_BOUNDARY = 8;
+const BONUS_CAMEL = 7;
+const BONUS_CONSECUTIVE = 4;
+const BONUS_FIRST_CHAR_MULTIPLIER = 2;
+let finder = null;
+
+// Same classes as char_mask() in the renderer; '/' and spaces only separate
+function charMask(text) {
+  let mask = 0;
+  for (const ch of text.toLowerCase()) {
+    const code = ch.charCodeAt(0);
+    if (code >= 97 && code <= 122) mask |= 1 << (code - 97);
+    else if (code >= 48 && code <= 57) mask |= 1 << 26;
+    else if (ch !== '/' && ch !== ' ') mask |= 1 << ({ '.': 27, '_': 28, '-': 29 }[ch] || 30);
+  }
+  return mask;
+}
+
+function tocLowerPaths() {
+  if (!tocPathsLower) {
+    tocPathsLower = [];
+    for (let f = 0; f < tocManifest.files.length / 4; f++) tocPathsLower.push(tocFilePath(f).toLowerCase());
+  }
+  return tocPathsLower;
+}
+
+function charBonus(path, i) {
+  const prev = i > 0 ? path[i - 1] : '/';
+  const ch = path[i];
+  if (prev === '/') return BONUS_SEPARATOR;
+  if (prev === '_' || prev === '-' || prev === '.' || prev === ' ') return BONUS_BOUNDARY;
+  if (prev >= 'a' && prev <= 'z' && ch >= 'A' && ch <= 'Z') return BONUS_CAMEL;
+  if (!(prev >= '0' && prev <= '9') && ch >= '0' && ch <= '9') return BONUS_CAMEL;
+  return 0;
+}
+
+// fzf's v1 algorithm: find the query as a subsequence, shorten the match
+// from its end, then score it. Returns the score, or null when path does not
+// match; matched positions are appended to `positions` if given.
+function fuzzyMatch(path, lower, query, positions) {
+  let q = 0;
+  let end = -1;
+  for (let i = 0; i < lower.length; i++) {
+    if (lower[i] === query[q] && ++q === query.length) { end = i; break; }
+  }
+  if (end < 0) return null;
+  let start = 0;
+  q = query.length - 1;
+  for (let i = end; i >= 0; i--) {
+    if (lower[i] === query[q] && --q < 0) { start = i; break; }
+  }
+  let score = 0, inGap = false, consecutive = 0, firstBonus = 0;
+  q = 0;
+  for (let i = start; i <= end; i++) {
+    if (lower[i] === query[q]) {
+      let bonus = charBonus(path, i);
+      if (consecutive === 0) {
+        firstBonus = bonus;
+      } else {
+        if (bonus >= BONUS_BOUNDARY && bonus > firstBonus) firstBonus = bonus;
+        bonus = Math.max(bonus, firstBonus, BONUS_CONSECUTIVE);
+      }
+      score += SCORE_MATCH + (q === 0 ? bonus * BONUS_FIRST_CHAR_MULTIPLIER : bonus);
+      if (positions) positions.push(i);
+      consecutive++;
+      inGap = false;
+      q++;
+    } else {
+      score += inGap ? SCORE_GAP_EXTENSION : SCORE_GAP_START;
+      inGap = true;
+      consecutive = 0;
+    }
+  }
+  return score;
+}
+
+// Best matches of a query among source.texts: { total, results: [{ item, positions }] }.
+// source.last keeps the previous query's matches, to narrow them as it grows.
+function rankMatches(source, query) {
+  const { texts, lower, masks, scores } = source;
+  const mask = charMask(query);
+  const pool = source.last && query.startsWith(source.last.query) ? source.last.matches : null;
+  const matches = [];
+  // The best FINDER_MAX_RESULTS so far, best first; cheaper than sorting every match
+  const top = [];
+  const better = (a, b) => scores[a] - scores[b] || texts[b].length - texts[a].length || b - a;
+  const consider = k => {
+    if ((masks[k] & mask) !== mask) return;
+    const score = fuzzyMatch(texts[k], lower[k], query, null);
+    if (score === null) return;
+    matches.push(k);
+    scores[k] = score;
+    if (top.length === FINDER_MAX_RESULTS && better(k, top[top.length - 1]) <= 0) return;
+    let at = top.length;
+    while (at > 0 && better(k, top[at - 1]) > 0) at--;
+    top.splice(at, 0, k);
+    if (top.length > FINDER_MAX_RESULTS) top.pop();
+  };
+  if (pool) pool.forEach(consider);
+  else for (let k = 0; k < scores.length; k++) consider(k);
+  source.last = { query, matches };
+  return {
+    total: matches.length,
+    results: top.map(item => {
+      const positions = [];
+      fuzzyMatch(texts[item], lower[item], query, positions);
+      return { item, positions };
+    })
+  };
+}
+
+// The first results of an empty query, in page order
+function firstMatches(source) {
+  source.last = null;
+  const first = Math.min(source.scores.length, FINDER_MAX_RESULTS);
+  return { total: source.scores.length, results: Array.from({ length: first }, (_, item) => ({ item, positions: [] })) };
+}
+
+// Symbols defined in the rendered files, embedded in the page when its
+// sections were highlighted on the server and fetched otherwise. Resolves to
+// a match source with the file, kind and line of each name, or null.
+let symbolsLoading = null;
+function loadSymbols() {
+  if (!symbolsLoading) {
+    const el = document.getElementById('symbol-index');
+    let loaded;
+    if (!el) {
+      loaded = Promise.resolve(null);
+    } else if (el.dataset.src) {
+      loaded = fetch(el.dataset.src).then(r => r.ok ? r.json() : null).then(data => {
+        if (!data) return null;
+        const fileOf = new Map();
+        for (let f = 0; f < tocManifest.toc; f++) fileOf.set(tocFilePath(f), f);
+        const flat = [];
+        for (const { path, kind, line, name } of data.symbols) {
+          if (fileOf.has(path)) flat.push(fileOf.get(path), kind, line, name);
+        }
+        return flat;
+      }).catch(() => null);
+    } else {
+      const { kinds, symbols } = JSON.parse(el.textContent);
+      loaded = Promise.resolve(symbols.map((value, k) => k % 4 === 1 ? kinds[value] : value));
+    }
+    symbolsLoading = loaded.then(flat => {
+      if (!flat) return null;
+      const source = { files: [], kinds: [], lines: [], texts: [], lower: [], masks: [], last: null };
+      for (let k = 0; k < flat.length; k += 4) {
+        const name = flat[k + 3];
+        source.files.push(flat[k]);
+        source.kinds.push(flat[k + 1]);
+        source.lines.push(flat[k + 2]);
+        source.texts.push(name);
+        source.lower.push(name.toLowerCase());
+        source.masks.push(charMask(name));
+      }
+      source.scores = new Int32Array(source.texts.length);
+      return source;
+    });
+  }
+  return symbolsLoading;
+}
+
+function markPositions(text, positions, offset) {
+  let out = '';
+  let p = 0;
+  for (let i = 0; i < text.length; i++) {
+    while (p < positions.length && positions[p] < offset + i) p++;
+    out += positions[p] === offset + i ? '<mark>' + escapeHTML(text[i]) + '</mark>' : escapeHTML(text[i]);
+  }
+  return out;
+}
+
+function createFinder() {
+  const { dirs, files, names, masks, icons } = tocManifest;
+  // Mask of each directory path, then of each file path
+  const dirMasks = [0];
+  for (let d = 1; d < dirs.length / 2; d++) dirMasks.push(dirMasks[dirs[2 * d]] | masks[dirs[2 * d + 1]]);
+  const paths = { texts: [], lower: tocLowerPaths(), masks: [], scores: new Int32Array(tocManifest.toc), last: null };
+  for (let f = 0; f < tocManifest.toc; f++) {
+    paths.masks.push(dirMasks[files[4 * f]] | masks[files[4 * f + 1]]);
+    paths.texts.push(tocFilePath(f));
+  }
+  const state = { paths, symbols: null, results: [], active: 0 };
+
+  const overlay = document.createElement('div');
+  overlay.className = 'finder-overlay';
+  overlay.hidden = true;
+  overlay.innerHTML = '<div class="finder" role="dialog" aria-label="Go to file">' +
+    '<input type="text" placeholder="Go to file... (@ for symbols)" autocomplete="off" spellcheck="false" aria-label="File path">' +
+    '<ul class="finder-results" role="listbox"></ul><div class="finder-status"></div></div>';
+  document.body.appendChild(overlay);
+  state.overlay = overlay;
+  state.input = overlay.querySelector('input');
+  state.list = overlay.querySelector('.finder-results');
+  state.status = overlay.querySelector('.finder-status');
+
+  const row = (k, html) => `<li role="option" data-index="${k}"${k === 0 ? ' class="active" aria-selected="true"' : ''}>${html}</li>`;
+  state.draw = () => {
+    const started = performance.now();
+    const value = state.input.value;
+    const symbolMode = value.startsWith('@');
+    const query = (symbolMode ? value.slice(1) : value).toLowerCase().replace(/\\s+/g, '');
+    let source = state.paths;
+    if (symbolMode) {
+      if (!state.symbols) {
+        state.list.innerHTML = '';
+        state.results = [];
+        state.status.textContent = 'Loading symbols...';
+        loadSymbols().then(symbols => {
+          state.symbols = symbols || { texts: [], lower: [], masks: [], scores: new Int32Array(0), last: null };
+          if (state.input.value.startsWith('@')) state.draw();
+        });
+        return;
+      }
+      source = state.symbols;
+    }
+    const found = query ? rankMatches(source, query) : firstMatches(source);
+    state.results = found.results.map(({ item }) => symbolMode
+      ? { file: source.files[item], line: source.lines[item] }
+      : { file: item });
+    state.active = 0;
+    state.list.innerHTML = found.results.map(({ item, positions }, k) => {
+      if (symbolMode) {
+        const kind = source.kinds[item];
+        return row(k, `<span class="finder-kind" title="${kind}">${kind === 'class' ? 'C' : 'ƒ'}</span> ` +
+          `<span class="finder-name">${markPositions(source.texts[item], positions, 0)}</span> ` +
+          `<span class="finder-dir">${escapeHTML(paths.texts[source.files[item]])}:${source.lines[item]}</span>`);
+      }
+      const path = paths.texts[item];
+      const slash = path.lastIndexOf('/') + 1;
+      return row(k, `${icons[files[4 * item + 3]]} <span class="finder-name">${markPositions(path.slice(slash), positions, slash)}</span>` +
+        (slash ? ` <span class="finder-dir">${markPositions(path.slice(0, slash - 1), positions, 0)}</span>` : ''));
+    }).join('');
+    const total = symbolMode ? `${source.texts.length} symbols` : `${tocManifest.toc} files`;
+    state.status.textContent = `${found.total} of ${total} · ${Math.round(performance.now() - started)} ms`;
+  };
+  state.move = step => {
+    const rows = state.list.children;
+    if (!rows.length) return;
+    rows[state.active].classList.remove('active');
+    rows[state.active].removeAttribute('aria-selected');
+    state.active = (state.active + step + rows.length) % rows.length;
+    rows[state.active].classList.add('active');
+    rows[state.active].setAttribute('aria-selected', 'true');
+    rows[state.active].scrollIntoView({ block: 'nearest' });
+  };
+  state.choose = k => {
+    const result = state.results[k];
+    if (!result) return;
+    closeFinder();
+    const file = result.file;
+    const humanView = document.getElementById('human-view');
+    if (humanView && humanView.style.display === 'none') showHumanView();
+    const dir = tocManifest.paged ? tocDirPath(files[4 * file]) : undefined;
+    if (result.line) jumpToLine('#' + tocFileAnchor(file), dir, result.line);
+    else scrollToFile('#' + tocFileAnchor(file), dir);
+  };
+
+  // Keystrokes arriving within one frame are searched once
+  state.queued = false;
+  state.input.addEventListener('input', () => {
+    if (state.queued) return;
+    state.queued = true;
+    requestAnimationFrame(() => {
+      if (!state.queued) return;
+      state.queued = false;
+      state.draw();
+    });
+  });
+  state.input.addEventListener('keydown', e => {
+    if (state.queued) {
+      state.queued = false;
+      state.draw();
+    }
+    if (e.key === 'ArrowDown' || e.key === 'ArrowUp') {
+      e.preventDefault();
+      state.move(e.key === 'ArrowDown' ? 1 : -1);
+    } else if (e.key === 'Enter') {
+      e.preventDefault();
+      state.choose(state.active);
+    } else if (e.key === 'Escape') {
+      closeFinder();
+    }
+  });
+  state.list.addEventListener('click', e => {
+    const row = e.target.closest('li[data-index]');
+    if (row) state.choose(Number(row.dataset.index));
+  });
+  overlay.addEventListener('click', e => { if (e.target === overlay) closeFinder(); });
+  return state;
+}
+
+function openFinder() {
+  if (!tocManifest) return;
+  if (!finder) finder = createFinder();
+  finder.overlay.hidden = false;
+  finder.input.select();
+  finder.input.focus();
+  finder.draw();
+}
+
+function closeFinder() {
+  if (finder) finder.overlay.hidden = true;
+}
 
-<script>
 // Mobile sidebar functionality
-function toggleSidebar() {{
+function toggleSidebar() {
   const sidebar = document.getElementById('sidebar');
   const overlay = document.querySelector('.sidebar-overlay');
   
-  if (sidebar && overlay) {{
+  if (sidebar && overlay) {
     sidebar.classList.toggle('open');
     overlay.classList.toggle('show');
-  }}
-}}
+  }
+}
 
-function closeSidebar() {{
+function closeSidebar() {
   const sidebar = document.getElementById('sidebar');
   const overlay = document.querySelector('.sidebar-overlay');
   
-  if (sidebar && overlay) {{
+  if (sidebar && overlay) {
     sidebar.classList.remove('open');
     overlay.classList.remove('show');
-  }}
-}}
+  }
+}
 
 // Enhanced view switching with smooth transitions
-function showHumanView(buttonElement) {{
+function showHumanView(buttonElement) {
   const humanView = document.getElementById('human-view');
   const llmView = document.getElementById('llm-view');
   const toggleBtns = document.querySelectorAll('.toggle-btn');
@@ -2136,32 +2987,52 @@ function showHumanView(buttonElement) {{
   
   // Update button states first
   toggleBtns.forEach(btn => btn.classList.remove('active'));
-  if (buttonElement) {{
+  if (buttonElement) {
     buttonElement.classList.add('active');
-  }} else {{
+  } else {
     document.querySelector('.toggle-btn:first-of-type').classList.add('active');
-  }}
+  }
   
   // Fade out current view
   llmView.style.opacity = '0';
   llmView.style.transform = 'translateY(20px)';
   
-  setTimeout(() => {{
+  setTimeout(() => {
     llmView.style.display = 'none';
     humanView.style.display = 'block';
     humanView.style.opacity = '0';
     humanView.style.transform = 'translateY(20px)';
     
     // Fade in new view
-    requestAnimationFrame(() => {{
+    requestAnimationFrame(() => {
       humanView.style.transition = 'all 0.3s ease';
       humanView.style.opacity = '1';
       humanView.style.transform = 'translateY(0)';
-    }});
-  }}, 150);
-}}
+    });
+  }, 150);
+}
+
+// Served pages do not embed the LLM view; fetch it the first time it is shown
+let llmTextLoader = null;
+function loadLLMText() {
+  const textArea = document.getElementById('llm-text');
+  if (!textArea || !textArea.dataset.src) return Promise.resolve();
+  if (!llmTextLoader) {
+    textArea.value = 'Loading…';
+    llmTextLoader = fetch(textArea.dataset.src).then(response => {
+      if (!response.ok) throw new Error(response.status + ' ' + response.statusText);
+      return response.text();
+    }).then(text => {
+      textArea.value = text;
+    }).catch(err => {
+      llmTextLoader = null;
+      textArea.value = 'Failed to load the LLM view (' + err.message + '). Switch views to retry.';
+    });
+  }
+  return llmTextLoader;
+}
 
-function showLLMView(buttonElement) {{
+function showLLMView(buttonElement) {
   const humanView = document.getElementById('human-view');
   const llmView = document.getElementById('llm-view');
   const toggleBtns = document.querySelectorAll('.toggle-btn');
@@ -2170,206 +3041,960 @@ function showLLMView(buttonElement) {{
   
   // Update button states first
   toggleBtns.forEach(btn => btn.classList.remove('active'));
-  if (buttonElement) {{
+  if (buttonElement) {
     buttonElement.classList.add('active');
-  }} else {{
+  } else {
     document.querySelector('.toggle-btn:last-of-type').classList.add('active');
-  }}
+  }
   
   // Fade out current view
   humanView.style.opacity = '0';
   humanView.style.transform = 'translateY(20px)';
   
-  setTimeout(() => {{
+  setTimeout(() => {
     humanView.style.display = 'none';
     llmView.style.display = 'block';
     llmView.style.opacity = '0';
     llmView.style.transform = 'translateY(20px)';
     
     // Fade in new view
-    requestAnimationFrame(() => {{
+    requestAnimationFrame(() => {
       llmView.style.transition = 'all 0.3s ease';
       llmView.style.opacity = '1';
       llmView.style.transform = 'translateY(0)';
-    }});
+    });
     
     // Auto-select all text when switching to LLM view for easy copying
-    setTimeout(() => {{
+    const shown = new Promise(resolve => setTimeout(resolve, 300));
+    Promise.all([loadLLMText(), shown]).then(() => {
       const textArea = document.getElementById('llm-text');
-      if (textArea) {{
+      if (textArea) {
         textArea.focus();
         textArea.select();
-      }}
-    }}, 300);
-  }}, 150);
-}}
-
-// Smooth scrolling for anchor links
-document.addEventListener('DOMContentLoaded', function() {{
-  // Add smooth scrolling to all anchor links
-  document.querySelectorAll('a[href^="#"]').forEach(anchor => {{
-    anchor.addEventListener('click', function (e) {{
-      e.preventDefault();
-      const target = document.querySelector(this.getAttribute('href'));
-      if (target) {{
-        target.scrollIntoView({{
-          behavior: 'smooth',
-          block: 'start'
-        }});
-        
-        // Close sidebar on mobile after navigation
-        if (window.innerWidth <= 768) {{
-          closeSidebar();
-        }}
-      }}
-    }});
-  }});
+      }
+    });
+  }, 150);
+}
+
+// Client-side highlighting: load highlight.js on first use and highlight
+// each lazy section as it scrolls into view
+let hljsLoader = null;
+function loadHighlighter() {
+  if (!hljsLoader) {
+    hljsLoader = new Promise((resolve, reject) => {
+      const script = document.createElement('script');
+      script.src = HLJS_SRC;
+      script.onload = () => {
+        window.hljs.configure({ ignoreUnescapedHTML: true });
+        resolve(window.hljs);
+      };
+      script.onerror = reject;
+      document.head.appendChild(script);
+    });
+  }
+  return hljsLoader;
+}
+
+function highlightSection(section) {
+  const blocks = section.querySelectorAll('code.lazy-code:not([data-queued])');
+  if (!blocks.length) return;
+  blocks.forEach(block => { block.dataset.queued = '1'; });
+  loadHighlighter().then(hljs => {
+    blocks.forEach(block => {
+      if (!hljs.getLanguage(block.dataset.lang)) {
+        block.classList.replace('language-' + block.dataset.lang, 'language-plaintext');
+      }
+      hljs.highlightElement(block);
+    });
+  }).catch(() => {
+    // Offline or blocked CDN: the escaped source stays readable as plain text
+  });
+}
+
+// Smooth scrolling for anchor links, with one listener for every link
+document.addEventListener('click', function(e) {
+  const anchor = e.target.closest('a[href^="#"]');
+  // Table of contents and search result links have their own handlers
+  if (!anchor || e.defaultPrevented || anchor.closest('.toc-tree')) return;
+  e.preventDefault();
+  if (scrollToFile(anchor.getAttribute('href'), anchor.dataset.dir)) {
+    // Close sidebar on mobile after navigation
+    if (window.innerWidth <= 768) {
+      closeSidebar();
+    }
+  }
+});
+
+document.addEventListener('DOMContentLoaded', function() {
+  pageMark('dom-content-loaded');
+  
+  // Line counts, rendered after the sections that counted them
+  const lineStats = document.getElementById('line-stats-template');
+  const lineStatsCard = document.getElementById('line-stats');
+  if (lineStats && lineStatsCard) lineStatsCard.replaceChildren(lineStats.content);
+  
+  // A link to a file of a not yet loaded directory (paged pages)
+  if (location.hash.startsWith('#file-') && !document.getElementById(location.hash.slice(1))) {
+    scrollToFile(location.hash, tocDirOfAnchor(location.hash));
+  }
   
   // Add loading animation
   document.body.style.opacity = '0';
-  requestAnimationFrame(() => {{
+  requestAnimationFrame(() => {
     document.body.style.transition = 'opacity 0.5s ease';
     document.body.style.opacity = '1';
-  }});
-  
-  // Add intersection observer for fade-in animations
-  const observer = new IntersectionObserver((entries) => {{
-    entries.forEach(entry => {{
-      if (entry.isIntersecting) {{
-        entry.target.style.opacity = '1';
-        entry.target.style.transform = 'translateY(0)';
-      }}
-    }});
-  }}, {{ threshold: 0.1 }});
+  });
   
-  // Observe file sections for fade-in effect
-  document.querySelectorAll('.file-section').forEach(section => {{
-    section.style.opacity = '0';
-    section.style.transform = 'translateY(30px)';
-    section.style.transition = 'all 0.6s ease';
-    observer.observe(section);
-  }});
+  // Sections fade in, and get their widgets, as they come into view
+  document.documentElement.classList.add('fade-sections');
+  document.querySelectorAll('.file-section').forEach(section => sectionObserver.observe(section));
   
   // Close sidebar when clicking outside on mobile
-  document.addEventListener('click', function(e) {{
-    if (window.innerWidth <= 768) {{
+  document.addEventListener('click', function(e) {
+    if (window.innerWidth <= 768) {
       const sidebar = document.getElementById('sidebar');
       const mobileNavBtn = document.querySelector('.mobile-nav-btn');
       
       if (sidebar && sidebar.classList.contains('open') && 
           !sidebar.contains(e.target) && 
-          !mobileNavBtn.contains(e.target)) {{
+          !mobileNavBtn.contains(e.target)) {
         closeSidebar();
-      }}
-    }}
-  }});
+      }
+    }
+  });
   
   // Handle window resize
-  window.addEventListener('resize', function() {{
-    if (window.innerWidth > 768) {{
+  window.addEventListener('resize', function() {
+    if (window.innerWidth > 768) {
       closeSidebar();
-    }}
-  }});
+    }
+  });
   
-  // Add copy to clipboard functionality for code blocks
-  document.querySelectorAll('.file-section').forEach(fileSection => {{
-    const codeBlock = fileSection.querySelector('.highlight');
-    if (!codeBlock) return;
-    
-    // Check if copy button already exists
-    if (fileSection.querySelector('.copy-code-btn')) return;
-    
-    const copyBtn = document.createElement('button');
-    copyBtn.textContent = '📋 Copy';
-    copyBtn.className = 'copy-code-btn';
+  // After the other DOMContentLoaded handlers, which the interactive features add
+  setTimeout(markInteractive, 0);
+});
+
+// Copy to clipboard button for a file section's code
+function addCopyButton(fileSection) {
+  const codeBlock = fileSection.querySelector('.highlight');
+  if (!codeBlock) return;
+  
+  // Check if copy button already exists
+  if (fileSection.querySelector('.copy-code-btn')) return;
+  
+  const copyBtn = document.createElement('button');
+  copyBtn.textContent = '📋 Copy';
+  copyBtn.className = 'copy-code-btn';
+  
+  const header = fileSection.querySelector('h2');
+  if (header && codeBlock) {
+    header.appendChild(copyBtn);
     
-    const header = fileSection.querySelector('h2');
-    if (header && codeBlock) {{
-      header.appendChild(copyBtn);
+    copyBtn.addEventListener('click', (e) => {
+      e.preventDefault();
+      e.stopPropagation();
+      const code = codeBlock.textContent || '';
       
-      copyBtn.addEventListener('click', (e) => {{
-        e.preventDefault();
-        e.stopPropagation();
-        const code = codeBlock.textContent || '';
-        
-        if (navigator.clipboard && navigator.clipboard.writeText) {{
-          navigator.clipboard.writeText(code).then(() => {{
-            copyBtn.textContent = '✅ Copied!';
-            copyBtn.style.background = 'var(--success-gradient)';
-            setTimeout(() => {{
-              copyBtn.textContent = '📋 Copy';
-              copyBtn.style.background = 'var(--primary-gradient)';
-            }}, 2000);
-          }}).catch(() => {{
-            // Fallback for clipboard API failure
-            fallbackCopy(code, copyBtn);
-          }});
-        }} else {{
-          // Fallback for browsers without clipboard API
+      if (navigator.clipboard && navigator.clipboard.writeText) {
+        navigator.clipboard.writeText(code).then(() => {
+          copyBtn.textContent = '✅ Copied!';
+          copyBtn.style.background = 'var(--success-gradient)';
+          setTimeout(() => {
+            copyBtn.textContent = '📋 Copy';
+            copyBtn.style.background = 'var(--primary-gradient)';
+          }, 2000);
+        }).catch(() => {
+          // Fallback for clipboard API failure
           fallbackCopy(code, copyBtn);
-        }}
-      }});
-    }}
-  }});
+        });
+      } else {
+        // Fallback for browsers without clipboard API
+        fallbackCopy(code, copyBtn);
+      }
+    });
+  }
+}
+
+// Fallback copy function
+function fallbackCopy(text, button) {
+  const textArea = document.createElement('textarea');
+  textArea.value = text;
+  textArea.style.position = 'fixed';
+  textArea.style.left = '-999999px';
+  textArea.style.top = '-999999px';
+  document.body.appendChild(textArea);
+  textArea.focus();
+  textArea.select();
   
-  // Fallback copy function
-  function fallbackCopy(text, button) {{
-    const textArea = document.createElement('textarea');
-    textArea.value = text;
-    textArea.style.position = 'fixed';
-    textArea.style.left = '-999999px';
-    textArea.style.top = '-999999px';
-    document.body.appendChild(textArea);
-    textArea.focus();
-    textArea.select();
-    
-    try {{
-      document.execCommand('copy');
-      button.textContent = '✅ Copied!';
-      button.style.background = 'var(--success-gradient)';
-    }} catch (err) {{
-      button.textContent = '❌ Failed';
-      button.style.background = 'var(--danger-gradient)';
-    }}
-    
-    document.body.removeChild(textArea);
-    setTimeout(() => {{
-      button.textContent = '📋 Copy';
-      button.style.background = 'var(--primary-gradient)';
-    }}, 2000);
-  }}
-}});
+  try {
+    document.execCommand('copy');
+    button.textContent = '✅ Copied!';
+    button.style.background = 'var(--success-gradient)';
+  } catch (err) {
+    button.textContent = '❌ Failed';
+    button.style.background = 'var(--danger-gradient)';
+  }
+  
+  document.body.removeChild(textArea);
+  setTimeout(() => {
+    button.textContent = '📋 Copy';
+    button.style.background = 'var(--primary-gradient)';
+  }, 2000);
+}
 
 // Add keyboard shortcuts
-document.addEventListener('keydown', function(e) {{
+document.addEventListener('keydown', function(e) {
   // Alt + 1 for Human view
-  if (e.altKey && e.key === '1') {{
+  if (e.altKey && e.key === '1') {
     e.preventDefault();
     const btn = document.querySelector('.toggle-btn:first-of-type');
     if (btn) showHumanView(btn);
-  }}
+  }
   
   // Alt + 2 for LLM view
-  if (e.altKey && e.key === '2') {{
+  if (e.altKey && e.key === '2') {
     e.preventDefault();
     const btn = document.querySelector('.toggle-btn:last-of-type');
     if (btn) showLLMView(btn);
-  }}
+  }
   
-  // Ctrl/Cmd + K to focus search (if we add it later)
-  if ((e.ctrlKey || e.metaKey) && e.key === 'k') {{
+  // Ctrl/Cmd + K for the file finder
+  if ((e.ctrlKey || e.metaKey) && e.key === 'k') {
     e.preventDefault();
-    // Focus search functionality could be added here
-  }}
-}});
-</script>
-
-{interactive_features}
-</body>
-</html>
+    if (finder && !finder.overlay.hidden) closeFinder(); else openFinder();
+  }
+});
+"""
+
+# Content search worker, started from a Blob URL so it also works in pages
+# opened from disk. It loads the gzipped trigram index (core.search_index)
+# once and answers queries with one result per matching line.
+_SEARCH_WORKER_JS = r"""
+const MAX_RESULTS = 200;
+let loading = null;
+let index = null;
+
+async function load(source) {
+  let bytes;
+  if (source.url) {
+    const response = await fetch(source.url);
+    if (!response.ok) throw new Error(response.status + ' ' + response.statusText);
+    bytes = await response.arrayBuffer();
+  } else {
+    bytes = Uint8Array.from(atob(source.base64), ch => ch.charCodeAt(0));
+  }
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+  const data = JSON.parse(await new Response(stream).text());
+  index = { ...data, lower: [], lines: [], lineStarts: [], decoded: new Map() };
+}
+
+// Posting lists are delta-encoded; decode each one the first time it is used
+function postings(gram) {
+  let ids = index.decoded.get(gram);
+  if (!ids) {
+    const deltas = index.trigrams[gram] || [];
+    ids = new Int32Array(deltas.length);
+    let id = 0;
+    deltas.forEach((delta, k) => { id += delta; ids[k] = id; });
+    index.decoded.set(gram, ids);
+  }
+  return ids;
+}
+
+function intersect(a, b) {
+  const out = [];
+  for (let i = 0, j = 0; i < a.length && j < b.length;) {
+    if (a[i] < b[j]) i++;
+    else if (a[i] > b[j]) j++;
+    else { out.push(a[i]); i++; j++; }
+  }
+  return out;
+}
+
+function candidates(query) {
+  const all = () => index.paths.map((_, f) => f);
+  // The index counts code points and UTF-16 slicing would not match it
+  if (/[\uD800-\uDFFF]/.test(query)) return all();
+  const grams = new Set();
+  query.split('\n').forEach(line => {
+    for (let k = 0; k + 3 <= line.length; k++) grams.add(line.slice(k, k + 3));
+  });
+  if (!grams.size) return all();
+  const lists = Array.from(grams, postings).sort((a, b) => a.length - b.length);
+  return lists.slice(1).reduce((found, ids) => intersect(found, ids), Array.from(lists[0]));
+}
+
+function lineStarts(f) {
+  if (!index.lineStarts[f]) {
+    const text = index.lower[f];
+    const starts = [0];
+    for (let at = text.indexOf('\n'); at !== -1; at = text.indexOf('\n', at + 1)) starts.push(at + 1);
+    index.lineStarts[f] = starts;
+  }
+  return index.lineStarts[f];
+}
+
+function lineOf(starts, at) {
+  let lo = 0, hi = starts.length - 1;
+  while (lo < hi) {
+    const mid = (lo + hi + 1) >> 1;
+    if (starts[mid] <= at) lo = mid; else hi = mid - 1;
+  }
+  return lo;
+}
+
+function search(query) {
+  const q = query.toLowerCase();
+  const results = [];
+  let total = 0;
+  for (const f of candidates(q)) {
+    if (index.lower[f] === undefined) index.lower[f] = index.texts[f].toLowerCase();
+    const text = index.lower[f];
+    let at = text.indexOf(q);
+    while (at !== -1) {
+      total++;
+      const starts = lineStarts(f);
+      const line = lineOf(starts, at);
+      if (results.length < MAX_RESULTS) {
+        if (!index.lines[f]) index.lines[f] = index.texts[f].split('\n');
+        results.push({ path: index.paths[f], line: line + 1, text: index.lines[f][line].slice(0, 300) });
+      }
+      // One result per line: continue after the end of this one
+      const next = line + 1 < starts.length ? starts[line + 1] : text.length;
+      at = text.indexOf(q, next);
+    }
+  }
+  return { results, total, truncated: index.truncated };
+}
+
+onmessage = async (e) => {
+  if (e.data.load) {
+    loading = load(e.data.load);
+    return;
+  }
+  const start = performance.now();
+  try {
+    await loading;
+    postMessage({ id: e.data.id, ...search(e.data.query), ms: performance.now() - start });
+  } catch (err) {
+    postMessage({ id: e.data.id, error: err.message });
+  }
+};
+"""
+
+_PAGE_JS_CONSTANTS = f"const HLJS_SRC = {json.dumps(HLJS_SRC)};\nconst SEARCH_WORKER_SRC = {json.dumps(_SEARCH_WORKER_JS)};\n"
+PAGE_SCRIPT = f"<script>\n{_PAGE_JS_CONSTANTS}{_PAGE_JS}</script>\n"
+
+_FONT_LINKS = """<link rel="preconnect" href="https://fonts.googleapis.com">
+<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
+<link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&family=JetBrains+Mono:wght@300;400;500&display=swap" rel="stylesheet">
+"""
+
+_PWA_FEATURES = add_pwa_features()
+_EXPORT_FEATURES = add_export_features()
+_INTERACTIVE_FEATURES = add_interactive_features()
+HLJS_THEME_CSS = highlightjs_theme_css(CompactHtmlFormatter())
+
+PAGE_HEAD_START = (
+    '<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8" />\n'
+    '<meta name="viewport" content="width=device-width, initial-scale=1" />\n'
+)
+PAGE_HEAD_STATIC = "".join([_PWA_FEATURES, "\n", _FONT_LINKS, "<style>\n", PAGE_CSS, "</style>\n"])
+PAGE_TAIL = "".join([PAGE_SCRIPT, "\n", _INTERACTIVE_FEATURES, "\n</body>\n</html>\n"])
+
+# The same shell as fingerprinted files, for pages that link rather than inline it
+PAGE_CSS_ASSET = make_asset("page", ".css", PAGE_CSS + "\n" + CompactHtmlFormatter().base_style_defs('.highlight') + "\n")
+HLJS_THEME_ASSET = make_asset("hljs-theme", ".css", HLJS_THEME_CSS + "\n")
+PAGE_JS_ASSET = make_asset("page", ".js", _PAGE_JS_CONSTANTS + _PAGE_JS)
+# add_interactive_features() returns a whole <script> element; keep only its body
+INTERACTIVE_JS_ASSET = make_asset(
+    "interactive", ".js", _INTERACTIVE_FEATURES.strip()[len("<script>"):-len("</script>")].strip() + "\n"
+)
+STATIC_ASSETS = asset_registry([PAGE_CSS_ASSET, HLJS_THEME_ASSET, PAGE_JS_ASSET, INTERACTIVE_JS_ASSET])
+
+
+def directory_of(rel: str) -> str:
+    """Directory part of a repo-relative path ('' for the repository root)."""
+    return rel.rsplit("/", 1)[0] if "/" in rel else ""
+
+
+def group_by_directory(files: List[FileInfo]) -> Dict[str, List[FileInfo]]:
+    """Files grouped by their directory, in first-seen order."""
+    groups: Dict[str, List[FileInfo]] = {}
+    for i in files:
+        groups.setdefault(directory_of(i.rel), []).append(i)
+    return groups
+
+
+def section_height(text: Optional[str], markdown: bool = False) -> int:
+    """
+    Estimated rendered height of a file section in px, from its line count;
+    off-screen sections take this much room without being laid out.
+    """
+    if text is None:
+        return SECTION_CHROME_PX
+    lines = text.count("\n") + 1
+    return SECTION_CHROME_PX + lines * (MARKDOWN_LINE_PX if markdown else CODE_LINE_PX)
+
+
+def placeholder_height(files: List[FileInfo]) -> int:
+    """Rough rendered height in px, so that far-off placeholders are not all in view at once."""
+    lines = sum(i.size for i in files) // 40
+    return min(120 * len(files) + 19 * lines, 50000)
+
+
+_MASK_SYMBOLS = {".": 27, "_": 28, "-": 29}
+
+
+def toc_sort_key(rel: str) -> tuple:
+    """Table of contents order: in each directory, subdirectories first, then files, each by name."""
+    parts = rel.split("/")
+    return tuple((0, part) for part in parts[:-1]) + ((1, parts[-1].lower()),)
+
+
+def toc_manifest(rendered: List[FileInfo], lists: List[Tuple[str, List[FileInfo]]],
+                 paged: bool = False, previews: List[FileInfo] = ()) -> Tuple[dict, Dict[str, int]]:
+    """
+    The table of contents and skip lists as compact JSON for the page script,
+    which draws them as collapsible trees keeping only the rows in view in the DOM.
+
+    Path segments and icons are stored once, in `names` and `icons`. `dirs` is
+    a flat run of (parent, name) pairs, parents first, with directory 0 the
+    repository root. `files` is a flat run of (dir, name, size, icon), the
+    first `toc` of them the rendered files in TOC order, then any listed-only
+    files. Each of `lists` is a title and file indexes. `masks` holds the
+    char_mask() of each name, for the file finder. `previews` are the indexes
+    of listed files that have a preview section, whose rows link to it.
+
+    Also returns the file index of every path, for lists made later (see toc_lists).
+    """
+    listed = [i for _, items in lists for i in items]
+    names: Dict[str, int] = {}
+    icons: Dict[str, int] = {}
+    dir_ids: Dict[str, int] = {"": 0}
+    dirs = [-1, -1]
+    for path in sorted({directory_of(i.rel) for i in rendered + listed} - {""}, key=lambda d: d.split("/")):
+        parts = path.split("/")
+        for depth in range(1, len(parts) + 1):
+            sub = "/".join(parts[:depth])
+            if sub not in dir_ids:
+                dir_ids[sub] = len(dir_ids)
+                dirs += [dir_ids["/".join(parts[:depth - 1])], names.setdefault(parts[depth - 1], len(names))]
+
+    files: List[int] = []
+    index: Dict[str, int] = {}
+    for i in sorted(rendered, key=lambda i: toc_sort_key(i.rel)) + sorted(listed, key=lambda i: toc_sort_key(i.rel)):
+        if i.rel in index:
+            continue
+        index[i.rel] = len(index)
+        files += [dir_ids[directory_of(i.rel)], names.setdefault(i.path.name, len(names)), i.size,
+                  icons.setdefault(i.kind.icon, len(icons))]
+
+    manifest = {
+        "names": list(names),
+        "icons": list(icons),
+        "dirs": dirs,
+        "files": files,
+        "toc": len(rendered),
+        "paged": paged,
+        "lists": toc_lists(lists, index),
+        "masks": [char_mask(name) for name in names],
+        "previews": sorted(index[i.rel] for i in previews),
+    }
+    return manifest, index
+
+
+def char_mask(text: str) -> int:
+    """
+    Bit set of the character classes in lower-cased text: one bit per letter,
+    then digits, '.', '_', '-' and anything else. A path can only fuzzy-match
+    a query whose mask is a subset of its own, so the page's file finder
+    rejects most paths with one AND. Must agree with charMask() in the page script.
+    """
+    mask = 0
+    for ch in set(text.lower()):
+        if "a" <= ch <= "z":
+            mask |= 1 << (ord(ch) - 97)
+        elif "0" <= ch <= "9":
+            mask |= 1 << 26
+        else:
+            mask |= 1 << _MASK_SYMBOLS.get(ch, 30)
+    return mask
+
+
+def toc_lists(lists: List[Tuple[str, List[FileInfo]]], index: Dict[str, int]) -> List[dict]:
+    """Non-empty skip lists as manifest entries, files ordered as in the TOC."""
+    return [
+        {"title": title, "files": sorted(index[i.rel] for i in items)}
+        for title, items in lists if items
+    ]
+
+
+def symbol_manifest(rendered: List[FileInfo], index: Dict[str, int]) -> Optional[dict]:
+    """
+    The definitions found while highlighting, for the page's symbol finder:
+    `symbols` is a flat run of (file index, kind index, line, name), file
+    indexes as in the TOC manifest. None when no section was highlighted on
+    the server.
+    """
+    if all(i.symbols is None for i in rendered):
+        return None
+    kinds = {kind: k for k, kind in enumerate(SYMBOL_KINDS)}
+    symbols: list = []
+    for i in rendered:
+        for symbol in i.symbols or ():
+            symbols += [index[i.rel], kinds[symbol.kind], symbol.line, symbol.name]
+    return {"kinds": list(SYMBOL_KINDS), "symbols": symbols}
+
+
+def script_json(data) -> str:
+    """JSON for a <script type="application/json"> element."""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+
+
+def iter_file_sections(files: List[FileInfo], formatter: CompactHtmlFormatter, emitted_classes: Set[str],
+                       budget: Optional[RenderBudget] = None,
+                       watchdog: Optional[HighlightWatchdog] = None,
+                       highlight_mode: str = HIGHLIGHT_SERVER,
+                       search_index: Optional[SearchIndex] = None,
+                       outline: bool = False,
+                       raw_url: Optional[str] = None) -> Iterator[str]:
+    """
+    Yield one <section> per file. A section using token classes not in
+    emitted_classes is preceded by a <style> for them, and the set is updated.
+    Each file read is also added to search_index, if given, and has its lines
+    counted into FileInfo.lines.
+
+    With outline, sections show only the outline of each file (see
+    core.outline), highlighted on the server; the watchdog must then run
+    outline_job rather than highlight_job.
+
+    With raw_url, section headers link to the file as stored, at raw_url
+    followed by its quoted path.
+    """
+    for i in files:
+        p = i.path
+        
+        mode = budget.file_mode(i.rel) if budget else None
+        css_classes: List[str] = []
+        comment_lines = None
+        text = None
+        shown = None  # the outline, when only that is shown
+        try:
+            if mode == MODE_LISTED:
+                body_html = '<div class="degraded-note">⏱️ Listed only: the render time budget was exhausted before this file.</div>'
+            elif mode == MODE_PLAIN:
+                text = read_text(p)
+                body_html = (
+                    '<div class="degraded-note">⏱️ Shown as plain text to stay within the render time budget.</div>'
+                    f'<pre class="plain-text">{html.escape(text)}</pre>'
+                )
+            elif i.kind.markdown:
+                text = read_text(p)
+                if outline:
+                    shown = markdown_outline(text)
+                body_html = f'<div class="markdown-content">{render_markdown_text(text if shown is None else shown)}</div>'
+            elif outline:
+                text = read_text(p)
+                try:
+                    result = (watchdog.run(i.rel, i.kind.lexer_name, text, i.kind.lexer) if watchdog
+                              else outline_job(text, i.kind.lexer))
+                    shown = result.outline
+                    css_classes = result.css_classes
+                    comment_lines = result.comment_lines
+                    if shown:
+                        body_html = f'<div class="highlight">{result.html}</div>'
+                    else:
+                        body_html = '<div class="outline-note">No top-level definitions.</div>'
+                except HighlightTimeout:
+                    code_html = highlight(text, TextLexer(stripall=False), formatter)
+                    body_html = (
+                        f'<div class="degraded-note">⏱️ The {html.escape(i.kind.lexer_name)} outline timed out; shown in full without highlighting.</div>'
+                        f'<div class="highlight">{code_html}</div>'
+                    )
+            elif highlight_mode == HIGHLIGHT_CLIENT:
+                text = read_text(p)
+                body_html = f'<div class="highlight">{lazy_code_html(text, i.kind.lexer)}</div>'
+            elif watchdog:
+                text = read_text(p)
+                # Classification already imported the lexer module before any worker
+                # was forked, so a restarted worker does not spend its timeout on imports.
+                lexer_name = i.kind.lexer_name
+                try:
+                    result = watchdog.run(i.rel, lexer_name, text, i.kind.lexer)
+                    css_classes = result.css_classes
+                    comment_lines = result.comment_lines
+                    i.symbols = result.symbols
+                    body_html = f'<div class="highlight">{result.html}</div>'
+                except HighlightTimeout:
+                    code_html = highlight(text, TextLexer(stripall=False), formatter)
+                    body_html = (
+                        f'<div class="degraded-note">⏱️ The {html.escape(lexer_name)} lexer timed out; shown without highlighting.</div>'
+                        f'<div class="highlight">{code_html}</div>'
+                    )
+            else:
+                text = read_text(p)
+                result = highlight_job(text, i.kind.lexer)
+                css_classes = result.css_classes
+                comment_lines = result.comment_lines
+                i.symbols = result.symbols
+                body_html = f'<div class="highlight">{result.html}</div>'
+        except Exception as e:
+            body_html = f'<pre class="error">Failed to render: {html.escape(str(e))}</pre>'
+        if text is not None and i.tokens is None:
+            i.tokens = estimate_tokens(text)
+        if text is not None:
+            i.lines = count_lines(text, i.kind.extension, comment_lines)
+        if text is not None and search_index is not None:
+            search_index.add(i.rel, text)
+
+        new_classes = set(css_classes) - emitted_classes
+        if new_classes:
+            emitted_classes.update(new_classes)
+            yield f"<style>\n{formatter.token_style_defs(new_classes, '.highlight')}\n</style>\n"
+
+        height = section_height(text if shown is None else shown, i.kind.markdown and mode is None)
+        yield file_section_html(i, body_html, height, "outline" if shown is not None else None, raw_url)
+
+
+def file_section_html(i: FileInfo, body_html: str, height: int, label: Optional[str] = None,
+                      raw_url: Optional[str] = None) -> str:
+    """The <section> of a file; label is shown after its size in the header."""
+    detail = bytes_human(i.size) + (f", {label}" if label else "")
+    raw_link = f'<a class="raw-link" href="{html.escape(raw_url + quote(i.rel))}">Raw</a>' if raw_url else ""
+    return f"""
+<section class="file-section" id="file-{slugify(i.rel)}" style="contain-intrinsic-size: auto {height}px">
+  <h2 data-icon="{i.kind.icon}">
+    <div class="file-header-left">
+      <span>{html.escape(i.rel)} <span class="muted">({detail})</span></span>{raw_link}
+    </div>
+  </h2>
+  <div class="file-body">{body_html}</div>
+  <div class="back-top"><a href="#top">↑ Back to top</a></div>
+</section>
 """
 
 
+def iter_preview_sections(files: List[FileInfo], formatter: CompactHtmlFormatter, emitted_classes: Set[str],
+                          budget: Optional[RenderBudget] = None,
+                          watchdog: Optional[HighlightWatchdog] = None,
+                          highlight_mode: str = HIGHLIGHT_SERVER,
+                          blob_url: Optional[str] = None,
+                          raw_url: Optional[str] = None) -> Iterator[str]:
+    """
+    Yield a section per oversized file showing only its first lines (see
+    read_head), highlighted and degraded by the budget like iter_file_sections
+    would. With blob_url the section links to the whole file there, followed
+    by its quoted path; raw_url is as for iter_file_sections.
+    """
+    for i in files:
+        mode = budget.file_mode(i.rel) if budget else None
+        css_classes: List[str] = []
+        text = None if mode == MODE_LISTED else read_head(i.path)
+        if mode == MODE_LISTED:
+            body_html = '<div class="degraded-note">⏱️ Listed only: the render time budget was exhausted before this file.</div>'
+        elif text is None:
+            body_html = '<pre class="error">Failed to read the start of this file.</pre>'
+        else:
+            shown = len(text.splitlines())
+            link = f' <a href="{html.escape(blob_url + quote(i.rel))}">View the whole file →</a>' if blob_url else ""
+            note = f'<div class="preview-note">📄 The first {shown:,} lines of a {bytes_human(i.size)} file.{link}</div>'
+            try:
+                if mode == MODE_PLAIN:
+                    body_html = (
+                        '<div class="degraded-note">⏱️ Shown as plain text to stay within the render time budget.</div>'
+                        f'{note}<pre class="plain-text">{html.escape(text)}</pre>'
+                    )
+                elif highlight_mode == HIGHLIGHT_CLIENT:
+                    body_html = f'{note}<div class="highlight">{lazy_code_html(text, i.kind.lexer)}</div>'
+                else:
+                    try:
+                        result = (watchdog.run(i.rel, i.kind.lexer_name, text, i.kind.lexer) if watchdog
+                                  else highlight_job(text, i.kind.lexer))
+                        css_classes, code_html = result.css_classes, result.html
+                    except HighlightTimeout:
+                        code_html = highlight(text, TextLexer(stripall=False), formatter)
+                    body_html = f'{note}<div class="highlight">{code_html}</div>'
+            except Exception as e:
+                body_html = f'{note}<pre class="error">Failed to render: {html.escape(str(e))}</pre>'
+
+        new_classes = set(css_classes) - emitted_classes
+        if new_classes:
+            emitted_classes.update(new_classes)
+            yield f"<style>\n{formatter.token_style_defs(new_classes, '.highlight')}\n</style>\n"
+        yield file_section_html(i, body_html, section_height(text), "preview", raw_url)
+
+
+def iter_directory_sections(files: List[FileInfo],
+                            budget: Optional[RenderBudget] = None,
+                            watchdog: Optional[HighlightWatchdog] = None,
+                            highlight_mode: str = HIGHLIGHT_SERVER,
+                            raw_url: Optional[str] = None) -> Iterator[str]:
+    """The sections of one directory as a standalone fragment, for paged pages."""
+    yield from iter_file_sections(files, CompactHtmlFormatter(), set(), budget, watchdog, highlight_mode,
+                                  raw_url=raw_url)
+
+
+def build_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: List[FileInfo],
+               budget: Optional[RenderBudget] = None,
+               watchdog: Optional[HighlightWatchdog] = None,
+               highlight_mode: str = HIGHLIGHT_SERVER,
+               asset_base: Optional[str] = None,
+               fragment_url: Optional[str] = None,
+               llm_url: Optional[str] = None,
+               search_index: Optional[SearchIndex] = None,
+               search_url: Optional[str] = None,
+               symbols_url: Optional[str] = None,
+               outline: bool = False,
+               blob_url: Optional[str] = None,
+               raw_url: Optional[str] = None) -> str:
+    return "".join(iter_html(repo_url, repo_dir, head_commit, infos, budget, watchdog, highlight_mode, asset_base,
+                             fragment_url, llm_url, search_index, search_url, symbols_url, outline, blob_url, raw_url))
+
+
+def iter_html(repo_url: str, repo_dir: pathlib.Path, head_commit: str, infos: List[FileInfo],
+              budget: Optional[RenderBudget] = None,
+              watchdog: Optional[HighlightWatchdog] = None,
+              highlight_mode: str = HIGHLIGHT_SERVER,
+              asset_base: Optional[str] = None,
+              fragment_url: Optional[str] = None,
+              llm_url: Optional[str] = None,
+              search_index: Optional[SearchIndex] = None,
+              search_url: Optional[str] = None,
+              symbols_url: Optional[str] = None,
+              outline: bool = False,
+              blob_url: Optional[str] = None,
+              raw_url: Optional[str] = None) -> Iterator[str]:
+    """
+    Yield the page in order: head, sidebar and header, then one chunk per file
+    section as it is rendered, then the LLM view. At most one file's content
+    is held in memory at a time.
+
+    The shared CSS and JavaScript are inlined unless asset_base is given, in
+    which case the page links to STATIC_ASSETS under that URL prefix.
+
+    With fragment_url the page is paged: file sections are replaced by one
+    placeholder per directory, which the page script fills from fragment_url
+    followed by the quoted directory path, and the LLM view is not embedded.
+
+    With llm_url the LLM view is not embedded either; the page script fetches
+    its text from llm_url the first time the view is opened.
+
+    Content search loads its index from search_url, or else from the page
+    itself: files are added to search_index as their sections are rendered and
+    the index is embedded at the end of the page.
+
+    Symbols found while highlighting are embedded at the end of the page for
+    the symbol finder; if there are none (sections highlighted in the
+    browser, or paged) it fetches them from symbols_url instead.
+
+    With outline, file sections show only each file's outline (see
+    iter_file_sections); the sidebar, stats and skip lists are unchanged.
+    Outline pages are never paged or highlighted in the browser.
+
+    Text files over max_bytes are previewed after the other sections by
+    their first lines (see plan_previews), linking to the whole file at
+    blob_url followed by the quoted path when given. Outline pages only
+    list them.
+
+    With raw_url, every section header links to its file as stored (see
+    iter_file_sections).
+    """
+    formatter = CompactHtmlFormatter()
+    emitted_classes: Set[str] = set()
+
+    # Stats
+    rendered = [i for i in infos if i.decision.include]
+    skipped_binary = [i for i in infos if i.decision.reason == "binary"]
+    skipped_large = [i for i in infos if i.decision.reason == "too_large"]
+    skipped_ignored = [i for i in infos if i.decision.reason == "ignored"]
+    total_files = len(rendered) + len(skipped_binary) + len(skipped_large) + len(skipped_ignored)
+
+    # Directory tree
+    tree_text = try_tree_command(repo_dir)
+    
+    # Generate advanced stats
+    advanced_stats_html = generate_advanced_stats(infos, lines_counted=fragment_url is None)
+    
+    # Table of contents and skip lists, drawn by the page script from one manifest
+    previews = [] if outline else plan_previews(skipped_large)
+    manifest, toc_index = toc_manifest(
+        rendered, [("Skipped binaries", skipped_binary), ("Skipped large files", skipped_large)],
+        paged=fragment_url is not None, previews=previews,
+    )
+
+    # Head, with only the formatter's base rules; token rules follow the sections that use them
+    yield PAGE_HEAD_START
+    yield f"<title>📚 {html.escape(repo_url)} - Code Repository</title>\n"
+    if asset_base is None:
+        page_css = formatter.base_style_defs('.highlight')
+        if highlight_mode == HIGHLIGHT_CLIENT:
+            page_css += "\n" + HLJS_THEME_CSS
+        yield PAGE_HEAD_STATIC
+        yield f"<style>\n{page_css}\n</style>\n</head>\n"
+    else:
+        stylesheets = [PAGE_CSS_ASSET] + ([HLJS_THEME_ASSET] if highlight_mode == HIGHLIGHT_CLIENT else [])
+        yield "".join([_PWA_FEATURES, "\n", _FONT_LINKS])
+        yield "".join(f'<link rel="stylesheet" href="{asset_base}{a.name}">\n' for a in stylesheets)
+        yield "</head>\n"
+
+    yield f"""<body>
+{add_navigation_bar(repo_url)}
+<div class="bg-decoration"></div>
+<a id="top"></a>
+
+<!-- Mobile Navigation -->
+<div class="mobile-nav">
+  <button class="mobile-nav-btn" onclick="toggleSidebar()">
+    <span>📋</span>
+    <span>Files</span>
+  </button>
+  <div class="mobile-nav-title">Repository Explorer</div>
+</div>
+
+<!-- Sidebar Overlay for Mobile -->
+<div class="sidebar-overlay" onclick="closeSidebar()"></div>
+
+<div class="page">
+  <script type="application/json" id="toc-manifest">{script_json(manifest)}</script>
+  {f'<script type="application/gzip" id="search-index" data-src="{html.escape(search_url)}"></script>' if search_url else ''}
+  <nav id="sidebar"><div class="sidebar-inner">
+      <h2>Contents ({len(rendered)})</h2>
+      <ul class="toc toc-sidebar">
+        <li><a href="#top">↑ Back to top</a></li>
+      </ul>
+      <ul class="toc toc-sidebar toc-tree" data-toc></ul>
+  </div></nav>
+
+  <main class="container">
+    <div class="header-section">
+      <div class="header-content">
+        <h1 class="repo-title">Repository Explorer</h1>
+        <div class="meta">
+          <div><strong>📍 Repository:</strong> <a href="{html.escape(repo_url)}" target="_blank" rel="noopener">{html.escape(repo_url)}</a></div>
+          <div><strong>🔗 HEAD commit:</strong> <code>{html.escape(head_commit[:12])}</code></div>
+          <div class="counts">
+            <strong>📊 Statistics:</strong> {total_files} total files • {len(rendered)} rendered • {len(skipped_binary) + len(skipped_large) + len(skipped_ignored)} skipped
+          </div>
+        </div>
+      </div>
+    </div>
+
+    {advanced_stats_html}
+
+    <div class="view-toggle">
+      <strong>View Mode:</strong>
+      <button class="toggle-btn active" onclick="showHumanView(this)"><span>👤 Human Readable</span></button>
+      <button class="toggle-btn" onclick="showLLMView(this)"><span>🤖 LLM Format</span></button>
+    </div>
+
+    <div id="human-view">
+      <div class="content-section">
+        <h2>🌳 Directory Structure</h2>
+        <pre>{html.escape(tree_text)}</pre>
+      </div>
+
+      <div class="content-section toc-top">
+        <h2>📋 File Index ({len(rendered)} files)</h2>
+        <ul class="toc toc-tree" data-toc></ul>
+      </div>
+
+      {_EXPORT_FEATURES}
+
+      <div class="content-section skip-section">
+        <h2>⚠️ Excluded Files</h2>
+        <div class="skip-lists" data-manifest="toc-manifest"></div>
+        <div class="skip-lists" data-manifest="degraded-files"></div>
+      </div>
+
+      <div style="margin-top: 2rem;">
+"""
+
+    if fragment_url is None:
+        yield from iter_file_sections(rendered, formatter, emitted_classes, budget, watchdog, highlight_mode,
+                                      search_index, outline, raw_url)
+    else:
+        # Paged: one placeholder per directory, filled by the page script on demand
+        for dir_path, files in group_by_directory(rendered).items():
+            src = fragment_url + quote(dir_path, safe="")
+            label = dir_path or "(repository root)"
+            yield (
+                f'<div class="dir-sections" data-dir="{html.escape(dir_path)}" data-src="{html.escape(src)}" '
+                f'style="min-height: {placeholder_height(files)}px">'
+                f'<div class="dir-skeleton">📂 {html.escape(label)} · {len(files)} files · '
+                f'{bytes_human(sum(i.size for i in files))}</div></div>\n'
+            )
+    yield from iter_preview_sections(previews, formatter, emitted_classes, budget, watchdog, highlight_mode,
+                                     blob_url, raw_url)
+
+    # Degraded files are only known once every section is out; the page
+    # script draws these lists in the Excluded Files section.
+    degraded_listed: List[FileInfo] = []
+    if budget and budget.degraded:
+        by_rel = {i.rel: i for i in rendered + previews}
+        degraded_plain = [by_rel[rel] for rel in budget.degraded_paths(MODE_PLAIN)]
+        degraded_listed = [by_rel[rel] for rel in budget.degraded_paths(MODE_LISTED)]
+        lists = toc_lists([
+            ("Shown as plain text (render time budget)", degraded_plain),
+            ("Listed only (render time budget)", degraded_listed),
+        ], toc_index)
+        yield f'<script type="application/json" id="degraded-files">{script_json({"lists": lists})}</script>\n'
+
+    # Lines were counted while the sections rendered; the page script moves
+    # this into the Lines of Code card near the top
+    if fragment_url is None:
+        stats = line_stats(rendered)
+        if stats:
+            yield f'<template id="line-stats-template">{line_stats_html(stats)}</template>\n'
+
+    # Outline sections do not have the lines symbols point at
+    symbols = symbol_manifest(rendered, toc_index) if fragment_url is None and not outline else None
+    if symbols is not None:
+        yield f'<script type="application/json" id="symbol-index">{script_json(symbols)}</script>\n'
+    elif symbols_url:
+        yield f'<script type="application/json" id="symbol-index" data-src="{html.escape(symbols_url)}"></script>\n'
+
+    if search_url is None and search_index is not None and len(search_index):
+        # Decoded by the search worker, only once a search is made
+        sidecar = base64.b64encode(search_index.sidecar()).decode("ascii")
+        yield f'<script type="application/gzip" id="search-index">{sidecar}</script>\n'
+
+    yield f"""      </div>
+    </div>
+
+    <div id="llm-view">
+      <div class="content-section">
+        <h2>🤖 LLM-Optimized View</h2>
+        <p style="margin-bottom: 1.5rem; color: var(--text-secondary); line-height: 1.6;">
+          This view presents the repository content in CXML format, optimized for Large Language Model analysis. 
+          Simply copy the content below and paste it into your preferred LLM interface.
+        </p>
+        <textarea id="llm-text" readonly{f' data-src="{html.escape(llm_url)}"' if llm_url else ''}>"""
+    # CXML text for LLM view, one document at a time
+    if llm_url is None and fragment_url is None and not outline:
+        for chunk in iter_cxml_text(infos, repo_dir, omitted={i.rel for i in degraded_listed}):
+            yield html.escape(chunk)
+    elif llm_url is None and outline:
+        yield "Outline pages do not embed the LLM view; render the full page for it."
+    elif llm_url is None:
+        yield "This repository is too large to embed its LLM view in the page."
+    yield f"""</textarea>
+        <div class="copy-hint">
+          💡 <strong>Pro tip:</strong> Click in the text area above and use <kbd>Ctrl+A</kbd> (or <kbd>Cmd+A</kbd> on Mac) to select all content, then <kbd>Ctrl+C</kbd> (or <kbd>Cmd+C</kbd>) to copy to clipboard.
+        </div>
+      </div>
+    </div>
+  </main>
+</div>
+
+"""
+    if asset_base is None:
+        yield PAGE_TAIL
+    else:
+        yield "".join(f'<script src="{asset_base}{a.name}"></script>\n' for a in (PAGE_JS_ASSET, INTERACTIVE_JS_ASSET))
+        yield "</body>\n</html>\n"
+
+
 def derive_temp_output_path(repo_url: str) -> pathlib.Path:
     """Derive a temporary output path from the repo URL."""
     # Extract repo name from URL like https://github.com/owner/repo or https://github.com/owner/repo.git
@@ -2391,6 +4016,16 @@ def main() -> int:
     ap.add_argument("-o", "--out", help="Output HTML file path (default: temporary file derived from repo name)")
     ap.add_argument("--max-bytes", type=int, default=MAX_DEFAULT_BYTES, help="Max file size to render (bytes); larger files are listed but skipped")
     ap.add_argument("--no-open", action="store_true", help="Don't open the HTML file in browser after generation")
+    ap.add_argument("--highlight-timeout", type=float, default=DEFAULT_HIGHLIGHT_TIMEOUT_SECONDS, help="Per-file highlighting timeout in seconds (0 disables the watchdog)")
+    ap.add_argument("--client-highlight", action="store_true", help="Emit raw code and highlight it in the browser as sections scroll into view (smaller, faster output)")
+    ap.add_argument("--time-budget", type=float, default=None, help="Render time budget in seconds; files past it are degraded to plain text or listed only")
+    ap.add_argument("--export-chunks", metavar="DIR", help="Also write the LLM view to DIR as CXML files of at most --chunk-tokens tokens each")
+    ap.add_argument("--chunk-tokens", type=int, default=DEFAULT_CHUNK_TOKENS, help="Estimated tokens per exported chunk")
+    ap.add_argument("--export-context", metavar="FILE", help="Also write the most important files that fit --context-budget to FILE as CXML")
+    ap.add_argument("--context-budget", type=int, default=DEFAULT_CHUNK_TOKENS, help="Budget of the --export-context file")
+    ap.add_argument("--context-unit", choices=[UNIT_TOKENS, UNIT_BYTES], default=UNIT_TOKENS, help="Unit of --context-budget")
+    ap.add_argument("--no-search-index", action="store_true", help="Don't embed the full-text search index in the page (smaller output)")
+    ap.add_argument("--outline", action="store_true", help="Show only top-level definitions, signatures and their comments per file, for skimming (implies --no-search-index)")
     args = ap.parse_args()
     
     # Set default output path if not provided
@@ -2399,6 +4034,9 @@ def main() -> int:
 
     tmpdir = tempfile.mkdtemp(prefix="flatten_repo_")
     repo_dir = pathlib.Path(tmpdir, "repo")
+    budget = RenderBudget(args.time_budget) if args.time_budget else None
+    job = outline_job if args.outline else highlight_job
+    watchdog = HighlightWatchdog(job, timeout=args.highlight_timeout) if args.highlight_timeout else None
 
     try:
         print(f"📁 Cloning {args.repo_url} to temporary directory: {repo_dir}", file=sys.stderr)
@@ -2412,15 +4050,52 @@ def main() -> int:
         skipped_count = len(infos) - rendered_count
         print(f"✓ Found {len(infos)} files total ({rendered_count} will be rendered, {skipped_count} skipped)", file=sys.stderr)
         
-        print(f"🔨 Generating HTML...", file=sys.stderr)
-        html_out = build_html(args.repo_url, repo_dir, head, infos)
-
         out_path = pathlib.Path(args.out)
-        print(f"💾 Writing HTML file: {out_path.resolve()}", file=sys.stderr)
-        out_path.write_text(html_out, encoding="utf-8")
+        print(f"🔨 Generating HTML into {out_path.resolve()}...", file=sys.stderr)
+        highlight_mode = HIGHLIGHT_CLIENT if args.client_highlight and not args.outline else HIGHLIGHT_SERVER
+        with out_path.open("w", encoding="utf-8") as fh:
+            search_index = None if args.no_search_index or args.outline else SearchIndex()
+            for chunk in iter_html(args.repo_url, repo_dir, head, infos, budget=budget, watchdog=watchdog,
+                                   highlight_mode=highlight_mode, search_index=search_index, outline=args.outline):
+                fh.write(chunk)
+        if budget and budget.degraded:
+            print(f"⏱️  Time budget degraded {len(budget.degraded)} files "
+                  f"({budget.to_stats()['used_percent']}% of {args.time_budget}s used)", file=sys.stderr)
+        if watchdog and watchdog.slow_lexers:
+            print("🐢 Slow lexers report:", file=sys.stderr)
+            for entry in watchdog.slow_lexers:
+                print(f"   {entry['outcome']:>7}  {entry['duration_seconds']:6.2f}s  {entry['lexer']:<20} {entry['file']}", file=sys.stderr)
+
         file_size = out_path.stat().st_size
         print(f"✓ Wrote {bytes_human(file_size)} to {out_path}", file=sys.stderr)
         
+        doc_tokens = cxml_document_tokens(infos)
+        print(f"🔢 LLM view: ~{sum(t for _, t in doc_tokens):,} tokens (estimated)", file=sys.stderr)
+        if args.export_chunks:
+            chunks_dir = pathlib.Path(args.export_chunks)
+            chunks_dir.mkdir(parents=True, exist_ok=True)
+            chunks = plan_cxml_chunks(infos, doc_tokens, args.chunk_tokens)
+            for chunk in chunks:
+                chunk_path = chunks_dir / f"chunk-{chunk.index:03d}.cxml"
+                with chunk_path.open("w", encoding="utf-8") as fh:
+                    fh.writelines(iter_cxml_chunk(infos, chunk, args.chunk_tokens))
+            print(f"✓ Wrote {len(chunks)} chunks of up to ~{args.chunk_tokens:,} tokens to {chunks_dir}", file=sys.stderr)
+        if args.export_context:
+            selection = rank_cxml_documents(infos, args.context_budget, args.context_unit,
+                                            recency=git_recent_paths(str(repo_dir)))
+            context_path = pathlib.Path(args.export_context)
+            with context_path.open("w", encoding="utf-8") as fh:
+                fh.writelines(iter_cxml_selection(infos, selection))
+            print(f"✓ Wrote {len(selection.selected)} files ({selection.used:,} of {selection.budget:,} {selection.unit}) "
+                  f"to {context_path}", file=sys.stderr)
+            if selection.dropped:
+                rendered = [i for i in infos if i.decision.include]
+                print(f"   Dropped {len(selection.dropped)} files, most important first:", file=sys.stderr)
+                for pos in selection.dropped[:20]:
+                    print(f"   - {rendered[pos].rel}", file=sys.stderr)
+                if len(selection.dropped) > 20:
+                    print(f"   ... and {len(selection.dropped) - 20} more", file=sys.stderr)
+        
         if not args.no_open:
             print(f"🌐 Opening {out_path} in browser...", file=sys.stderr)
             webbrowser.open(f"file://{out_path.resolve()}")
@@ -2428,6 +4103,8 @@ def main() -> int:
         print(f"🗑️  Cleaning up temporary directory: {tmpdir}", file=sys.stderr)
         return 0
     finally:
+        if watchdog:
+            watchdog.close()
         shutil.rmtree(tmpdir, ignore_errors=True)
 
 
@@ -0,0 +1,323 @@
+"""
+Full-text search over a rendered repository.
+File contents are indexed by trigram while the page renders, in the same pass
+that reads each file for its section. A query only scans the files holding
+every trigram of the query, so most files are never looked at.
+
+The index is shipped to the browser as a gzipped JSON sidecar, queried by a
+web worker in the page, and kept by the app to answer search API queries.
+Regex queries from the API run in a worker process (see RegexSearcher),
+since one backtracking pattern can spin on a single line for minutes.
+"""
+
+import gzip
+import itertools
+import json
+import logging
+import re
+import threading
+import time
+import zlib
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from core.utils import LRUCache
+from core.watchdog import TimedWorker, WorkerTimeout
+
+logger = logging.getLogger(__name__)
+
+# Text beyond this is left out of the index, to bound the sidecar's size
+DEFAULT_MAX_INDEX_BYTES = 64 * 1024 * 1024
+SIDECAR_VERSION = 1
+
+# Time a regex worker is given past the search's own time limit before it is killed
+REGEX_KILL_GRACE_SECONDS = 1.0
+# Indexes kept by the search worker
+MAX_WORKER_INDEXES = 8
+
+# Snippets longer than this are cut around the match
+SNIPPET_CHARS = 200
+# Regex syntax that ends a run of literal characters; `|` and verbose mode
+# make runs unreliable, so patterns using them are matched against every file
+_REGEX_SPECIAL = set(".^$*+?{}[]()|\\")
+_QUANTIFIERS = set("*+?{")
+_ESCAPED_LITERALS = set(".^$*+?{}[]()|\\/-'\"#&~ ")
+
+_index_keys = itertools.count()
+
+
+def trigrams(text: str) -> set:
+    """Distinct lower-cased trigrams of text; none spans a line break."""
+    lower = text.lower()
+    # Deduplicating character triples before joining them is much cheaper than slicing
+    return {a + b + c for a, b, c in set(zip(lower, lower[1:], lower[2:])) if "\n" not in (a, b, c)}
+
+
+def regex_literals(pattern: str) -> List[str]:
+    """
+    Literal strings any match of pattern must contain, found by a conservative
+    scan of its syntax; empty when nothing is certain. Groups and character
+    classes are skipped whole, since they may be optional or negated.
+    """
+    if "|" in pattern or re.search(r"\(\?[a-zA-Z]*x", pattern):
+        return []
+    runs, run = [], []
+    pos = 0
+    while pos < len(pattern):
+        char = pattern[pos]
+        if char == "\\" and pattern[pos + 1:pos + 2] in _ESCAPED_LITERALS:
+            run.append(pattern[pos + 1])
+            pos += 2
+            continue
+        if char not in _REGEX_SPECIAL:
+            run.append(char)
+            pos += 1
+            continue
+        if char in _QUANTIFIERS and char != "+" and run:
+            # The preceding character may be absent from a match
+            run.pop()
+        runs.append("".join(run))
+        run = []
+        pos = _skip_syntax(pattern, pos)
+    runs.append("".join(run))
+    return [run for run in runs if run]
+
+
+def _skip_syntax(pattern: str, pos: int) -> int:
+    """Position after the regex element starting at pattern[pos]."""
+    char = pattern[pos]
+    if char == "\\":
+        return pos + 2
+    if char == "[":
+        # A leading ] is part of the class
+        end = pattern.find("]", pos + (3 if pattern.startswith("[^", pos) else 2))
+        return len(pattern) if end < 0 else end + 1
+    if char == "{":
+        end = pattern.find("}", pos)
+        return len(pattern) if end < 0 else end + 1
+    if char == "(":
+        depth = 0
+        while pos < len(pattern):
+            char = pattern[pos]
+            if char == "\\":
+                pos += 1
+            elif char == "[":
+                pos = _skip_syntax(pattern, pos) - 1
+            elif char == "(":
+                depth += 1
+            elif char == ")":
+                depth -= 1
+                if not depth:
+                    return pos + 1
+            pos += 1
+        return pos
+    return pos + 1
+
+
+@dataclass
+class SearchHit:
+    path: str
+    line: int     # 1-based
+    snippet: str  # the matching line, cut to SNIPPET_CHARS around the match
+    start: int    # offsets of the match within snippet
+    end: int
+
+
+@dataclass
+class SearchResults:
+    hits: List[SearchHit] = field(default_factory=list)
+    more: bool = False       # hits exist beyond the requested page
+    timed_out: bool = False  # the time limit ran out before the page was filled
+    scanned_files: int = 0
+
+
+class SearchIndex:
+    """Trigram postings (trigram -> ids of files containing it) plus the indexed texts."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_INDEX_BYTES):
+        self.max_bytes = max_bytes
+        self.paths: List[str] = []
+        self.indexed_bytes = 0
+        self.truncated = False  # some files were left out to stay within max_bytes
+        self._texts: List[bytes] = []  # zlib-compressed UTF-8
+        self._postings: Dict[str, array] = {}
+        self._sidecar: Optional[bytes] = None
+        # Names this index in the search worker
+        self.key = next(_index_keys)
+
+    def __getstate__(self):
+        # Sent to the search worker, which never builds the sidecar
+        return dict(self.__dict__, _sidecar=None)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def add(self, path: str, text: str) -> None:
+        data = text.encode("utf-8")
+        if self.indexed_bytes + len(data) > self.max_bytes:
+            self.truncated = True
+            return
+        file_id = len(self.paths)
+        self.paths.append(path)
+        self._texts.append(zlib.compress(data, 1))
+        self.indexed_bytes += len(data)
+        for gram in trigrams(text):
+            postings = self._postings.get(gram)
+            if postings is None:
+                postings = self._postings[gram] = array("I")
+            postings.append(file_id)
+        self._sidecar = None
+
+    def text(self, file_id: int) -> str:
+        return zlib.decompress(self._texts[file_id]).decode("utf-8")
+
+    def candidates(self, *literals: str) -> Iterable[int]:
+        """Ids of the files that may contain every literal (case-insensitively), in path order."""
+        grams = set()
+        for literal in literals:
+            grams |= trigrams(literal)
+        if not grams:
+            return range(len(self.paths))
+        lists = sorted((self._postings.get(gram, ()) for gram in grams), key=len)
+        found = set(lists[0])
+        for postings in lists[1:]:
+            if not found:
+                break
+            found.intersection_update(postings)
+        return sorted(found)
+
+    def search(self, query: str, regex: bool = False, offset: int = 0, limit: int = 50,
+               time_limit: Optional[float] = None) -> SearchResults:
+        """
+        Lines matching query, case-insensitively, one hit per line in path and
+        line order; hits [offset, offset + limit) are returned. Only files
+        holding every trigram of the query (or of the literals a regex
+        requires) are scanned. Raises re.error for an invalid regex.
+
+        time_limit (seconds) is checked between files, so a single file may
+        overrun it; bounded_search() enforces it for regexes.
+        """
+        if regex:
+            pattern = re.compile(query, re.IGNORECASE | re.MULTILINE)
+            literals = regex_literals(query)
+        else:
+            pattern = re.compile(re.escape(query), re.IGNORECASE)
+            literals = [query]
+        deadline = None if time_limit is None else time.monotonic() + time_limit
+        results = SearchResults()
+        skip = offset
+        for file_id in self.candidates(*literals):
+            if deadline is not None and time.monotonic() > deadline:
+                results.timed_out = True
+                break
+            results.scanned_files += 1
+            text = self.text(file_id)
+            line, line_start, last_line = 1, 0, 0
+            for match in pattern.finditer(text):
+                line += text.count("\n", line_start, match.start())
+                line_start = text.rfind("\n", 0, match.start()) + 1
+                if line == last_line:
+                    continue
+                last_line = line
+                if skip:
+                    skip -= 1
+                    continue
+                if len(results.hits) == limit:
+                    results.more = True
+                    return results
+                line_end = text.find("\n", match.start())
+                results.hits.append(_hit(self.paths[file_id], line, text[line_start:line_end if line_end >= 0 else None],
+                                         match.start() - line_start, match.end() - line_start))
+        return results
+
+    def sidecar(self) -> bytes:
+        """The index as gzipped JSON for the page's search worker; posting lists are delta-encoded."""
+        if self._sidecar is None:
+            postings = {}
+            for gram, ids in self._postings.items():
+                previous = 0
+                deltas = []
+                for file_id in ids:
+                    deltas.append(file_id - previous)
+                    previous = file_id
+                postings[gram] = deltas
+            data = {
+                "v": SIDECAR_VERSION,
+                "paths": self.paths,
+                "texts": [self.text(file_id) for file_id in range(len(self.paths))],
+                "trigrams": postings,
+                "truncated": self.truncated,
+            }
+            body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            self._sidecar = gzip.compress(body, 6)
+        return self._sidecar
+
+
+def _regex_search_job(key: int, index: Optional["SearchIndex"], query: str, offset: int, limit: int,
+                      time_limit: float) -> Optional[SearchResults]:
+    """
+    A regex search inside the search worker, which keeps the indexes sent to
+    it by key. Returns None when the index is not kept and must be sent.
+    """
+    if index is not None:
+        _worker_indexes.put(key, index)
+    else:
+        index = _worker_indexes.get(key)
+        if index is None:
+            return None
+    return index.search(query, True, offset, limit, time_limit)
+
+
+class RegexSearcher:
+    """
+    Runs regex searches in one long-lived worker process, killed and replaced
+    when a search overruns its time limit by REGEX_KILL_GRACE_SECONDS. Each
+    index is sent to the worker once; searches take turns.
+    """
+
+    def __init__(self):
+        self._worker = TimedWorker(_regex_search_job, 0, "Regex search")
+        self._lock = threading.Lock()
+
+    def search(self, index: "SearchIndex", query: str, offset: int, limit: int, time_limit: float) -> SearchResults:
+        with self._lock:
+            self._worker.timeout = time_limit + REGEX_KILL_GRACE_SECONDS
+            start = time.monotonic()
+            try:
+                results = self._worker.run(repr(query), index.key, None, query, offset, limit, time_limit)
+                if results is None:
+                    results = self._worker.run(repr(query), index.key, index, query, offset, limit, time_limit)
+            except WorkerTimeout:
+                logger.warning(f"Regex search killed after {time.monotonic() - start:.2f}s: {query!r}")
+                return SearchResults(timed_out=True)
+            return results
+
+
+def bounded_search(index: SearchIndex, query: str, regex: bool = False, offset: int = 0, limit: int = 50,
+                   time_limit: float = 2.0) -> SearchResults:
+    """
+    index.search() with a hard time limit. Regex queries run in the shared
+    search worker (see RegexSearcher), a timed-out one yielding no hits and
+    timed_out; plain text queries are matched in linear time and run inline.
+    Raises re.error for an invalid regex.
+    """
+    if not regex:
+        return index.search(query, False, offset, limit, time_limit)
+    re.compile(query)
+    return _regex_searcher.search(index, query, offset, limit, time_limit)
+
+
+# Indexes sent to the search worker, kept in the process running _regex_search_job
+_worker_indexes = LRUCache(MAX_WORKER_INDEXES)
+_regex_searcher = RegexSearcher()
+
+
+def _hit(path: str, line: int, text: str, start: int, end: int) -> SearchHit:
+    end = min(end, len(text))
+    if len(text) > SNIPPET_CHARS:
+        # Keep the match, with some context before it
+        cut = max(0, min(start - SNIPPET_CHARS // 4, len(text) - SNIPPET_CHARS))
+        text = text[cut:cut + SNIPPET_CHARS]
+        start, end = start - cut, min(end - cut, SNIPPET_CHARS)
+    return SearchHit(path, line, text, start, end)
@@ -0,0 +1,51 @@
+"""
+Symbol outline: the functions and classes defined in each file.
+Definitions are picked out of the Pygments token stream while a file is
+highlighted (lexers tag the names in definitions as Name.Function and
+Name.Class), so they cost no second parse. Files highlighted in the browser
+are lexed for their symbols alone when first asked for.
+"""
+
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List
+
+from pygments.token import Name
+
+KIND_FUNCTION = "function"
+KIND_CLASS = "class"
+SYMBOL_KINDS = (KIND_FUNCTION, KIND_CLASS)
+_DEFINITION_KINDS = {
+    Name.Function: KIND_FUNCTION,
+    Name.Function.Magic: KIND_FUNCTION,
+    Name.Class: KIND_CLASS,
+}
+
+
+@dataclass(frozen=True)
+class Symbol:
+    name: str
+    kind: str  # KIND_FUNCTION or KIND_CLASS
+    line: int  # 1-based, in the file as stored
+
+
+def leading_lines(text: str) -> int:
+    """Blank lines at the start of text, which lexers strip before tokenizing."""
+    return text[:len(text) - len(text.lstrip("\r\n"))].count("\n")
+
+
+class SymbolCollector:
+    """Passes a Pygments token stream through, collecting the definitions in it."""
+
+    def __init__(self, first_line: int = 1):
+        self.symbols: List[Symbol] = []
+        self._line = first_line
+
+    def feed(self, tokens: Iterable) -> Iterator:
+        kinds = _DEFINITION_KINDS
+        for token in tokens:
+            ttype, value = token
+            if ttype in kinds and value.strip():
+                self.symbols.append(Symbol(value.strip(), kinds[ttype], self._line))
+            if "\n" in value:
+                self._line += value.count("\n")
+            yield token
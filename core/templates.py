@@ -429,3 +429,104 @@ ERROR_TEMPLATE = '''
 </body>
 </html>
 '''
+
+BLOB_TEMPLATE = '''
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{{ path }} (lines {{ first_line }}-{{ last_line }}) - GitRender</title>
+    <style>
+        * {
+            margin: 0;
+            padding: 0;
+            box-sizing: border-box;
+        }
+        
+        body {
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'Noto Sans', Helvetica, Arial, sans-serif;
+            color: #24292f;
+            background-color: #ffffff;
+        }
+        
+        .blob-header {
+            position: sticky;
+            top: 0;
+            display: flex;
+            flex-wrap: wrap;
+            gap: 12px;
+            align-items: center;
+            justify-content: space-between;
+            padding: 12px 20px;
+            background: #f6f8fa;
+            border-bottom: 1px solid #d0d7de;
+        }
+        
+        .blob-path {
+            font-family: 'JetBrains Mono', monospace;
+            font-weight: 600;
+        }
+        
+        .blob-meta {
+            color: #57606a;
+            font-size: 0.9em;
+        }
+        
+        .pager a {
+            color: #0969da;
+            text-decoration: none;
+            margin-left: 12px;
+        }
+        
+        .pager a:hover {
+            text-decoration: underline;
+        }
+        
+        .blob-body {
+            display: flex;
+            font-family: 'JetBrains Mono', monospace;
+            font-size: 13px;
+            line-height: 1.5;
+        }
+        
+        .blob-body pre {
+            font: inherit;
+            padding: 12px 16px;
+        }
+        
+        .blob-gutter {
+            color: #8c959f;
+            text-align: right;
+            user-select: none;
+            border-right: 1px solid #d0d7de;
+        }
+        
+        .blob-body .highlight {
+            flex: 1;
+            overflow-x: auto;
+        }
+{{ style_css|safe }}
+    </style>
+</head>
+<body>
+    <div class="blob-header">
+        <div>
+            <a href="{{ page_url }}" class="blob-meta">{{ repo_url }}</a> /
+            <span class="blob-path">{{ path }}</span>
+            <span class="blob-meta">({{ size }}, lines {{ first_line }}-{{ last_line }} of {{ total_lines }})</span>
+            <span class="pager"><a href="{{ raw_url }}">Raw</a></span>
+        </div>
+        <div class="pager">
+            {% if prev_url %}<a href="{{ first_url }}">« First</a><a href="{{ prev_url }}">← Previous</a>{% endif %}
+            <span class="blob-meta">Page {{ page }} of {{ pages }}</span>
+            {% if next_url %}<a href="{{ next_url }}">Next →</a><a href="{{ last_url }}">Last »</a>{% endif %}
+        </div>
+    </div>
+    <div class="blob-body">
+        <pre class="blob-gutter">{{ line_numbers }}</pre>
+        <div class="highlight">{{ code_html|safe }}</div>
+    </div>
+</body>
+</html>
+'''
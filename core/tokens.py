@@ -0,0 +1,114 @@
+"""
+Token estimates and chunk planning for the LLM export.
+Byte-pair tokenizers first split text with a pre-tokenizer regex and only then
+merge bytes within each piece. Counting those pieces, plus extra tokens for the
+long words a vocabulary splits further, approximates GPT-style token counts
+without shipping a vocabulary or a tokenizer dependency.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List, Tuple
+
+# Chunk size offered by default; fits comfortably in common context windows.
+DEFAULT_CHUNK_TOKENS = 100_000
+
+# The GPT-2 pre-tokenizer pattern, with \p{L} / \p{N} spelled for the re module
+_PIECE_RE = re.compile(r"'(?:[sdmt]|ll|ve|re)| ?[^\W\d_]+| ?\d{1,3}| ?[^\s\w]+|\s+(?!\S)|\s+")
+# Words longer than this are usually split into several tokens
+_LONG_WORD_RE = re.compile(r"[^\W\d_]{7,}")
+_LETTERS_PER_TOKEN = 6
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate number of BPE tokens in text."""
+    pieces = len(_PIECE_RE.findall(text))
+    extra = sum((len(word) - 1) // _LETTERS_PER_TOKEN for word in _LONG_WORD_RE.findall(text))
+    return pieces + extra
+
+
+@dataclass
+class Chunk:
+    index: int  # 1-based
+    tokens: int = 0
+    # (document index, part, parts); parts > 1 when a document is split across chunks
+    documents: List[Tuple[int, int, int]] = field(default_factory=list)
+
+
+def plan_chunks(doc_tokens: Iterable[Tuple[int, int]], chunk_tokens: int,
+                part_tokens: Callable[[int], List[int]]) -> List[Chunk]:
+    """
+    Pack documents, given as (document index, tokens) in order, into chunks of
+    at most chunk_tokens. Documents are never reordered; one larger than a
+    whole chunk is cut by split_document(), each part starting a new chunk.
+    part_tokens(document index) gives the estimated tokens of those parts.
+    """
+    chunks: List[Chunk] = []
+    current = Chunk(1)
+    for doc_index, tokens in doc_tokens:
+        if tokens > chunk_tokens:
+            parts = part_tokens(doc_index)
+            for part, part_size in enumerate(parts, 1):
+                if current.documents:
+                    chunks.append(current)
+                    current = Chunk(len(chunks) + 1)
+                current.documents.append((doc_index, part, len(parts)))
+                current.tokens = part_size
+            continue
+        if current.documents and current.tokens + tokens > chunk_tokens:
+            chunks.append(current)
+            current = Chunk(len(chunks) + 1)
+        current.documents.append((doc_index, 1, 1))
+        current.tokens += tokens
+    if current.documents:
+        chunks.append(current)
+    return chunks
+
+
+def split_document(text: str, max_tokens: int) -> List[str]:
+    """
+    Cut text into non-empty parts of at most max_tokens estimated tokens.
+    Cuts fall at line ends; a line too long for one part is cut between
+    pre-tokenizer pieces, and a single piece too long (a huge word) by characters.
+    """
+    lines: List[str] = []
+    for line in text.splitlines(keepends=True):
+        lines.extend(_split_line(line, max_tokens) if estimate_tokens(line) > max_tokens else [line])
+    line_tokens = [estimate_tokens(line) for line in lines]
+    parts = []
+    start = 0
+    while start < len(lines):
+        end, used = start + 1, line_tokens[start]
+        while end < len(lines) and used + line_tokens[end] <= max_tokens:
+            used += line_tokens[end]
+            end += 1
+        # Pieces can merge differently across a line end; drop lines until the whole fits
+        while end - start > 1 and estimate_tokens("".join(lines[start:end])) > max_tokens:
+            end -= 1
+        parts.append("".join(lines[start:end]))
+        start = end
+    return parts
+
+
+def _split_line(line: str, max_tokens: int) -> List[str]:
+    """Cut one overlong line at piece starts into segments of at most max_tokens."""
+    # A run of this many letters estimates to max_tokens
+    max_letters = _LETTERS_PER_TOKEN * (max_tokens - 1) + 1
+    segments = []
+    start = used = 0
+    for m in _PIECE_RE.finditer(line):
+        cost = estimate_tokens(m.group())
+        if cost > max_tokens:
+            if m.start() > start:
+                segments.append(line[start:m.start()])
+            piece = m.group()
+            segments.extend(piece[k:k + max_letters] for k in range(0, len(piece), max_letters))
+            start, used = m.end(), 0
+            continue
+        if used and used + cost > max_tokens:
+            segments.append(line[start:m.start()])
+            start, used = m.start(), 0
+        used += cost
+    if start < len(line):
+        segments.append(line[start:])
+    return segments
@@ -2,8 +2,13 @@
 Utility functions for the GitRender Flask app.
 """
 
+import hashlib
 import re
-from typing import Tuple
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+_COMMIT_SHA_RE = re.compile(r"[0-9a-f]{7,40}")
 
 
 def parse_github_url(url: str) -> Tuple[str, str]:
@@ -46,6 +51,22 @@ def create_repo_path(owner: str, repo: str) -> str:
     return f"{owner}/{repo}"
 
 
+def is_commit_sha(ref: str) -> bool:
+    """Check whether ref looks like a (possibly abbreviated) commit SHA."""
+    return bool(_COMMIT_SHA_RE.fullmatch(ref))
+
+
+def create_page_etag(commit_sha: str, max_bytes: int, renderer_version: str) -> str:
+    """
+    Create a strong ETag for a rendered page.
+    
+    The page is fully determined by the commit, the render options and the
+    renderer itself, so the tag can be computed without looking at the body.
+    """
+    key = f"{commit_sha}:{max_bytes}:{renderer_version}".encode('utf-8')
+    return hashlib.sha256(key).hexdigest()[:32]
+
+
 def validate_github_url(url: str) -> bool:
     """
     Validate if the provided URL is a GitHub repository URL.
@@ -127,3 +148,29 @@ def truncate_commit_hash(commit_hash: str, length: int = 8) -> str:
         return commit_hash
     
     return commit_hash[:length]
+
+
+class LRUCache:
+    """A thread-safe mapping keeping at most maxsize entries, dropping the least recently used."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
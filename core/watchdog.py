@@ -0,0 +1,170 @@
+"""
+Per-file highlight watchdog.
+Runs highlighting in an isolated worker process so that a Pygments lexer
+backtracking on an odd input can be killed after a timeout instead of
+stalling the whole render. The worker itself (TimedWorker) runs any job,
+and also bounds regex searches.
+"""
+
+import logging
+import multiprocessing
+import time
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HIGHLIGHT_TIMEOUT_SECONDS = 5.0
+# Files slower than this are reported even when they finish in time.
+SLOW_HIGHLIGHT_SECONDS = 1.0
+
+
+class WorkerTimeout(Exception):
+    """Raised when a job does not finish within its worker's timeout."""
+    pass
+
+
+class HighlightTimeout(WorkerTimeout):
+    """Raised when a file does not finish highlighting within the timeout."""
+    pass
+
+
+def _worker_loop(conn, job: Callable[..., Any]) -> None:
+    """Serve jobs from the parent until it sends None."""
+    while True:
+        try:
+            args = conn.recv()
+        except EOFError:
+            break
+        if args is None:
+            break
+        try:
+            conn.send((True, job(*args)))
+        except Exception as e:
+            conn.send((False, f"{type(e).__name__}: {e}"))
+
+
+class TimedWorker:
+    """
+    Run `job(*args)` in a long-lived worker process with a per-call timeout.
+
+    On timeout the worker is killed, a fresh one being started for the next
+    call. `label` names the jobs in errors and log messages. If worker
+    processes cannot be started on this platform, jobs run inline without a
+    timeout. Calls must not overlap; callers sharing a worker serialize them.
+    """
+
+    def __init__(self, job: Callable[..., Any], timeout: float, label: str):
+        self.job = job
+        self.timeout = timeout
+        self.label = label
+        self._process = None
+        self._conn = None
+        self._inline = False
+
+    @property
+    def running(self) -> bool:
+        """Whether a worker is up, holding any state earlier jobs left in it."""
+        return self._process is not None
+
+    def _start_worker(self) -> None:
+        methods = multiprocessing.get_all_start_methods()
+        ctx = multiprocessing.get_context("fork" if "fork" in methods else None)
+        parent_conn, child_conn = ctx.Pipe()
+        process = ctx.Process(target=_worker_loop, args=(child_conn, self.job), daemon=True)
+        process.start()
+        child_conn.close()
+        self._process, self._conn = process, parent_conn
+
+    def _kill_worker(self) -> None:
+        if self._process is not None:
+            self._process.kill()
+            self._process.join()
+            self._conn.close()
+        self._process = self._conn = None
+
+    def run(self, name: str, *args) -> Any:
+        """
+        Run the job on args; name identifies the call in errors. Raises
+        WorkerTimeout if it takes too long, RuntimeError if it fails.
+        """
+        if not self._inline and self._process is None:
+            try:
+                self._start_worker()
+            except OSError as e:
+                logger.warning(f"{self.label} worker unavailable, running jobs inline: {e}")
+                self._inline = True
+
+        if self._inline:
+            return self.job(*args)
+
+        self._conn.send(args)
+        if not self._conn.poll(self.timeout):
+            self._kill_worker()
+            raise WorkerTimeout(f"{self.label} took longer than {self.timeout:g}s on {name}")
+
+        try:
+            ok, result = self._conn.recv()
+        except EOFError:
+            self._kill_worker()
+            raise RuntimeError(f"{self.label} worker died on {name}")
+        if not ok:
+            raise RuntimeError(result)
+        return result
+
+    def close(self) -> None:
+        if self._process is not None:
+            try:
+                self._conn.send(None)
+            except OSError:
+                pass
+            self._process.join(timeout=1)
+            if self._process.is_alive():
+                self._process.kill()
+            self._conn.close()
+        self._process = self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class HighlightWatchdog(TimedWorker):
+    """
+    A TimedWorker running highlight jobs, one file per call. Timeouts, and
+    files slower than slow_threshold, are recorded in the slow lexers report.
+    """
+
+    def __init__(self, job: Callable[..., Any],
+                 timeout: float = DEFAULT_HIGHLIGHT_TIMEOUT_SECONDS,
+                 slow_threshold: float = SLOW_HIGHLIGHT_SECONDS):
+        super().__init__(job, timeout, "Highlight")
+        self.slow_threshold = slow_threshold
+        self.slow_lexers: List[Dict[str, Any]] = []
+
+    def run(self, path: str, lexer_name: str, *args) -> Any:
+        """Run the job for `path`, raising HighlightTimeout if it takes too long."""
+        start = time.monotonic()
+        try:
+            result = super().run(path, *args)
+        except WorkerTimeout:
+            self._record(path, lexer_name, time.monotonic() - start, "timeout")
+            raise HighlightTimeout(f"{lexer_name} took longer than {self.timeout:g}s on {path}")
+        self._record(path, lexer_name, time.monotonic() - start, "slow")
+        return result
+
+    def _record(self, path: str, lexer_name: str, duration: float, outcome: str) -> None:
+        if outcome == "slow" and duration < self.slow_threshold:
+            return
+        ext = path.rsplit("/", 1)[-1]
+        ext = ext[ext.rfind("."):].lower() if "." in ext else ""
+        entry = {
+            'file': path,
+            'extension': ext,
+            'lexer': lexer_name,
+            'duration_seconds': round(duration, 3),
+            'outcome': outcome,
+        }
+        self.slow_lexers.append(entry)
+        logger.warning(f"Slow lexer: {lexer_name} on {path} ({duration:.2f}s, {outcome})")
@@ -0,0 +1,40 @@
+import pathlib
+import shutil
+
+import pytest
+
+import app as appmod
+from core import github_api
+from core.checkouts import CheckoutStore
+from core.utils import LRUCache
+
+FIXTURE_REPO = pathlib.Path(__file__).parent / "fixtures" / "repo"
+COMMIT_SHA = "0123456789abcdef0123456789abcdef01234567"
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+    """Refs fetched from GitHub; every fetch copies the fixture repository, at COMMIT_SHA."""
+    refs = []
+
+    def fetch_repo_archive(owner, repo, target_dir, ref=None):
+        refs.append(ref)
+        shutil.copytree(FIXTURE_REPO, target_dir)
+        return COMMIT_SHA
+
+    monkeypatch.setattr(github_api, "fetch_repo_archive", fetch_repo_archive)
+    monkeypatch.setattr(appmod, "resolve_commit", lambda owner, repo, ref=None: COMMIT_SHA)
+    return refs
+
+
+@pytest.fixture
+def client(monkeypatch, fetches):
+    """A test client for the app with empty caches, serving the fixture repository."""
+    store = CheckoutStore()
+    monkeypatch.setattr(appmod, "checkouts", store)
+    monkeypatch.setattr(appmod, "rendered_pages", {})
+    for name in ("rendered_fragments", "search_indexes", "symbol_indexes", "line_indexes", "blob_pages"):
+        monkeypatch.setattr(appmod, name, LRUCache(getattr(appmod, name).maxsize))
+    yield appmod.app.test_client()
+    if store._root is not None:
+        shutil.rmtree(store._root, ignore_errors=True)
@@ -0,0 +1,5 @@
+"""A module."""
+
+# A comment
+def add(a, b):
+    return a + b
@@ -0,0 +1,121 @@
+import gzip
+
+from conftest import COMMIT_SHA
+from core.compression import ENCODING_GZIP, CompressedPage, compress_page
+from core.repo_to_single_page import HIGHLIGHT_SERVER, MAX_DEFAULT_BYTES, RENDERER_VERSION
+from core.utils import create_page_etag
+
+PAGE = "/o/r"
+
+
+def render(client, url=PAGE):
+    """Render a page on first request, so later ones are served from the cache."""
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.get_data(as_text=True)
+
+
+def page_etag():
+    """ETag of the fixture repository's default page (server-highlighted, not paged)."""
+    return create_page_etag(COMMIT_SHA, MAX_DEFAULT_BYTES, f"{RENDERER_VERSION}:{HIGHLIGHT_SERVER}")
+
+
+def test_select_prefers_smallest_accepted_encoding():
+    page = CompressedPage({"gzip": b"x" * 30, "br": b"x" * 10, "zstd": b"x" * 20}, 100)
+    assert page.select(lambda enc: True) == ("br", b"x" * 10)
+    assert page.select(lambda enc: enc != "br") == ("zstd", b"x" * 20)
+
+
+def test_select_decompresses_for_identity_clients():
+    page = compress_page(["<html>", "body</html>"])
+    assert page.select(lambda enc: False) == (None, b"<html>body</html>")
+
+
+def test_cached_page_is_sent_compressed(client):
+    html = render(client)
+    response = client.get(PAGE, headers={"Accept-Encoding": "gzip, deflate"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == ENCODING_GZIP
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert gzip.decompress(response.get_data()).decode("utf-8") == html
+
+
+def test_cached_page_is_sent_plain_without_accept_encoding(client):
+    html = render(client)
+    for headers in ({}, {"Accept-Encoding": "gzip;q=0"}):
+        response = client.get(PAGE, headers=headers)
+        assert response.status_code == 200
+        assert "Content-Encoding" not in response.headers
+        assert response.headers["Vary"] == "Accept-Encoding"
+        assert response.get_data(as_text=True) == html
+
+
+def test_pinned_page_is_compressed_too(client):
+    render(client, f"/o/r/@{COMMIT_SHA}")
+    response = client.get(f"/o/r/@{COMMIT_SHA}", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == ENCODING_GZIP
+    assert COMMIT_SHA in gzip.decompress(response.get_data()).decode("utf-8")
+
+
+def test_streamed_page_validators(client):
+    for url, cache_control in ((PAGE, "no-cache"), (f"/o/r/@{COMMIT_SHA}", "public, max-age=31536000, immutable")):
+        response = client.get(url)
+        response.get_data()
+        assert response.status_code == 200
+        assert response.headers["Cache-Control"] == cache_control
+        assert response.headers["ETag"] == f'"{page_etag()}"'
+        assert "Last-Modified" in response.headers
+
+
+def test_etag_per_encoding(client):
+    render(client)
+    plain = client.get(PAGE)
+    gzipped = client.get(PAGE, headers={"Accept-Encoding": "gzip"})
+    assert plain.headers["ETag"] == f'"{page_etag()}"'
+    assert gzipped.headers["ETag"] == f'"{page_etag()}-gzip"'
+
+
+def test_if_none_match_gives_304(client):
+    render(client)
+    for etag in (f'"{page_etag()}"', f'"{page_etag()}-gzip"', f'W/"{page_etag()}"'):
+        response = client.get(PAGE, headers={"If-None-Match": etag, "Accept-Encoding": "gzip"})
+        assert response.status_code == 304
+        assert response.get_data() == b""
+        assert response.headers["ETag"] == f'"{page_etag()}"'
+        assert response.headers["Cache-Control"] == "no-cache"
+        assert response.headers["Vary"] == "Accept-Encoding"
+    assert client.get(PAGE, headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_if_modified_since_gives_304(client):
+    render(client)
+    last_modified = client.get(PAGE).headers["Last-Modified"]
+    assert client.get(PAGE, headers={"If-Modified-Since": last_modified}).status_code == 304
+    earlier = "Mon, 01 Jan 2001 00:00:00 GMT"
+    assert client.get(PAGE, headers={"If-Modified-Since": earlier}).status_code == 200
+    # If-None-Match wins over If-Modified-Since
+    headers = {"If-Modified-Since": last_modified, "If-None-Match": '"other"'}
+    assert client.get(PAGE, headers=headers).status_code == 200
+
+
+def test_pinned_page_is_immutable(client):
+    url = f"/o/r/@{COMMIT_SHA}"
+    render(client, url)
+    response = client.get(url)
+    assert response.headers["Cache-Control"] == "public, max-age=31536000, immutable"
+    assert response.headers["ETag"] == f'"{page_etag()}"'
+    response = client.get(url, headers={"If-None-Match": f'"{page_etag()}"'})
+    assert response.status_code == 304
+    assert response.headers["Cache-Control"] == "public, max-age=31536000, immutable"
+
+
+def test_page_variants_have_their_own_etags(client):
+    render(client)
+    outline = client.get(f"{PAGE}?outline=1")
+    outline.get_data()
+    client_mode = client.get(f"{PAGE}?highlight=client")
+    client_mode.get_data()
+    etags = {client.get(PAGE).headers["ETag"], outline.headers["ETag"], client_mode.headers["ETag"]}
+    assert len(etags) == 3
+    response = client.get(f"{PAGE}?highlight=client", headers={"If-None-Match": f'"{page_etag()}"'})
+    assert response.status_code == 200
@@ -0,0 +1,130 @@
+import app as appmod
+from conftest import COMMIT_SHA, FIXTURE_REPO
+from core.blobs import BLOB_MAX_LINE_BYTES, RAW_BINARY_TYPE, RAW_TEXT_TYPE, LineIndex, raw_content_type
+
+
+def index_of(tmp_path, data: bytes):
+    path = tmp_path / "file"
+    path.write_bytes(data)
+    return path, LineIndex(path)
+
+
+def test_lines_and_offsets(tmp_path):
+    path, index = index_of(tmp_path, b"one\ntwo\nthree\n")
+    assert index.lines == 3
+    assert list(index.offsets) == [0, 4, 8, 14]
+    assert index.window(path, 0, 10) == ["one\n", "two\n", "three\n"]
+    assert index.window(path, 1, 1) == ["two\n"]
+
+
+def test_crlf_line_endings_are_kept(tmp_path):
+    path, index = index_of(tmp_path, b"a\r\nb\r\n\r\nc")
+    assert index.lines == 4
+    assert index.window(path, 0, 4) == ["a\r\n", "b\r\n", "\r\n", "c"]
+
+
+def test_no_final_newline(tmp_path):
+    path, index = index_of(tmp_path, b"first\nlast")
+    assert index.lines == 2
+    assert index.offsets[-1] == index.size == 10
+    assert index.window(path, 1, 5) == ["last"]
+
+
+def test_empty_file(tmp_path):
+    path, index = index_of(tmp_path, b"")
+    assert index.size == 0
+    assert index.lines == 0
+    assert index.pages() == 1
+    assert index.window(path, 0, 10) == []
+
+
+def test_pages_and_reading_past_the_end(tmp_path):
+    path, index = index_of(tmp_path, b"".join(b"%d\n" % k for k in range(25)))
+    assert index.pages(10) == 3
+    assert index.window(path, 20, 10) == [f"{k}\n" for k in range(20, 25)]
+    assert index.window(path, 25, 10) == []
+    assert index.window(path, 1000, 10) == []
+
+
+def test_long_lines_are_cut(tmp_path):
+    path, index = index_of(tmp_path, b"x" * (BLOB_MAX_LINE_BYTES + 100) + b"\nshort\n")
+    long_line, short = index.window(path, 0, 2)
+    assert long_line == "x" * BLOB_MAX_LINE_BYTES + "\n"
+    assert short == "short\n"
+
+
+def test_invalid_utf8_is_replaced(tmp_path):
+    path, index = index_of(tmp_path, b"caf\xe9\n")
+    assert index.window(path, 0, 1) == ["caf\ufffd\n"]
+
+
+def test_blob_view_pages(client):
+    response = client.get("/o/r/blob/pkg/mod.py")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "no-cache"
+    assert "add" in response.get_data(as_text=True)
+    assert client.get("/o/r/blob/pkg/mod.py?page=2").status_code == 404
+    assert client.get("/o/r/blob/pkg/mod.py?page=0").status_code == 400
+    assert client.get("/o/r/blob/missing.py").status_code == 404
+
+
+def test_raw_content_type_never_serves_active_content(tmp_path):
+    assert raw_content_type(tmp_path / "page.html", False) == RAW_TEXT_TYPE
+    for name in ("page.html", "logo.svg", "app.js", "feed.xml", "archive.tar.gz", "noextension"):
+        assert raw_content_type(tmp_path / name, True) == RAW_BINARY_TYPE
+    assert raw_content_type(tmp_path / "pixel.png", True) == "image/png"
+
+
+def raw_url(path):
+    return f"/o/r/@{COMMIT_SHA}/raw/{path}"
+
+
+def test_raw_active_content_is_not_served_as_such(client):
+    # SVG counts as binary, so it is sent as opaque bytes rather than text
+    for path, mimetype in (("web/index.html", RAW_TEXT_TYPE), ("web/app.js", RAW_TEXT_TYPE),
+                           ("web/logo.svg", RAW_BINARY_TYPE)):
+        response = client.get(raw_url(path))
+        assert response.status_code == 200
+        assert response.mimetype == mimetype
+        assert response.headers["X-Content-Type-Options"] == "nosniff"
+        assert response.headers["Content-Security-Policy"] == "sandbox"
+        assert response.headers["Cache-Control"] == "public, max-age=31536000, immutable"
+        assert response.get_data() == (FIXTURE_REPO / path).read_bytes()
+
+
+def test_raw_binary_keeps_safe_types(client):
+    response = client.get(raw_url("web/pixel.png"))
+    assert response.mimetype == "image/png"
+    assert response.get_data() == (FIXTURE_REPO / "web/pixel.png").read_bytes()
+
+
+def test_raw_range_and_conditional(client):
+    data = (FIXTURE_REPO / "pkg/mod.py").read_bytes()
+    response = client.get(raw_url("pkg/mod.py"), headers={"Range": "bytes=2-9"})
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == f"bytes 2-9/{len(data)}"
+    assert response.get_data() == data[2:10]
+    assert client.get(raw_url("pkg/mod.py"), headers={"Range": "bytes=9999-"}).status_code == 416
+
+    etag = client.get(raw_url("pkg/mod.py")).headers["ETag"]
+    response = client.get(raw_url("pkg/mod.py"), headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.get_data() == b""
+
+
+def test_raw_branch_route_reuses_the_checkout(client, fetches):
+    for _ in range(3):
+        response = client.get("/o/r/raw/README.md")
+        assert response.status_code == 200
+        assert response.headers["Cache-Control"] == "no-cache"
+    assert fetches == [COMMIT_SHA]
+
+
+def test_raw_rejects_paths_outside_the_checkout(client):
+    assert client.get(raw_url("README.md")).status_code == 200
+    checkout = appmod.checkouts.acquire("https://github.com/o/r", COMMIT_SHA)
+    appmod.checkouts.release(checkout)
+    (checkout.repo_dir.parent / "secret.txt").write_text("outside")
+    assert client.get(raw_url("%2E%2E/secret.txt")).status_code == 404
+    for path in ("%2E%2E/%2E%2E/etc/passwd", "pkg/%2E%2E/%2E%2E/%2E%2E/etc/passwd", "/etc/passwd", "pkg", "missing.txt"):
+        assert client.get(raw_url(path), follow_redirects=True).status_code == 404
@@ -0,0 +1,44 @@
+import pytest
+
+from core import budget as budget_module
+from core.budget import RenderBudget, MODE_HIGHLIGHT, MODE_LISTED, MODE_PLAIN
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(budget_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_file_modes_follow_thresholds(clock):
+    budget = RenderBudget(10.0)
+    assert budget.file_mode("a.py") == MODE_HIGHLIGHT
+    clock[0] = 107.4
+    assert budget.file_mode("b.py") == MODE_HIGHLIGHT
+    clock[0] = 107.5
+    assert budget.file_mode("c.py") == MODE_PLAIN
+    clock[0] = 109.0
+    assert budget.file_mode("d.py") == MODE_LISTED
+    assert budget.file_mode("e.py") == MODE_LISTED
+    assert budget.degraded == [("c.py", MODE_PLAIN), ("d.py", MODE_LISTED), ("e.py", MODE_LISTED)]
+    assert budget.degraded_paths(MODE_LISTED) == ["d.py", "e.py"]
+    stats = budget.to_stats()
+    assert stats["used_percent"] == 90.0
+    assert stats["degraded_files"] == {MODE_PLAIN: 1, MODE_LISTED: 2}
+
+
+def test_phases_accumulate(clock):
+    budget = RenderBudget(10.0)
+    with budget.phase("fetch"):
+        clock[0] += 2.0
+    with budget.phase("fetch"):
+        clock[0] += 0.5
+    assert budget.to_stats()["phases"] == {"fetch": 2.5}
+
+
+def test_no_limit_never_degrades(clock):
+    budget = RenderBudget(None)
+    clock[0] += 1e6
+    assert budget.file_mode("a.py") == MODE_HIGHLIGHT
+    assert budget.to_stats()["used_percent"] is None
@@ -0,0 +1,18 @@
+from core.checkouts import Checkout
+from core.repo_to_single_page import MAX_DEFAULT_BYTES, build_html, line_stats
+
+
+def test_renders_do_not_share_file_records(tmp_path):
+    (tmp_path / "a.py").write_text("# comment\nx = 1\n")
+    (tmp_path / "b.js").write_text("let y = 2;\n")
+    checkout = Checkout("https://github.com/o/r", "a" * 40, tmp_path, 0)
+
+    infos = checkout.files(MAX_DEFAULT_BYTES)
+    build_html("https://github.com/o/r", tmp_path, checkout.sha, infos)
+    assert line_stats(infos)["files"] == 2
+
+    # A later request that lists the files without reading them counts nothing
+    fresh = checkout.files(MAX_DEFAULT_BYTES)
+    assert [i.rel for i in fresh] == [i.rel for i in infos]
+    assert all(i.lines is None and i.tokens is None and i.symbols is None for i in fresh)
+    assert line_stats(fresh) is None
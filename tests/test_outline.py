@@ -0,0 +1,23 @@
+from core.repo_to_single_page import build_html, collect_files, line_stats, MAX_DEFAULT_BYTES
+
+FILES = {
+    "pkg/module.py": '"""Module docstring."""\n\n# A comment\nimport os\n\n\ndef f(x):\n    """Doc."""\n    # inner\n    return x\n',
+    "web/app.js": "/* block\n   comment */\n// line\nfunction g() {\n  return 1; // trailing\n}\n",
+    "README.md": "# Title\n\nSome text.\n",
+}
+
+
+def render_stats(repo, outline):
+    infos = collect_files(repo, MAX_DEFAULT_BYTES)
+    build_html("https://github.com/o/r", repo, "a" * 40, infos, outline=outline)
+    return line_stats(infos)
+
+
+def test_outline_keeps_line_stats(tmp_path):
+    for rel, text in FILES.items():
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+    full = render_stats(tmp_path, outline=False)
+    assert full["comment"] > 0
+    assert render_stats(tmp_path, outline=True) == full
@@ -0,0 +1,51 @@
+import re
+import time
+
+import pytest
+
+from core.search_index import SearchIndex, bounded_search, REGEX_KILL_GRACE_SECONDS, _regex_searcher
+
+
+def make_index():
+    index = SearchIndex()
+    index.add("a.py", "def parse(text):\n    return text\n")
+    index.add("b.txt", "a" * 5000 + "!\n")
+    return index
+
+
+def test_literal_search_finds_lines():
+    results = bounded_search(make_index(), "return", time_limit=2.0)
+    assert [(hit.path, hit.line) for hit in results.hits] == [("a.py", 2)]
+    assert not results.timed_out
+
+
+def test_regex_search_runs_in_worker():
+    results = bounded_search(make_index(), r"def \w+\(", regex=True, time_limit=2.0)
+    assert [(hit.path, hit.line) for hit in results.hits] == [("a.py", 1)]
+
+
+def test_invalid_regex_raises():
+    with pytest.raises(re.error):
+        bounded_search(make_index(), "(unclosed", regex=True)
+
+
+def test_pathological_regex_is_killed():
+    start = time.monotonic()
+    results = bounded_search(make_index(), r"(a+)+$", regex=True, time_limit=0.5)
+    assert results.timed_out
+    assert results.hits == []
+    assert time.monotonic() - start < 0.5 + REGEX_KILL_GRACE_SECONDS + 2.0
+
+
+def test_regex_searches_share_one_worker():
+    index = make_index()
+    bounded_search(index, r"pars\w", regex=True, time_limit=2.0)
+    worker = _regex_searcher._worker._process
+    results = bounded_search(index, r"ret\w+", regex=True, time_limit=2.0)
+    assert [(hit.path, hit.line) for hit in results.hits] == [("a.py", 2)]
+    assert _regex_searcher._worker._process is worker
+    # A killed worker is replaced, and is sent the index again
+    assert bounded_search(index, r"(a+)+$", regex=True, time_limit=0.2).timed_out
+    results = bounded_search(index, r"def", regex=True, time_limit=2.0)
+    assert [(hit.path, hit.line) for hit in results.hits] == [("a.py", 1)]
+    assert _regex_searcher._worker._process not in (None, worker)
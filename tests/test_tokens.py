@@ -0,0 +1,83 @@
+import random
+
+from core.tokens import estimate_tokens, plan_chunks, split_document
+
+CAP = 1000
+
+
+def plan(texts, chunk_tokens=CAP):
+    doc_tokens = [(index, estimate_tokens(text)) for index, text in enumerate(texts, 1)]
+    chunks = plan_chunks(doc_tokens, chunk_tokens,
+                         lambda index: [estimate_tokens(p) for p in split_document(texts[index - 1], chunk_tokens)])
+    return chunks
+
+
+def chunk_parts(texts, chunks, chunk_tokens=CAP):
+    """The text of every (document, part) in each chunk."""
+    splits = {}
+    out = []
+    for chunk in chunks:
+        parts = []
+        for index, part, count in chunk.documents:
+            text = texts[index - 1]
+            if count > 1:
+                if index not in splits:
+                    splits[index] = split_document(text, chunk_tokens)
+                text = splits[index][part - 1]
+            parts.append(text)
+        out.append(parts)
+    return out
+
+
+def check(texts, chunk_tokens=CAP):
+    chunks = plan(texts, chunk_tokens)
+    for chunk, parts in zip(chunks, chunk_parts(texts, chunks, chunk_tokens)):
+        assert all(parts)
+        assert chunk.tokens == sum(estimate_tokens(p) for p in parts)
+        assert 0 < chunk.tokens <= chunk_tokens
+    # Splitting never loses or reorders text
+    for text in texts:
+        if estimate_tokens(text) > chunk_tokens:
+            assert "".join(split_document(text, chunk_tokens)) == text
+    return chunks
+
+
+def test_one_long_line():
+    text = "x = 1;" * 20_000
+    chunks = check([text])
+    total = estimate_tokens(text)
+    assert total >= 80 * CAP
+    assert len(chunks) in (total // CAP, total // CAP + 1)
+
+
+def test_huge_word_is_cut_by_characters():
+    check(["a" * 50_000])
+
+
+def test_uneven_lines():
+    text = "".join(f"line {k}\n" for k in range(10)) + "y, " * 10_000 + "\n" + "".join(f"end {k}\n" for k in range(10))
+    chunks = check([text])
+    assert len(chunks) == len(split_document(text, CAP))
+    assert chunks[0].documents[0][1:] == (1, len(chunks))
+
+
+def test_exact_multiple():
+    line = "w" + " w" * 98 + "\n"
+    assert estimate_tokens(line) == 100
+    text = line * 30
+    assert estimate_tokens(text) == 3 * CAP
+    chunks = check([text])
+    assert [c.tokens for c in chunks] == [CAP, CAP, CAP]
+
+
+def test_small_documents_pack_after_split_parts():
+    texts = ["z\n" * 3000, "small\n", "also small\n"]
+    chunks = check(texts)
+    assert chunks[-1].documents[-2:] == [(2, 1, 1), (3, 1, 1)]
+
+
+def test_random_documents_respect_cap():
+    rng = random.Random(7)
+    alphabet = ["foo", "  ", "\n", "_", "12345", "verylongidentifier", "+=", "'s", "\t\n  "]
+    texts = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 5000))) for _ in range(20)]
+    check(texts, 200)